@@ -1,123 +1,454 @@
 import os
-import urllib.request
-from PyQt6.QtCore import QThread, pyqtSignal
+import re
+import time
+from collections import OrderedDict
+from PyQt6.QtCore import QThread, QTimer, pyqtSignal
 from PyQt6.QtWebEngineCore import QWebEngineUrlRequestInterceptor, QWebEngineUrlRequestInfo
+from browser.blocklist import (CompactDomainSet, compile_blocklist, load_cached_blocklist,
+                               fetch_blocklist, load_fetch_meta,
+                               BUNDLED_BLOCKLIST, DOWNLOADED_BLOCKLIST, BLOCKLIST_CACHE)
+from browser.filters import FilterEngine, BUILTIN_FILTERS, filter_list_paths, is_third_party
+from browser.cosmetic import cosmetic_engine
+
+# Text lists the binary cache is compiled from (bundled copy + optional downloaded copy)
+BLOCKLIST_SOURCES = [BUNDLED_BLOCKLIST, DOWNLOADED_BLOCKLIST]
+
+# How often the downloaded list is re-checked against the server
+BLOCKLIST_REFRESH_INTERVAL = 24 * 60 * 60 # 1 day (seconds)
 
 class BlocklistLoader(QThread):
-    loaded = pyqtSignal(set)
+    loaded = pyqtSignal(object) # MappedDomainIndex (or CompactDomainSet)
+    filters_loaded = pyqtSignal(object) # FilterEngine
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.compile_hosts = True
+        self.filter_paths = []
     
     def run(self):
-        hosts = set()
-        blocklist_path = "adblock_list.txt"
-        
-        # We use StevenBlack's Unified Hosts List (combines AdAway, MVP, etc.)
-        # It's the gold standard for system-wide adblocking.
-        blocklist_url = "https://raw.githubusercontent.com/StevenBlack/hosts/master/hosts"
-        
-        # Try local first
-        if os.path.exists(blocklist_path):
-            try:
-                with open(blocklist_path, 'r', encoding='utf-8') as f:
-                    for line in f:
-                        line = line.strip()
-                        if line and not line.startswith('#'):
-                            # Handle "0.0.0.0 domain.com" or just "domain.com"
-                            parts = line.split()
-                            if len(parts) >= 2 and (parts[0] == "0.0.0.0" or parts[0] == "127.0.0.1"):
-                                hosts.add(parts[1])
-                            elif len(parts) == 1:
-                                hosts.add(parts[0])
-            except Exception as e:
-                print(f"Error reading local blocklist: {e}")
-        
-        # If empty or missing, download
-        if not hosts:
+        if self.compile_hosts:
+            self.load_hosts()
+        if self.filter_paths:
+            # EasyList-sized lists take a moment to parse: keep it off the GUI thread
+            engine = FilterEngine.from_files(self.filter_paths)
+            print(f"XeNit AdBlock: Loaded {engine.rule_count} network filters ({engine.skipped} unsupported skipped), "
+                  f"{len(engine.cosmetic)} element hiding rules")
+            self.filters_loaded.emit(engine)
+    
+    def load_hosts(self):
+        # If no text list exists at all, download one
+        if not any(os.path.exists(p) and os.path.getsize(p) > 0 for p in BLOCKLIST_SOURCES):
             try:
                 print("Downloading massive unified adblock list (StevenBlack)...")
-                
-                # Set a proper User-Agent to avoid 403 Forbidden from GitHub
-                req = urllib.request.Request(
-                    blocklist_url, 
-                    headers={'User-Agent': 'Mozilla/5.0'}
-                )
-                
-                with urllib.request.urlopen(req) as response:
-                    data = response.read().decode('utf-8')
-                    # Save for offline use
-                    with open(blocklist_path, 'w', encoding='utf-8') as f:
-                        f.write(data)
-                    
-                    for line in data.splitlines():
-                        line = line.strip()
-                        if line and not line.startswith('#'):
-                            parts = line.split()
-                            # Hosts format: 0.0.0.0 ad.doubleclick.net
-                            if len(parts) >= 2 and (parts[0] == "0.0.0.0" or parts[0] == "127.0.0.1"):
-                                hosts.add(parts[1])
-                            # Raw domain list support just in case
-                            elif len(parts) == 1:
-                                hosts.add(parts[0])
-                                
-                print(f"Downloaded {len(hosts)} rules. Total Shield Active.")
+                fetch_blocklist()
             except Exception as e:
                 print(f"Error downloading blocklist: {e}")
-                
-        self.loaded.emit(hosts)
+                return
+        
+        # Text lists are newer than the cache (or there is no cache): recompile once
+        index = rebuild_blocklist_index()
+        if index is not None:
+            self.loaded.emit(index)
+
+def rebuild_blocklist_index():
+    """Compiles the text lists into the binary cache and maps the result (worker threads only)."""
+    try:
+        count, path = compile_blocklist(BLOCKLIST_SOURCES, BLOCKLIST_CACHE)
+        print(f"XeNit AdBlock: Compiled {count} domains into {path}")
+        index = load_cached_blocklist(BLOCKLIST_SOURCES, BLOCKLIST_CACHE)
+        if index is not None:
+            return index
+    except Exception as e:
+        print(f"Error compiling blocklist: {e}")
+    # Cache not writable / mappable: keep the list in memory, still as packed hashes
+    try:
+        index = CompactDomainSet.from_sources(BLOCKLIST_SOURCES)
+    except Exception as e:
+        print(f"Error loading blocklist: {e}")
+        return None
+    print(f"XeNit AdBlock: Using in-memory blocklist ({index.nbytes // 1024} KB)")
+    return index if len(index) else None
+
+class BlocklistUpdater(QThread):
+    """
+    Background refresh of the downloaded hosts list. Uses ETag / If-Modified-Since,
+    so an unchanged list costs one 304. A changed list is parsed and compiled here,
+    off the GUI thread; the finished index is handed over in one signal and swapped
+    in whole, so a request never sees a half-built list.
+    """
+    loaded = pyqtSignal(object) # MappedDomainIndex
+    
+    def run(self):
+        try:
+            changed = fetch_blocklist()
+        except Exception as e:
+            # Partial failure: keep serving the current list and files untouched
+            print(f"XeNit AdBlock: Blocklist refresh failed, keeping current list ({e})")
+            return
+        if not changed:
+            print("XeNit AdBlock: Blocklist is up to date (304)")
+            return
+        index = rebuild_blocklist_index()
+        if index is not None:
+            self.loaded.emit(index)
+
+# Qt request types -> ABP resource type options
+QT_RESOURCE_TYPES = {}
+for _qt_name, _abp_type in [
+    ("ResourceTypeSubFrame", "subdocument"), ("ResourceTypeStylesheet", "stylesheet"),
+    ("ResourceTypeScript", "script"), ("ResourceTypeImage", "image"),
+    ("ResourceTypeFavicon", "image"), ("ResourceTypeFontResource", "font"),
+    ("ResourceTypeObject", "object"), ("ResourceTypePluginResource", "object"),
+    ("ResourceTypeMedia", "media"), ("ResourceTypeXhr", "xmlhttprequest"),
+    ("ResourceTypePing", "ping"), ("ResourceTypeWebSocket", "websocket"),
+]:
+    # Some members only exist in newer Qt releases
+    _member = getattr(QWebEngineUrlRequestInfo.ResourceType, _qt_name, None)
+    if _member is not None:
+        QT_RESOURCE_TYPES[_member] = _abp_type
+
+_MAIN_FRAME = QWebEngineUrlRequestInfo.ResourceType.ResourceTypeMainFrame
+
+# Navigations the user asked for directly: never second-guessed by the blocker
+USER_NAVIGATIONS = {
+    QWebEngineUrlRequestInfo.NavigationType.NavigationTypeTyped,
+    QWebEngineUrlRequestInfo.NavigationType.NavigationTypeBackForward,
+    QWebEngineUrlRequestInfo.NavigationType.NavigationTypeReload,
+}
+
+# How much of the pipeline a request went through (per-type counters in AdBlockStats)
+PATH_SKIPPED = "skipped" # User navigation: no checks at all
+PATH_HOST_ONLY = "host" # Host verdict only (other main frames, untargeted first-party)
+PATH_FIRST_PARTY = "first-party" # Host verdict + the filters that can match first-party requests
+PATH_FULL = "full" # Host verdict + network filters
+
+# Host-level verdicts cached per host by the interceptor
+VERDICT_BLOCK = "block"
+VERDICT_ALLOW = "allow"
+VERDICT_CHECK_PATH = "check-path"
+
+# Host substrings that are blocked wherever they appear, compiled into one pass
+CRITICAL_HOST_KEYWORDS = re.compile("doubleclick|adservice|googlesyndication|pixel|tracker|analytics")
+
+class AdBlockStats:
+    """
+    Low-overhead interceptor statistics: plain counters, a log2 histogram of the
+    per-request decision time, and bounded per-rule / per-host / per-site tallies.
+    """
+    # Bucket i holds decisions that took < 2**i microseconds; the last bucket is open-ended
+    HISTOGRAM_BUCKETS = 16
+    MAX_KEYS = 2000 # Cap on distinct rules / hosts / sites tracked
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.requests = 0
+        self.blocked = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.histogram = [0] * self.HISTOGRAM_BUCKETS
+        self.by_rule = {}
+        self.by_host = {}
+        self.by_site = {} # first-party host -> [requests, blocked]
+        self.by_type = {} # resource type -> {"requests", "blocked", PATH_* counts}
+
+    @staticmethod
+    def _bump(counter, key, limit):
+        if key in counter:
+            counter[key] += 1
+        elif len(counter) < limit:
+            counter[key] = 1
+
+    def record(self, elapsed_ns, reason, host, site, resource_type="other", path=PATH_FULL):
+        self.requests += 1
+        type_counts = self.by_type.get(resource_type)
+        if type_counts is None:
+            type_counts = self.by_type[resource_type] = {
+                "requests": 0, "blocked": 0, PATH_SKIPPED: 0, PATH_HOST_ONLY: 0,
+                PATH_FIRST_PARTY: 0, PATH_FULL: 0}
+        type_counts["requests"] += 1
+        type_counts[path] += 1
+        self.total_ns += elapsed_ns
+        if elapsed_ns > self.max_ns:
+            self.max_ns = elapsed_ns
+        bucket = min((elapsed_ns // 1000).bit_length(), self.HISTOGRAM_BUCKETS - 1)
+        self.histogram[bucket] += 1
+        
+        site_counts = self.by_site.get(site)
+        if site_counts is None:
+            if len(self.by_site) >= self.MAX_KEYS:
+                site_counts = [0, 0] # Untracked site: counted in totals only
+            else:
+                site_counts = self.by_site[site] = [0, 0]
+        site_counts[0] += 1
+        
+        if reason is not None:
+            self.blocked += 1
+            site_counts[1] += 1
+            type_counts["blocked"] += 1
+            self._bump(self.by_rule, reason, self.MAX_KEYS)
+            self._bump(self.by_host, host, self.MAX_KEYS)
+
+    def percentile_us(self, fraction):
+        """Upper bound (us) of the histogram bucket holding the given percentile."""
+        target = self.requests * fraction
+        seen = 0
+        for i, count in enumerate(self.histogram):
+            seen += count
+            if count and seen >= target:
+                return 2 ** i
+        return 0
+
+    def snapshot(self, top=15):
+        def top_items(counter):
+            return sorted(counter.items(), key=lambda kv: kv[1], reverse=True)[:top]
+        return {
+            "requests": self.requests,
+            "blocked": self.blocked,
+            "avg_us": (self.total_ns / self.requests / 1000) if self.requests else 0.0,
+            "max_us": self.max_ns / 1000,
+            "p50_us": self.percentile_us(0.5),
+            "p99_us": self.percentile_us(0.99),
+            "histogram": list(self.histogram),
+            "top_rules": top_items(self.by_rule),
+            "top_hosts": top_items(self.by_host),
+            "sites": {site: tuple(counts) for site, counts in self.by_site.items()},
+            "types": sorted(((t, dict(c)) for t, c in self.by_type.items()),
+                            key=lambda kv: kv[1]["requests"], reverse=True),
+        }
 
 class AdBlockInterceptor(QWebEngineUrlRequestInterceptor):
     def __init__(self, parent=None):
         super().__init__(parent)
         # Start with essential hardcoded blocks for immediate protection
-        self.blocked_hosts = {
+        self.blocked_hosts = CompactDomainSet([
             "doubleclick.net", "adservice.google.com", "googlesyndication.com", "google-analytics.com",
-            "adserver.com", "adnxs.com", "pagead2.googlesyndication.com",
-            "facebook.com/tr", "connect.facebook.net", "platform.twitter.com",
+            "adserver.com", "adnxs.com", "connect.facebook.net", "platform.twitter.com",
             # ... keep some key ones for startup speed ...
-             "youtube.com/ads", "popads.net"
-        }
+            "popads.net"
+        ])
+        
+        # Path / query rules (ABP syntax). Built-ins are tiny; full lists load in the background.
+        self.filters = FilterEngine.from_text(BUILTIN_FILTERS)
+        
+        # Full list: mmap the precompiled cache (milliseconds). Only if the text lists
+        # are newer than the cache do we fall back to parsing them in the background.
+        self.blocklist = load_cached_blocklist(BLOCKLIST_SOURCES, BLOCKLIST_CACHE)
+        
+        # Bounded LRU of host -> verdict (pages hit the same few hosts hundreds of times)
+        self.host_cache = OrderedDict()
+        self.host_cache_size = 4096
+        self.cache_hits = 0
+        self.cache_misses = 0
+        
+        # Counters + decision-time histogram for xenit://adblock-stats
+        self.stats = AdBlockStats()
         
-        # Start async loader
-        self.loader = BlocklistLoader()
+        # Async loader (parented so it outlives a dropped Python reference)
+        self.loader = BlocklistLoader(self)
         self.loader.loaded.connect(self.update_blocklist)
-        self.loader.start()
+        self.loader.filters_loaded.connect(self.update_filters)
+        self.loader.compile_hosts = self.blocklist is None
+        self.loader.filter_paths = filter_list_paths()
+        if self.blocklist is not None:
+            print(f"AdBlock Logic Fully Armed: {len(self.blocklist)} domains blocked (cached).")
+        if self.loader.compile_hosts or self.loader.filter_paths:
+            self.loader.start()
+        
+        # Periodic conditional refresh (first check shortly after startup, not during it)
+        self.updater = BlocklistUpdater(self)
+        self.updater.loaded.connect(self.update_blocklist)
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self.check_for_updates)
+        self.refresh_timer.start(60 * 60 * 1000) # Hourly: cheap, only fetches when due
+        QTimer.singleShot(30000, self.check_for_updates)
+
+    def check_for_updates(self, force=False):
+        if self.updater.isRunning() or self.loader.isRunning():
+            return
+        last_check = load_fetch_meta().get("checked_at", 0)
+        if force or time.time() - last_check >= BLOCKLIST_REFRESH_INTERVAL:
+            self.updater.start()
 
-    def update_blocklist(self, new_hosts):
-        self.blocked_hosts.update(new_hosts)
-        print(f"AdBlock Logic Fully Armed: {len(self.blocked_hosts)} domains blocked.")
+    def background_threads(self):
+        return [self.loader, self.updater]
 
-    def interceptRequest(self, info: QWebEngineUrlRequestInfo):
-        url_str = info.requestUrl().toString().lower()
-        host = info.requestUrl().host().lower()
+    def update_blocklist(self, index):
+        old = self.blocklist
+        self.blocklist = index
+        self.host_cache.clear() # Cached verdicts came from the old list
+        if old is not None and old is not index:
+            # Only now that nothing reads it: unmap the old version and delete its file
+            old.retire()
+        print(f"AdBlock Logic Fully Armed: {len(self.blocklist)} domains blocked.")
+
+    def update_filters(self, engine):
+        self.filters = engine
+        self.host_cache.clear()
+        # The lists' ## rules go to the shared cosmetic engine (same lists for every profile)
+        cosmetic_engine.set_list_rules(engine.cosmetic)
+
+    def stats_snapshot(self):
+        snapshot = self.stats.snapshot()
+        snapshot["cache"] = self.cache_stats()
+        snapshot["domains"] = len(self.blocked_hosts) + (len(self.blocklist) if self.blocklist is not None else 0)
+        snapshot["filters"] = self.filters.rule_count
+        return snapshot
+
+    def cache_stats(self):
+        total = self.cache_hits + self.cache_misses
+        return {
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "hit_rate": self.cache_hits / total if total else 0.0,
+            "size": len(self.host_cache),
+        }
+
+    def _host_verdict(self, host):
+        """
+        Host-level decision, cached as (verdict, reason): block outright, allow
+        outright, or needs the path rules. `reason` names the list entry that blocked.
+        """
+        cache = self.host_cache
+        entry = cache.get(host)
+        if entry is not None:
+            self.cache_hits += 1
+            cache.move_to_end(host)
+            return entry
+        self.cache_misses += 1
         
-        # 1. Host-based Blocking (Fast)
-        if host in self.blocked_hosts:
-            info.block(True)
-            return
+        canonical = host.lower().rstrip('.')
+        blocklist = self.blocklist
+        entry = (VERDICT_CHECK_PATH, None)
+        if not canonical:
+            entry = (VERDICT_ALLOW, None) # data:, blob:, qrc: ... nothing to match
+        else:
+            # 1. Host-based Blocking (suffix lookups, also covers subdomains)
+            listed = self.blocked_hosts.match(canonical)
+            if listed is None and blocklist is not None:
+                listed = blocklist.match(canonical)
+            if listed is not None:
+                entry = (VERDICT_BLOCK, f"||{listed}^ (hosts list)")
+            else:
+                # 2. Keyword / Pattern Blocking for other sites (single compiled scan)
+                keyword = CRITICAL_HOST_KEYWORDS.search(canonical)
+                if keyword:
+                    entry = (VERDICT_BLOCK, f"host keyword: {keyword.group()}")
+                elif self.filters.is_host_allowed(canonical):
+                    entry = (VERDICT_ALLOW, None)
+        
+        cache[host] = entry
+        if len(cache) > self.host_cache_size:
+            cache.popitem(last=False)
+        return entry
 
-        # 2. Strict YouTube Ad Blocking (Path/Query based)
-        # YouTube loads ads from the same domain or google domains, often identified by path.
-        if "youtube.com" in host or "googlevideo.com" in host:
-            # Block ad-specific API endpoints
-            if "/pagead/" in url_str or \
-               "/ptracking" in url_str or \
-               "/api/stats/ads" in url_str or \
-               "&ad_format=" in url_str or \
-               "&ad_type=" in url_str:
-                info.block(True)
-                print(f"XeNit AdBlock: Blocked YouTube Ad Request -> {url_str[:50]}...")
+    def interceptRequest(self, info: QWebEngineUrlRequestInfo):
+        start = time.perf_counter_ns()
+        url = info.requestUrl()
+        host = url.host()
+        site = info.firstPartyUrl().host()
+        qt_type = info.resourceType()
+        if qt_type == _MAIN_FRAME:
+            resource_type = "document"
+            if info.navigationType() in USER_NAVIGATIONS:
+                # The user typed / reloaded this: no checks at all
+                self.stats.record(time.perf_counter_ns() - start, None, host, site,
+                                  resource_type, PATH_SKIPPED)
                 return
+        else:
+            resource_type = QT_RESOURCE_TYPES.get(qt_type, "other")
+        reason, path = self._decide(url, host, site, resource_type)
+        if reason is not None:
+            info.block(True)
+        self.stats.record(time.perf_counter_ns() - start, reason, host, site, resource_type, path)
 
-        # 3. Keyword / Pattern Blocking for other sites
-        critical_keywords = ["doubleclick", "adservice", "googlesyndication", "pixel", "tracker", "analytics"]
-        for kw in critical_keywords:
-            if kw in host:
-                info.block(True)
-                return
-                
-        # 4. Universal Ad-Query Blocker (Aggressive)
-        # Blocks any request with explicit ad params
-        if "google_ads" in url_str or "doubleclick.net" in url_str:
-             info.block(True)
-             return
+    def _decide(self, url, host, site, resource_type):
+        """
+        Returns (rule / list entry that blocks the request or None, PATH_*).
+        Third-party subresources go through every network filter; first-party ones
+        skip the $third-party rules (most of EasyList), or all rules when none can match.
+        """
+        # 1-2. Host-level verdict (LRU cached)
+        verdict, reason = self._host_verdict(host)
+        if verdict is VERDICT_BLOCK:
+            return reason, PATH_HOST_ONLY
+        if verdict is VERDICT_ALLOW or resource_type == "document":
+            # Link / redirect main frames: only the host lists (popunder domains) apply
+            return None, PATH_HOST_ONLY
+
+        host = host.lower()
+        if host.endswith('.'):
+            # YouTube "Dot Trick" hosts: match rules against the canonical host
+            host = host.rstrip('.')
+        source_host = site.lower().rstrip('.')
+        third_party = is_third_party(host, source_host)
+        if not third_party and not self.filters.has_first_party_rules(host):
+            # Same-site subresource no rule can target (site CSS, fonts, images)
+            return None, PATH_HOST_ONLY
 
+        # 3. Network filters (ABP syntax): YouTube ad endpoints, ad-query params, user lists
+        url_str = url.toString().lower()
+        if url.host().endswith('.'):
+            url_str = url_str.replace(host + '.', host, 1)
+        rule = self.filters.match(url_str, host, source_host, resource_type, third_party)
+        return (rule.raw if rule is not None else None), (PATH_FULL if third_party else PATH_FIRST_PARTY)
 
+class AdBlockService:
+    """
+    One ref-counted AdBlockInterceptor per QWebEngineProfile.
+    Every WebView (in every BrowserWindow) sharing a profile shares the same
+    interceptor, so the blocklist is parsed once and held in memory once.
+    """
+    _services = {} # QWebEngineProfile -> AdBlockService
+
+    def __init__(self, profile):
+        self.profile = profile
+        self.refcount = 0
+        # Parent to the profile: the interceptor must live as long as the profile uses it
+        self.interceptor = AdBlockInterceptor(profile)
+        profile.setUrlRequestInterceptor(self.interceptor)
+        profile.destroyed.connect(lambda *_: AdBlockService._services.pop(profile, None))
+
+    @classmethod
+    def acquire(cls, profile):
+        """Returns the shared interceptor for `profile`, creating it on first use."""
+        service = cls._services.get(profile)
+        if service is None:
+            service = cls(profile)
+            cls._services[profile] = service
+        service.refcount += 1
+        return service.interceptor
+
+    @classmethod
+    def release(cls, profile):
+        """Drops one reference. The interceptor is torn down when the last tab goes away."""
+        service = cls._services.get(profile)
+        if service is None:
+            return
+        service.refcount -= 1
+        if service.refcount <= 0:
+            del cls._services[profile]
+            service.shutdown()
+
+    @classmethod
+    def active_services(cls):
+        return len(cls._services)
+
+    def shutdown(self):
+        try:
+            self.profile.setUrlRequestInterceptor(None)
+        except RuntimeError:
+            pass # Profile already deleted
+        self.interceptor.refresh_timer.stop()
+        running = [t for t in self.interceptor.background_threads() if t.isRunning()]
+        if not running:
+            self.interceptor.deleteLater()
+            return
+        # Never delete a QThread while it is still downloading or parsing
+        interceptor = self.interceptor
+        def delete_when_idle():
+            if not any(t.isRunning() for t in running):
+                interceptor.deleteLater()
+        for thread in running:
+            thread.finished.connect(delete_when_idle)
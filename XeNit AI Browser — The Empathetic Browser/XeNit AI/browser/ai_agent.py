@@ -59,14 +59,14 @@ class AIAgent:
         
         if context and context.get("cleanup_proposal") and is_confirmed:
              proposal = context["cleanup_proposal"]
-             indices = proposal["indices"] # List of tab indices
+             tab_ids = proposal["tab_ids"] # Stable tab ids, most recently used first
              topic = proposal["topic"]
              titles = proposal.get("titles", [])
              
              # Strategy: Keep first 2, Close rest (2..N)
-             close_indices = indices[2:] 
+             close_ids = tab_ids[2:] 
              
-             if not close_indices:
+             if not close_ids:
                  return f"I analyzed your tabs about '{topic}' but there aren't enough to safely close. I'll keep them open."
              
              import json
@@ -74,7 +74,7 @@ class AIAgent:
              kept_titles = titles[:2]
              summary_text = f"Keeping focused on:\n1. {kept_titles[0]}\n2. {kept_titles[1] if len(kept_titles)>1 else ''}..."
              
-             response = f"Cleaning up tabs for '{topic}'. {summary_text}\nClosing {len(close_indices)} background tabs. [[CLOSE_TABS: {json.dumps(close_indices)}]]"
+             response = f"Cleaning up tabs for '{topic}'. {summary_text}\nClosing {len(close_ids)} background tabs. [[CLOSE_TABS: {json.dumps(close_ids)}]]"
              self._process_actions(response)
              return response
 
@@ -121,7 +121,7 @@ You are currently viewing the user's social media chat.
 Help the user communicate better, resolve conflicts, and express empathy.
 
 === HOW TO ANALYZE ===
-1. Use the 'Current Page Content' to read the chat history.
+1. Use the 'Recent Chat Messages' (or the page content) to read the chat history.
 2. Identify the mood of the conversation (Angry? Sad? Flirty? Professional?).
 3. If the user asks "How should I reply?", suggest 3 options:
    - Option A: Polite/Formal
@@ -230,10 +230,17 @@ The user appears to be feeling emotionally low or stressed.
         page_context_str = ""
         if context:
             page_context_str = f"\nCurrent Page Title: {context.get('title', 'Unknown')}\nCurrent URL: {context.get('url', 'Unknown')}\n"
-            if context.get('text'):
+            if context.get('chat'):
+                # Chat sites: only the latest messages of the open thread, oldest first
+                page_context_str += f"Recent Chat Messages:\n{context['chat']}\n"
+            elif context.get('text'):
                 # Truncate text to avoid token limits (NVIDIA Nim limits vary, safely assuming ~4k chars for now)
                 truncated_text = context['text'][:8000] 
                 page_context_str += f"Page Content (Truncated): {truncated_text}\n"
+            # The tab list costs a line per tab: only send it when the user asks about tabs
+            tab_keywords = ["tab", "close", "clean up", "declutter", "clutter", "switch to", "too many"]
+            if context.get('tabs') and any(kw in lower_msg for kw in tab_keywords):
+                page_context_str += f"Open Tabs (id: title):\n{context['tabs']}\n"
         
         messages = [
             {"role": "system", "content": system_prompt},
@@ -0,0 +1,330 @@
+"""
+XeNit AI — Blocklist Storage
+Parsing of hosts / domain lists, the compact in-memory domain set, and the
+precompiled binary cache that the AdBlock interceptor mmaps at startup.
+"""
+import os
+import json
+import time
+import mmap
+import struct
+import bisect
+import zlib
+import urllib.error
+import urllib.request
+from array import array
+
+# Project root (same convention as MemoryManager) and per-user data dir (same as DataManager)
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(os.path.expanduser("~"), ".xenit_browser")
+
+BUNDLED_BLOCKLIST = os.path.join(BASE_DIR, "adblock_list.txt")
+DOWNLOADED_BLOCKLIST = os.path.join(DATA_DIR, "adblock_list.txt")
+BLOCKLIST_CACHE = os.path.join(DATA_DIR, "adblock_cache.bin")
+# ETag / Last-Modified of the downloaded list, for conditional refreshes
+BLOCKLIST_META = os.path.join(DATA_DIR, "adblock_list.meta.json")
+
+# We use StevenBlack's Unified Hosts List (combines AdAway, MVP, etc.)
+# It's the gold standard for system-wide adblocking.
+BLOCKLIST_URL = "https://raw.githubusercontent.com/StevenBlack/hosts/master/hosts"
+
+# ── Text Lists ───────────────────────────────────────────────────────────────
+
+# Hosts-file bookkeeping entries that must never be treated as ad domains
+# (with suffix matching, "local" would otherwise block every *.local host)
+HOSTS_FILE_NOISE = {
+    "localhost", "localhost.localdomain", "local", "broadcasthost", "0.0.0.0",
+    "ip6-localhost", "ip6-loopback", "ip6-localnet", "ip6-mcastprefix",
+    "ip6-allnodes", "ip6-allrouters", "ip6-allhosts",
+}
+
+def parse_hosts_line(line):
+    """Returns the domain from a hosts-file or plain domain-list line, or None."""
+    line = line.strip()
+    if not line or line.startswith('#'):
+        return None
+    parts = line.split()
+    # Hosts format: 0.0.0.0 ad.doubleclick.net
+    if len(parts) >= 2 and (parts[0] == "0.0.0.0" or parts[0] == "127.0.0.1"):
+        domain = parts[1]
+    # Raw domain list support just in case
+    elif len(parts) == 1:
+        domain = parts[0]
+    else:
+        return None
+    domain = domain.lower().rstrip('.')
+    if domain in HOSTS_FILE_NOISE or '.' not in domain:
+        return None
+    return domain
+
+# ── Binary Cache ─────────────────────────────────────────────────────────────
+#
+# Layout: 32-byte header, `count` sorted uint64 domain hashes, then the bucket
+# table: 2**bucket_bits + 1 uint32 offsets, where bucket b (the top bucket_bits
+# bits of a hash) holds hashes[table[b]:table[b + 1]].
+#   magic (4s) | format version (I) | bucket_bits (I) | unused (I) | count (Q) | newest source mtime_ns (Q)
+# Arrays are stored in native byte order; the cache is machine-local.
+#
+# Each compile writes a new file, adblock_cache.<time_ns>.bin, and the newest
+# one is mapped. A live map is never replaced underneath its reader (Windows
+# refuses to replace a mapped file); old versions are removed once unmapped.
+
+CACHE_MAGIC = b"XNBL"
+CACHE_VERSION = 2
+_HEADER = struct.Struct("<4sIIIQQ")
+
+def domain_hash(domain):
+    """
+    Stable 64-bit hash of a domain (Python's hash() is randomized per run):
+    CRC-32 of the name and of its reverse, both computed in C by zlib. Several
+    times cheaper than a cryptographic digest, and it's on every request.
+    """
+    data = domain.encode()
+    return zlib.crc32(data) << 32 | zlib.crc32(data[::-1])
+
+def bucket_bits(count):
+    """16 to 32 hashes per bucket: the table adds at most half a byte per domain."""
+    return max(1, count.bit_length() - 4)
+
+def bucket_table(hashes, bits):
+    """Offsets of each bucket's first hash in the sorted `hashes` (plus the end)."""
+    shift = 64 - bits
+    return array('I', (bisect.bisect_left(hashes, b << shift) for b in range((1 << bits) + 1)))
+
+def sources_stamp(sources):
+    """Newest mtime (ns) across the source lists that exist, or 0."""
+    return max((os.stat(p).st_mtime_ns for p in sources if os.path.exists(p)), default=0)
+
+def iter_list_domains(sources):
+    for path in sources:
+        if not os.path.exists(path):
+            continue
+        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            for line in f:
+                domain = parse_hosts_line(line)
+                if domain:
+                    yield domain
+
+def cache_versions(cache_path=BLOCKLIST_CACHE):
+    """Compiled versions of `cache_path` on disk, newest first (the unversioned name counts as oldest)."""
+    directory = os.path.dirname(cache_path)
+    stem, ext = os.path.splitext(os.path.basename(cache_path))
+    versions = []
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return []
+    for name in names:
+        if name == stem + ext:
+            versions.append((-1, name))
+        elif name.startswith(stem + ".") and name.endswith(ext):
+            version = name[len(stem) + 1:-len(ext)]
+            if version.isdigit():
+                versions.append((int(version), name))
+    return [os.path.join(directory, name) for _version, name in sorted(versions, reverse=True)]
+
+def remove_cache_file(path):
+    """Best effort: another browser instance may still have `path` mapped."""
+    try:
+        os.remove(path)
+        return True
+    except OSError:
+        return False
+
+def compile_blocklist(sources, cache_path=BLOCKLIST_CACHE):
+    """
+    Compiles one or more hosts / domain lists into a new version of the binary
+    cache. Returns (number of unique domains written, path of the new file).
+    """
+    hashes = array('Q', sorted({domain_hash(d) for d in iter_list_domains(sources)}))
+    bits = bucket_bits(len(hashes))
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    stem, ext = os.path.splitext(cache_path)
+    path = f"{stem}.{time.time_ns()}{ext}"
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(CACHE_MAGIC, CACHE_VERSION, bits, 0, len(hashes), sources_stamp(sources)))
+        hashes.tofile(f)
+        bucket_table(hashes, bits).tofile(f)
+    # Renamed into place whole: a reader never sees a half-written cache.
+    # The target name is new, so no mapped file is ever replaced.
+    os.replace(tmp_path, path)
+    return len(hashes), path
+
+class _SortedHashLookup:
+    """
+    Suffix lookups over sorted uint64 domain hashes in `self._hashes`, with the
+    bucket table in `self._buckets` and 64 - bucket_bits in `self._shift`.
+    """
+    def __len__(self):
+        return len(self._hashes)
+
+    def match(self, host):
+        """Returns the listed suffix of `host` that is blocked, or None."""
+        hashes, buckets, shift = self._hashes, self._buckets, self._shift
+        data = host.rstrip('.').encode()
+        reverse = data[::-1] # A suffix of the host is a prefix of its reverse
+        size = len(data)
+        start = 0
+        # Single-label suffixes (TLDs) are never listed
+        while True:
+            dot = data.find(b'.', start)
+            if dot < 0:
+                return None
+            h = zlib.crc32(data[start:]) << 32 | zlib.crc32(reverse[:size - start]) # domain_hash()
+            lo = buckets[h >> shift]
+            hi = buckets[(h >> shift) + 1]
+            if lo < hi:
+                pos = bisect.bisect_left(hashes, h, lo, hi)
+                if pos < hi and hashes[pos] == h:
+                    return data[start:].decode()
+            start = dot + 1
+
+    def __contains__(self, host):
+        return self.match(host) is not None
+
+class CompactDomainSet(_SortedHashLookup):
+    """
+    In-memory domain set stored as sorted 64-bit hashes in one array('Q'):
+    8 bytes per domain instead of a str object plus a set slot (~100 bytes),
+    so 1M domains fit in 8.5 MB with the bucket table. Same suffix semantics as
+    MappedDomainIndex.
+    
+    Hashes are not reversible: match() returns the host suffix that was found.
+    A false positive needs a 64-bit hash collision, which is negligible.
+    """
+    def __init__(self, domains=()):
+        self._hashes = array('Q', sorted({domain_hash(d.lower().rstrip('.')) for d in domains}))
+        bits = bucket_bits(len(self._hashes))
+        self._buckets = bucket_table(self._hashes, bits)
+        self._shift = 64 - bits
+
+    @classmethod
+    def from_sources(cls, sources):
+        return cls(iter_list_domains(sources))
+
+    @property
+    def nbytes(self):
+        return self._hashes.itemsize * len(self._hashes) + self._buckets.itemsize * len(self._buckets)
+
+    def close(self):
+        pass # Nothing mapped; same interface as MappedDomainIndex
+
+    def retire(self):
+        pass
+
+class MappedDomainIndex(_SortedHashLookup):
+    """
+    Read-only domain index backed by an mmapped binary cache. Lookups hash every
+    suffix of the host ("a.ads.example.com", "ads.example.com", "example.com")
+    and bisect only that hash's bucket, so parent entries block subdomains
+    without loading anything into Python objects.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"Empty blocklist cache: {path}")
+        magic, version, bits, _unused, count, stamp = _HEADER.unpack_from(self._mm, 0)
+        table_start = _HEADER.size + count * 8
+        if magic != CACHE_MAGIC or version != CACHE_VERSION or not 0 < bits < 32 or \
+           len(self._mm) != table_start + ((1 << bits) + 1) * 4:
+            self.close()
+            raise ValueError(f"Incompatible blocklist cache: {path}")
+        self.source_stamp = stamp
+        self._hashes = memoryview(self._mm)[_HEADER.size:table_start].cast('Q')
+        self._buckets = memoryview(self._mm)[table_start:].cast('I')
+        self._shift = 64 - bits
+
+    def close(self):
+        for name in ('_hashes', '_buckets'):
+            view = getattr(self, name, None)
+            if view is not None:
+                view.release()
+                setattr(self, name, None)
+        self._mm.close()
+        self._file.close()
+
+    def retire(self):
+        """Unmaps the index and deletes its file (it was replaced by a newer version)."""
+        self.close()
+        remove_cache_file(self.path)
+
+def load_cached_blocklist(sources, cache_path=BLOCKLIST_CACHE):
+    """
+    Maps the newest version of the binary cache if it is at least as new as
+    every source list, and removes the older versions it supersedes.
+    Returns None when the cache is missing, stale or unreadable.
+    """
+    versions = cache_versions(cache_path)
+    if not versions:
+        return None
+    try:
+        index = MappedDomainIndex(versions[0])
+    except (OSError, ValueError, struct.error) as e:
+        print(f"XeNit AdBlock: Ignoring blocklist cache ({e})")
+        return None
+    if sources_stamp(sources) > index.source_stamp:
+        index.close()
+        return None
+    for old_path in versions[1:]:
+        remove_cache_file(old_path)
+    return index
+
+# ── Conditional Download ─────────────────────────────────────────────────────
+
+def load_fetch_meta(meta_path=BLOCKLIST_META):
+    try:
+        with open(meta_path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_fetch_meta(meta, meta_path):
+    tmp_path = meta_path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(meta, f, indent=4)
+    os.replace(tmp_path, meta_path)
+
+def fetch_blocklist(url=BLOCKLIST_URL, dest=DOWNLOADED_BLOCKLIST, meta_path=BLOCKLIST_META, timeout=30):
+    """
+    Conditionally downloads `url` to `dest` using the stored ETag / Last-Modified.
+    Returns True if a new list was written, False on 304 Not Modified.
+    Raises on network errors or a body with no usable domains; `dest` is only
+    replaced (atomically) once the full download has been validated.
+    """
+    meta = load_fetch_meta(meta_path) if os.path.exists(dest) else {}
+    # Set a proper User-Agent to avoid 403 Forbidden from GitHub
+    headers = {'User-Agent': 'Mozilla/5.0'}
+    if meta.get("etag"):
+        headers['If-None-Match'] = meta["etag"]
+    if meta.get("last_modified"):
+        headers['If-Modified-Since'] = meta["last_modified"]
+    
+    req = urllib.request.Request(url, headers=headers)
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            data = response.read()
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            meta["checked_at"] = time.time()
+            _save_fetch_meta(meta, meta_path)
+            return False
+        raise
+    
+    # A truncated or error page must never replace a good list
+    if not any(parse_hosts_line(line) for line in data.decode('utf-8', errors='ignore').splitlines()):
+        raise ValueError(f"Downloaded blocklist from {url} contains no domains")
+    
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    tmp_path = dest + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, dest)
+    _save_fetch_meta({"etag": etag, "last_modified": last_modified, "checked_at": time.time()}, meta_path)
+    return True
@@ -0,0 +1,231 @@
+"""
+XeNit AI — Page Bridge
+QWebChannel object exposed to our injected scripts (ApplicationWorld only, so
+pages can't see or call it). Replaces scraping console.log for "XENIT_EMOTION:".
+"""
+import re
+import json
+from PyQt6.QtCore import QObject, QFile, QIODevice, pyqtSignal, pyqtSlot, pyqtProperty
+from PyQt6.QtWebEngineCore import QWebEngineScript
+
+from browser.emotion_detector import (CRISIS_KEYWORDS, TOXIC_KEYWORDS, DISTRESS_KEYWORDS,
+                                      POSITIVE_KEYWORDS, VADER_AVAILABLE)
+
+BRIDGE_OBJECT_NAME = "xenitBridge"
+BRIDGE_WORLD = QWebEngineScript.ScriptWorldId.ApplicationWorld
+
+# Drafts shorter than this are never analyzed (same limit as the old console hook)
+MIN_DRAFT_LENGTH = 4
+# One batch per animation frame; a runaway page can't flood the GUI thread
+MAX_BATCH = 32
+
+# Share of keyword-free drafts still sent to Python, where only VADER can judge them.
+# Without VADER a keyword-free draft always comes out neutral, so none are sent.
+NEUTRAL_SAMPLE_RATE = 0.1 if VADER_AVAILABLE else 0.0
+# Drafts kept in the page are reported in bulk, so counting them costs almost nothing
+AVOIDED_REPORT_EVERY = 50
+
+_qwebchannel_js = None
+
+def qwebchannel_js():
+    """Source of qwebchannel.js, shipped as a Qt resource by QtWebEngine (read once)."""
+    global _qwebchannel_js
+    if _qwebchannel_js is None:
+        f = QFile(":/qtwebchannel/qwebchannel.js")
+        if f.open(QIODevice.OpenModeFlag.ReadOnly):
+            _qwebchannel_js = bytes(f.readAll()).decode("utf-8")
+            f.close()
+        else:
+            print("XeNit Bridge: qwebchannel.js resource not found")
+            _qwebchannel_js = ""
+    return _qwebchannel_js
+
+class PageBridge(QObject):
+    """
+    One per page. JS calls submitDrafts([{tab, element, text, ts}, ...]) at most
+    once per animation frame; each valid draft is re-emitted as draft_received.
+    Drafts the in-page keyword prefilter keeps back are only counted (`avoided`).
+    The DOM tracker (browser/page_text.py) calls submitDomDiff(doc, ops), the chat
+    extractor (browser/chat_transcript.py) submitMessages(thread, messages).
+    """
+    draft_received = pyqtSignal(int, str, str, float) # tab id, element id, text, timestamp (ms)
+    dom_diff = pyqtSignal(str, list) # document token, ops
+    chat_messages = pyqtSignal(str, list) # thread id, [{sender, text, time, outgoing}]
+
+    total_avoided = 0 # Drafts the in-page prefilter kept out of Python, all pages
+    total_drafts = 0 # Drafts that crossed into Python, all pages
+
+    def __init__(self, tab_id, parent=None):
+        super().__init__(parent)
+        self._tab_id = tab_id
+        self.batches = 0
+        self.drafts = 0
+        self.avoided = 0
+
+    @pyqtProperty(int, constant=True)
+    def tabId(self):
+        return self._tab_id
+
+    @pyqtSlot('QVariantList', int)
+    def submitDrafts(self, batch, avoided=0):
+        """`avoided`: drafts the page dropped since its last call (no keyword, not sampled)."""
+        if avoided > 0:
+            self.avoided += avoided
+            PageBridge.total_avoided += avoided
+        if not batch:
+            return
+        self.batches += 1
+        for draft in batch[:MAX_BATCH]:
+            if not isinstance(draft, dict):
+                continue
+            text = draft.get("text")
+            if not isinstance(text, str) or len(text) < MIN_DRAFT_LENGTH:
+                continue
+            # Drafts carry the tab id they were created for; drop any from a stale page
+            if int(draft.get("tab", self._tab_id)) != self._tab_id:
+                continue
+            self.drafts += 1
+            PageBridge.total_drafts += 1
+            self.draft_received.emit(self._tab_id, str(draft.get("element", "")), text,
+                                     float(draft.get("ts", 0) or 0))
+
+    @classmethod
+    def prefilter_stats(cls):
+        """Drafts kept in the page vs sent to Python, over every page so far."""
+        total = cls.total_avoided + cls.total_drafts
+        return {
+            "avoided": cls.total_avoided,
+            "sent": cls.total_drafts,
+            "avoided_ratio": cls.total_avoided / total if total else 0.0,
+        }
+
+    @pyqtSlot(str, 'QVariantList')
+    def submitDomDiff(self, doc, ops):
+        self.dom_diff.emit(doc, list(ops))
+
+    @pyqtSlot(str, 'QVariantList')
+    def submitMessages(self, thread, messages):
+        self.chat_messages.emit(thread, list(messages[:MAX_BATCH * 4]))
+
+# One QWebChannel per document, shared by every XeNit script in the world
+# (a second QWebChannel on the same transport would steal its messages).
+# __xenitConnect(callback) calls back with the bridge object once connected.
+BRIDGE_CONNECT_JS = """
+(function() {
+    if (window.__xenitConnect || typeof QWebChannel === "undefined" || !window.qt || !qt.webChannelTransport) return;
+    let bridge = null;
+    let waiting = [];
+    window.__xenitConnect = function(callback) {
+        if (bridge) return callback(bridge);
+        waiting.push(callback);
+        if (waiting.length > 1) return;
+        new QWebChannel(qt.webChannelTransport, function(channel) {
+            bridge = channel.objects.%s;
+            waiting.forEach(f => f(bridge));
+            waiting = [];
+        });
+    };
+})();
+""" % BRIDGE_OBJECT_NAME
+
+# Social / mail platforms the emotion watcher runs on (@match patterns, see ScriptRegistry).
+# Matched in Python per navigation: other sites never receive the script at all.
+EMOTION_WATCHER_MATCHES = [
+    "*://*.whatsapp.com/*", "*://*.instagram.com/*", "*://*.google.*/*",
+    "*://*.snapchat.com/*", "*://*.twitter.com/*", "*://*.x.com/*",
+    "*://*.bing.com/*", "*://*.xenit.*/*",
+]
+
+_JS_REGEX_SPECIALS = re.compile(r"[.*+?^${}()|\[\]\\/]")
+
+def keyword_pattern():
+    """
+    Every emotion_detector keyword as one JS regex source. Generated from the
+    Python lists, so the page prefilter can't drift from detect_emotion. Same
+    semantics: a substring of the lower-cased text.
+    """
+    keywords = set(CRISIS_KEYWORDS + TOXIC_KEYWORDS + DISTRESS_KEYWORDS + POSITIVE_KEYWORDS)
+    return "|".join(_JS_REGEX_SPECIALS.sub(lambda m: "\\" + m.group(), kw)
+                    for kw in sorted(keywords, key=len, reverse=True))
+
+# Connects once per document, then sends drafts batched per animation frame.
+# Debounced 800ms per element, like the old console-based watcher. Only drafts
+# that contain a keyword (or are sampled for VADER) cross into Python.
+EMOTION_WATCHER_JS = BRIDGE_CONNECT_JS + """
+(function() {
+    if (window.__xenitEmotionWatcher) return;
+    window.__xenitEmotionWatcher = true;
+
+    if (!window.__xenitConnect) return;
+
+    let bridge = null;
+    const pending = new Map(); // element id -> latest draft
+    const timers = new Map(); // element id -> debounce timer
+    const ids = new WeakMap(); // element -> element id
+    let nextId = 1;
+    let frameRequested = false;
+    const KEYWORDS = new RegExp(%s);
+    const SAMPLE_RATE = %s;
+    const REPORT_EVERY = %d;
+    let avoided = 0; // drafts kept in the page since the last crossing
+
+    function elementId(el) {
+        let id = ids.get(el);
+        if (!id) {
+            id = (el.id ? el.tagName.toLowerCase() + "#" + el.id : el.tagName.toLowerCase()) + ":" + (nextId++);
+            ids.set(el, id);
+        }
+        return id;
+    }
+
+    function flush() {
+        frameRequested = false;
+        if (!bridge || pending.size === 0) return;
+        const batch = Array.from(pending.values());
+        pending.clear();
+        for (const draft of batch) draft.tab = bridge.tabId;
+        bridge.submitDrafts(batch, avoided);
+        avoided = 0;
+    }
+
+    function skip() {
+        avoided++;
+        if (bridge && avoided >= REPORT_EVERY) {
+            bridge.submitDrafts([], avoided);
+            avoided = 0;
+        }
+    }
+
+    function queue(draft) {
+        pending.set(draft.element, draft);
+        if (!frameRequested) {
+            frameRequested = true;
+            requestAnimationFrame(flush);
+        }
+    }
+
+    __xenitConnect(function(b) {
+        bridge = b;
+        flush();
+    });
+
+    document.addEventListener('input', function(e) {
+        const target = e.target;
+        // Capture input from contenteditable (WhatsApp/Gmail) or Textarea
+        if (!(target.isContentEditable || target.tagName === 'TEXTAREA' || target.tagName === 'INPUT')) return;
+        const id = elementId(target);
+        clearTimeout(timers.get(id));
+        timers.set(id, setTimeout(() => {
+            timers.delete(id);
+            const text = target.isContentEditable ? target.innerText : target.value;
+            if (!text || text.length <= 3) return;
+            // Prefilter: no keyword can match -> neutral unless VADER says otherwise
+            if (KEYWORDS.test(text.toLowerCase()) || Math.random() < SAMPLE_RATE) {
+                queue({ element: id, text: text, ts: Date.now() });
+            } else {
+                skip();
+            }
+        }, 800)); // Debounce 800ms
+    }, true);
+})();
+""" % (json.dumps(keyword_pattern()), NEUTRAL_SAMPLE_RATE, AVOIDED_REPORT_EVERY)
@@ -0,0 +1,270 @@
+"""
+XeNit AI — Chat Transcript Extractor
+Per-site message extraction for social chats. An in-page extractor watches the
+message list and streams only messages it hasn't sent before (sender, text,
+time) over the page bridge into a bounded ring buffer per chat thread, so the
+relationship coach reads the last N messages instead of the page's UI chrome.
+"""
+import json
+from collections import deque, OrderedDict
+
+from browser.bridge import BRIDGE_CONNECT_JS
+
+# Messages kept per thread, threads kept per tab
+RING_SIZE = 200
+MAX_THREADS = 20
+# Messages the coach prompt is built from
+COACH_MESSAGES = 30
+
+# Per-site selectors (host suffix -> config). Best effort: chat web apps change markup often.
+#   list: the message-list container (the only part of the page observed)
+#   row: one message; text: its body inside the row; meta: attribute holding "[time, date] Sender: "
+#   sender / time: fallbacks inside the row; outgoing: row selector for the user's own messages
+#   thread: element whose text / title names the open chat, or null to use the URL path
+CHAT_SITES = {
+    "web.whatsapp.com": {
+        "list": "#main",
+        "row": "#main div[data-id]",
+        "key": "data-id",
+        "text": "span.selectable-text",
+        "meta": "[data-pre-plain-text]",
+        "outgoing": "div[data-id^='true_']",
+        "thread": "#main header span[title]",
+    },
+    "messenger.com": {
+        "list": "div[role='main']",
+        "row": "div[role='main'] div[role='row']",
+        "text": "div[dir='auto']",
+        "sender": "h4, h5 span",
+        "time": "[data-tooltip-content], abbr",
+        "thread": None,
+    },
+    "instagram.com": {
+        "list": "div[role='main']",
+        "row": "div[role='main'] div[role='row']",
+        "text": "div[dir='auto']",
+        "sender": "h4, h5 span",
+        "time": "time",
+        "thread": None,
+    },
+    "web.telegram.org": {
+        "list": ".bubbles",
+        "row": ".bubble[data-mid]",
+        "key": "data-mid",
+        "text": ".message .translatable-message, .message",
+        "sender": ".peer-title",
+        "time": ".time",
+        "outgoing": ".bubble.is-out",
+        "thread": ".chat-info .peer-title",
+    },
+}
+
+# @match patterns for the extractor (and the bridge loader it needs)
+CHAT_MATCHES = ["*://*." + host + "/*" for host in CHAT_SITES]
+
+def chat_site(host):
+    """The CHAT_SITES key `host` belongs to (same suffix rule as CHAT_MATCHES), or None."""
+    host = (host or "").lower().rstrip('.')
+    for site in CHAT_SITES:
+        if host == site or host.endswith("." + site):
+            return site
+    return None
+
+_EXTRACTOR_JS = """
+(function(sites) {
+    if (window.__xenitChatExtractor) return;
+    const host = location.hostname.replace(/\\.$/, '');
+    const site = Object.keys(sites).find(s => host === s || host.endsWith('.' + s));
+    if (!site || !window.__xenitConnect) return;
+    window.__xenitChatExtractor = true;
+    const cfg = sites[site];
+
+    const seen = new Set(); // message keys already sent (bounded below)
+    const parsed = new WeakSet(); // rows already turned into a message: never re-read
+    const order = [];
+    let scheduled = false;
+    let sentThread = null; // thread id of the last submit
+
+    function threadId() {
+        if (cfg.thread) {
+            const el = document.querySelector(cfg.thread);
+            if (el) return (el.getAttribute('title') || el.textContent || '').trim() || location.pathname;
+        }
+        return location.pathname + location.hash;
+    }
+
+    function textOf(row, sel) {
+        const el = sel && row.querySelector(sel);
+        return el ? (el.innerText || el.textContent || '').trim() : '';
+    }
+
+    function parse(row) {
+        const text = textOf(row, cfg.text);
+        if (!text) return null;
+        let sender = textOf(row, cfg.sender);
+        let time = '';
+        // WhatsApp: data-pre-plain-text="[10:32, 18/10/2026] Alice: "
+        const meta = cfg.meta && row.querySelector(cfg.meta);
+        if (meta) {
+            const m = /^\\[([^\\]]*)\\]\\s*(.*?):\\s*$/.exec(meta.getAttribute('data-pre-plain-text') || '');
+            if (m) { time = m[1]; sender = m[2]; }
+        }
+        if (!time && cfg.time) {
+            const el = row.querySelector(cfg.time);
+            if (el) time = el.getAttribute('datetime') || el.getAttribute('data-tooltip-content') || el.textContent.trim();
+        }
+        const outgoing = !!(cfg.outgoing && row.matches(cfg.outgoing));
+        const key = (cfg.key && row.getAttribute(cfg.key)) || (time + '|' + sender + '|' + text);
+        return { key: key, sender: outgoing ? 'You' : (sender || 'Them'), text: text.slice(0, 2000), time: time, outgoing: outgoing };
+    }
+
+    // Rows to parse on the next frame: only ones the mutation records touched
+    const pending = new Set();
+    let list = null; // the observed message-list container
+
+    function queue(node) {
+        const el = node.nodeType === Node.ELEMENT_NODE ? node : node.parentElement;
+        if (!el) return;
+        // A row added whole, rows inside an added subtree, or content filled into an existing row
+        const row = el.closest(cfg.row);
+        if (row) pending.add(row);
+        for (const inner of el.querySelectorAll(cfg.row)) pending.add(inner);
+    }
+
+    function scan() {
+        scheduled = false;
+        const fresh = [];
+        for (const row of pending) {
+            if (parsed.has(row) || !row.isConnected) continue;
+            const msg = parse(row);
+            if (!msg) continue; // Not rendered yet: queued again when its content arrives
+            parsed.add(row);
+            if (seen.has(msg.key)) continue;
+            seen.add(msg.key);
+            order.push(msg.key);
+            fresh.push(msg);
+        }
+        pending.clear();
+        while (order.length > 5000) seen.delete(order.shift());
+        // Back to a thread read before: its messages are all seen, but Python must still switch to it
+        const thread = threadId();
+        if (fresh.length || thread !== sentThread) {
+            sentThread = thread;
+            __xenitConnect(b => b.submitMessages(thread, fresh));
+        }
+    }
+
+    function schedule() {
+        if (scheduled) return;
+        scheduled = true;
+        requestAnimationFrame(scan);
+    }
+
+    const listObserver = new MutationObserver(records => {
+        for (const record of records) {
+            if (record.type === 'characterData') queue(record.target);
+            else for (const node of record.addedNodes) queue(node);
+        }
+        if (pending.size) schedule();
+    });
+
+    // Until the message list exists, the document is watched for it (one querySelector a frame, no row scan)
+    let looking = false;
+    const finder = new MutationObserver(() => {
+        if (looking) return;
+        looking = true;
+        requestAnimationFrame(() => { looking = false; attach(); });
+    });
+
+    function attach() {
+        const found = document.querySelector(cfg.list);
+        if (!found) {
+            finder.observe(document.documentElement, { childList: true, subtree: true });
+            return;
+        }
+        finder.disconnect();
+        if (found === list) return;
+        list = found;
+        listObserver.disconnect();
+        listObserver.observe(list, { childList: true, subtree: true, characterData: true });
+        queue(list); // The rows already there
+        schedule();
+    }
+
+    // Chat apps replace the list when another chat opens; a thread can also change with no new rows
+    setInterval(() => {
+        if (!list || !list.isConnected) attach();
+        else if (threadId() !== sentThread) schedule();
+    }, 1000);
+    attach();
+})(%s);
+"""
+
+def extractor_script():
+    return BRIDGE_CONNECT_JS + _EXTRACTOR_JS % json.dumps(CHAT_SITES)
+
+class ChatMessage:
+    __slots__ = ("sender", "text", "time", "outgoing")
+
+    def __init__(self, sender, text, time="", outgoing=False):
+        self.sender = sender
+        self.text = text
+        self.time = time
+        self.outgoing = outgoing
+
+    def __repr__(self):
+        return f"ChatMessage({self.sender!r}, {self.text[:30]!r})"
+
+class ChatTranscript:
+    """Per-tab ring buffers of recent messages, one per chat thread."""
+    def __init__(self, ring_size=RING_SIZE, max_threads=MAX_THREADS):
+        self.ring_size = ring_size
+        self.max_threads = max_threads
+        self.threads = OrderedDict() # thread id -> deque of ChatMessage (most recently active last)
+        self.current_thread = None
+        self.host = None # Host the messages came from; leaving it drops them
+
+    def reset(self, host=None):
+        self.threads.clear()
+        self.current_thread = None
+        self.host = host
+
+    def follow(self, host):
+        """Main-frame navigation: keeps the buffers only while the tab stays on the same host."""
+        host = (host or "").lower().rstrip('.')
+        if host != self.host:
+            self.reset(host)
+
+    def active_for(self, host):
+        """True if the buffers belong to `host` and it is a chat site (anything else must not see them)."""
+        host = (host or "").lower().rstrip('.')
+        return host == self.host and chat_site(host) is not None and bool(self.threads)
+
+    def add(self, thread, messages):
+        """Appends to `thread` and makes it the open one (an empty batch only switches to it)."""
+        ring = self.threads.get(thread)
+        if ring is None:
+            ring = self.threads[thread] = deque(maxlen=self.ring_size)
+            if len(self.threads) > self.max_threads:
+                self.threads.popitem(last=False)
+        self.threads.move_to_end(thread)
+        self.current_thread = thread
+        for msg in messages:
+            if not isinstance(msg, dict) or not msg.get("text"):
+                continue
+            ring.append(ChatMessage(str(msg.get("sender", "")), str(msg["text"]),
+                                    str(msg.get("time", "")), bool(msg.get("outgoing"))))
+
+    def recent(self, n=COACH_MESSAGES, thread=None):
+        ring = self.threads.get(thread or self.current_thread)
+        if not ring:
+            return []
+        return list(ring)[-n:]
+
+    def format_recent(self, n=COACH_MESSAGES, thread=None):
+        """Compact "Sender (time): text" lines, oldest first, for the coach prompt."""
+        lines = []
+        for msg in self.recent(n, thread):
+            stamp = f" ({msg.time})" if msg.time else ""
+            lines.append(f"{msg.sender}{stamp}: {msg.text}")
+        return "\n".join(lines)
@@ -0,0 +1,259 @@
+"""
+XeNit AI — Cosmetic Filter Engine
+Per-domain element hiding compiled once per host into a single stylesheet,
+plus small per-domain scriptlets (e.g. the YouTube player handler). Replaces
+the old 300ms querySelectorAll sweeper that ran in every tab.
+"""
+import json
+from collections import OrderedDict
+
+# Hidden on every site
+GENERIC_SELECTORS = [
+    'div[id^="google_ads_"]', 'div[id*="google_ads_"]',
+    'iframe[id^="google_ads_"]', 'iframe[id*="google_ads_"]',
+    'iframe[src*="doubleclick.net"]', 'iframe[src*="googlesyndication.com"]',
+    '.adsbygoogle', '.google-auto-placed', '.ad-banner', '.banner-ad',
+    '.ad_unit', '.ad-slot', '.ad-wrapper', '.ad-container',
+    '.text-ad', '.sponsor-ad', '.sponsored-link',
+    'a[href*="/ad/"]', 'a[href*="doubleclick"]',
+    'div[data-ad-unit]', 'div[data-google-query-id]',
+]
+
+# Hidden only on the listed domain (and its subdomains)
+DOMAIN_SELECTORS = {
+    "youtube.com": [
+        # Static ad containers (were removed one by one by the sweeper)
+        'ytd-promoted-sparkles-web-renderer', 'ytd-display-ad-renderer',
+        'ytd-statement-banner-renderer', 'ytd-in-feed-ad-layout-renderer',
+        '#masthead-ad', 'ytd-banner-promo-renderer', '#player-ads',
+        '.ytd-merch-shelf-renderer', 'ytd-ad-slot-renderer',
+        'ytd-player-legacy-desktop-watch-ads-renderer',
+        'ytd-rich-item-renderer.ytd-ad-slot-renderer',
+        # Overlay ads (.ytp-ad-module stays: it holds the skip button logic)
+        '.ytp-ad-overlay-container', '.ytp-ad-image-overlay',
+    ],
+}
+
+# Player handler: observes only #movie_player, batches reactions per animation frame
+YOUTUBE_SCRIPTLET = """
+(function() {
+    if (window.__xenitYouTubeShield) return;
+    window.__xenitYouTubeShield = true;
+
+    let player = null;
+    let observer = null;
+    let scheduled = false;
+    let wasAd = false;
+
+    function onPlayerChange() {
+        scheduled = false;
+        if (!player) return;
+        const video = player.querySelector('video');
+        const isAd = player.classList.contains('ad-showing') || player.classList.contains('ad-interrupting');
+
+        if (isAd) {
+            // Skip Buttons (Click immediately)
+            const skipBtn = player.querySelector('.ytp-ad-skip-button, .ytp-ad-skip-button-modern, .videoAdUiSkipButton, .ytp-ad-skip-button-slot');
+            if (skipBtn) skipBtn.click();
+            // Video Ads (Speed Up & Mute & Seek)
+            if (video) {
+                video.muted = true;
+                video.playbackRate = 16.0;
+                if (!isNaN(video.duration)) video.currentTime = video.duration;
+            }
+        } else if (wasAd && video && video.paused && video.currentTime < 2) {
+            // Ad just ended: make sure the main video starts
+            video.muted = false;
+            video.play();
+        }
+        wasAd = isAd;
+    }
+
+    function schedule() {
+        if (scheduled) return;
+        scheduled = true;
+        requestAnimationFrame(onPlayerChange);
+    }
+
+    function enableAutoplayNext() {
+        const autoNav = document.querySelector('.ytp-autonav-toggle-button[aria-checked="false"]');
+        if (autoNav) autoNav.click();
+    }
+
+    function bindPlayer() {
+        const found = document.getElementById('movie_player');
+        if (!found || found === player) return !!found;
+        if (observer) observer.disconnect();
+        player = found;
+        observer = new MutationObserver(schedule);
+        // Ad state is a class on the player; skip buttons are added inside it
+        observer.observe(player, { attributes: true, attributeFilter: ['class'], childList: true, subtree: true });
+        schedule();
+        enableAutoplayNext();
+        return true;
+    }
+
+    // The player appears after load: watch the document only until it exists
+    function waitForPlayer() {
+        if (bindPlayer()) return;
+        const finder = new MutationObserver(() => {
+            if (bindPlayer()) finder.disconnect();
+        });
+        finder.observe(document.documentElement, { childList: true, subtree: true });
+    }
+
+    // SPA navigation can swap the player element
+    document.addEventListener('yt-navigate-finish', () => { bindPlayer(); enableAutoplayNext(); });
+
+    if (document.readyState === 'loading') {
+        document.addEventListener('DOMContentLoaded', waitForPlayer);
+    } else {
+        waitForPlayer();
+    }
+})();
+"""
+
+DOMAIN_SCRIPTLETS = {
+    "youtube.com": [YOUTUBE_SCRIPTLET],
+}
+
+# Chromium drops a whole rule if one selector is invalid, so keep groups small
+_SELECTORS_PER_RULE = 200
+# Hosts whose compiled stylesheet / script are kept (LRU, like the AdBlock host cache)
+CACHE_SIZE = 256
+
+def _host_suffixes(host):
+    labels = host.lower().rstrip('.').split('.')
+    return ['.'.join(labels[i:]) for i in range(len(labels) - 1)]
+
+class CosmeticRuleSet:
+    """
+    Element-hiding rules from filter lists: "##sel", "example.com##sel",
+    "example.com#@#sel". Parsed off the GUI thread with the network filters
+    (FilterEngine.from_text) and handed to the engine whole.
+    """
+    def __init__(self):
+        self.generic = []
+        self.domains = {} # domain -> selectors hidden there
+        self.exceptions = {} # domain -> selectors not to hide there
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def add(self, line):
+        """Adds one ABP cosmetic rule. Returns False if the line isn't one."""
+        line = line.strip()
+        if not line or line.startswith('!'):
+            return False
+        if '#@#' in line:
+            domains, selector = line.split('#@#', 1)
+            target = self.exceptions
+        elif '##' in line:
+            domains, selector = line.split('##', 1)
+            target = self.domains
+        else:
+            return False
+        if not selector:
+            return False
+        if not domains:
+            if target is self.domains:
+                self.generic.append(selector)
+        else:
+            for domain in domains.split(','):
+                domain = domain.strip().lower()
+                if domain and not domain.startswith('~'):
+                    target.setdefault(domain, []).append(selector)
+        self.count += 1
+        return True
+
+class CosmeticFilterEngine:
+    """
+    Resolves the element-hiding selectors and scriptlets for a host. Results are
+    compiled once per host and kept in a bounded LRU, so a navigation costs one
+    dict lookup. Built-in selectors plus the rules of the loaded filter lists.
+    """
+    def __init__(self, generic=GENERIC_SELECTORS, domains=DOMAIN_SELECTORS, scriptlets=DOMAIN_SCRIPTLETS,
+                 cache_size=CACHE_SIZE):
+        self.generic = list(generic)
+        self.domains = {d: list(s) for d, s in domains.items()}
+        self.scriptlets = {d: list(s) for d, s in scriptlets.items()}
+        self.lists = CosmeticRuleSet()
+        self.version = 0 # Bumped when the rules change: pages re-fetch their script
+        self._cache = OrderedDict() # host -> [stylesheet, scriptlets, injection script or None]
+        self.cache_size = cache_size
+
+    def set_list_rules(self, rules):
+        """Swaps in the cosmetic rules of a freshly loaded set of filter lists."""
+        self.lists = rules
+        self.version += 1
+        self._cache.clear()
+
+    def _resolve(self, host):
+        suffixes = _host_suffixes(host)
+        lists = self.lists
+        excluded = set()
+        selectors = []
+        scripts = []
+        for suffix in suffixes:
+            excluded.update(lists.exceptions.get(suffix, ()))
+        for suffix in suffixes:
+            selectors.extend(self.domains.get(suffix, ()))
+            selectors.extend(lists.domains.get(suffix, ()))
+            scripts.extend(self.scriptlets.get(suffix, ()))
+        selectors.extend(self.generic)
+        selectors.extend(lists.generic)
+        # De-duplicate, keep order
+        seen = set()
+        selectors = [s for s in selectors if s not in excluded and not (s in seen or seen.add(s))]
+        return [self._compile_css(selectors), scripts, None]
+
+    @staticmethod
+    def _compile_css(selectors):
+        rules = []
+        for i in range(0, len(selectors), _SELECTORS_PER_RULE):
+            group = ",\n".join(selectors[i:i + _SELECTORS_PER_RULE])
+            rules.append(group + " { display: none !important; }")
+        return "\n".join(rules)
+
+    def _entry(self, host):
+        cache = self._cache
+        entry = cache.get(host)
+        if entry is not None:
+            cache.move_to_end(host)
+            return entry
+        entry = cache[host] = self._resolve(host)
+        if len(cache) > self.cache_size:
+            cache.popitem(last=False)
+        return entry
+
+    def resolve(self, host):
+        """Returns (stylesheet, [scriptlet sources]) for `host`, cached."""
+        css, scripts, _source = self._entry(host.lower().rstrip('.'))
+        return css, scripts
+
+    def injection_script(self, host):
+        """One DocumentCreation script: adopts the host's stylesheet, then runs its scriptlets."""
+        entry = self._entry(host.lower().rstrip('.'))
+        if entry[2] is not None:
+            return entry[2]
+        css, scripts, _source = entry
+        source = """
+        (function() {
+            const css = %s;
+            function inject() {
+                const style = document.createElement('style');
+                style.id = 'xenit-cosmetic';
+                style.textContent = css;
+                (document.head || document.documentElement).appendChild(style);
+            }
+            if (document.documentElement) inject();
+            else document.addEventListener('readystatechange', inject, { once: true });
+        })();
+        """ % json.dumps(css)
+        source += "\n".join(scripts)
+        entry[2] = source
+        return source
+
+# Shared by every tab: the per-host cache is what makes navigations cheap
+cosmetic_engine = CosmeticFilterEngine()
@@ -21,6 +21,21 @@ class DataManager:
         
         self.history = self.load_json(self.history_file)
         self.bookmarks = self.load_json(self.bookmarks_file)
+        self.listeners = []
+
+    def add_listener(self, callback):
+        """
+        callback(event, item) after every change: "history_added", "history_removed"
+        (trimmed), "history_cleared" (item None) or "bookmark_added".
+        """
+        self.listeners.append(callback)
+
+    def _notify(self, event, item=None):
+        for callback in list(self.listeners):
+            try:
+                callback(event, item)
+            except Exception as e:
+                print(f"Error in data listener for {event}: {e}")
 
     def load_json(self, filepath):
         if os.path.exists(filepath):
@@ -49,15 +64,24 @@ class DataManager:
             "timestamp": datetime.now().isoformat()
         }
         self.history.insert(0, item)
+        self._notify("history_added", item)
         # Keep only last 1000 items
         if len(self.history) > 1000:
+            for old in self.history[1000:]:
+                self._notify("history_removed", old)
             self.history = self.history[:1000]
         self.save_json(self.history, self.history_file)
 
+    def clear_history(self):
+        self.history = []
+        self.save_json(self.history, self.history_file)
+        self._notify("history_cleared")
+
     def add_bookmark(self, title, url):
         item = {"title": title, "url": url}
         self.bookmarks.append(item)
         self.save_json(self.bookmarks, self.bookmarks_file)
+        self._notify("bookmark_added", item)
         
     def get_history(self):
         return self.history
@@ -1,7 +1,15 @@
 from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QLabel, QListWidget, QListWidgetItem, 
-                             QPushButton, QLineEdit, QCheckBox, QComboBox, QFormLayout, QWidget)
-from PyQt6.QtCore import Qt, QSize
+                             QPushButton, QLineEdit, QCheckBox, QComboBox, QFormLayout, QWidget,
+                             QTableWidget, QTableWidgetItem, QHBoxLayout, QHeaderView, QAbstractItemView)
+from PyQt6.QtCore import Qt, QSize, QEvent
+import os
+import signal
 from browser.data_manager import DataManager
+from browser.resources import ResourceSampler
+from browser.scripts import ScriptRegistry
+from browser.bridge import PageBridge
+from browser.emotion_worker import emotion_worker
+from browser.switcher import search_all
 
 class BaseDialog(QDialog):
     def __init__(self, title, parent=None):
@@ -42,6 +50,24 @@ class BaseDialog(QDialog):
                 border-color: #00F0FF;
                 color: #00F0FF;
             }
+            QTableWidget {
+                background-color: #18181b;
+                border: 1px solid #27272a;
+                border-radius: 8px;
+                color: #A1A1AA;
+                gridline-color: #27272a;
+            }
+            QTableWidget::item:selected {
+                background-color: rgba(0, 240, 255, 0.1);
+                color: #00F0FF;
+            }
+            QHeaderView::section {
+                background-color: #09090b;
+                color: #FAFAFA;
+                border: none;
+                border-bottom: 1px solid #27272a;
+                padding: 6px;
+            }
             QLineEdit, QComboBox {
                 background-color: #18181b;
                 border: 1px solid #27272a;
@@ -85,8 +111,7 @@ class HistoryDialog(BaseDialog):
             self.close()
 
     def clear_history(self):
-        self.data_manager.history = []
-        self.data_manager.save_json([], self.data_manager.history_file)
+        self.data_manager.clear_history()
         self.load_history()
 
 class BookmarksDialog(BaseDialog):
@@ -128,6 +153,191 @@ class DownloadsDialog(BaseDialog):
         self.list_widget = QListWidget()
         self.layout.addWidget(self.list_widget)
 
+class TaskManagerDialog(BaseDialog):
+    """Per-tab memory / CPU / JS heap (browser/resources.py) with discard and kill actions."""
+    COLUMNS = ["Tab", "Process", "Memory", "CPU", "JS Heap", "State"]
+
+    def __init__(self, parent=None):
+        super().__init__("Task Manager", parent)
+        self.resize(760, 480)
+        self.tabs = parent.tabs
+        
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.layout.addWidget(self.table)
+        
+        self.summary = QLabel("")
+        self.summary.setStyleSheet("color: #A1A1AA; font-size: 12px;")
+        self.layout.addWidget(self.summary)
+        
+        buttons = QHBoxLayout()
+        discard_btn = QPushButton("Discard Tab")
+        discard_btn.clicked.connect(self.discard_selected)
+        kill_btn = QPushButton("Kill Process")
+        kill_btn.clicked.connect(self.kill_selected)
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.close)
+        buttons.addWidget(discard_btn)
+        buttons.addWidget(kill_btn)
+        buttons.addStretch()
+        buttons.addWidget(close_btn)
+        self.layout.addLayout(buttons)
+        
+        # Samples only while the dialog is open
+        self.sampler = ResourceSampler(self.tabs, parent=self)
+        self.sampler.sampled.connect(self.show_samples)
+        self.sampler.start()
+        self.finished.connect(lambda *_: self.sampler.stop())
+
+    def show_samples(self, samples):
+        selected = self.selected_sample()
+        self.samples = samples
+        self.table.setRowCount(len(samples))
+        for row, sample in enumerate(samples):
+            shared = f" (shared by {sample.shared})" if sample.shared > 1 else ""
+            cells = [
+                sample.title[:60],
+                f"{sample.pid}{shared}" if sample.pid else "-",
+                f"{sample.rss_mb:.0f} MB" if sample.rss_mb is not None else "-",
+                f"{sample.cpu_percent:.1f}%" if sample.cpu_percent is not None else "-",
+                f"{sample.heap_mb:.1f} MB" if sample.heap_mb is not None else "-",
+                sample.state,
+            ]
+            for column, text in enumerate(cells):
+                self.table.setItem(row, column, QTableWidgetItem(text))
+            if selected is not None and sample.view is selected.view:
+                self.table.selectRow(row)
+        
+        lines = []
+        usage = self.sampler.totals # Scanned by the sampler, within its budget
+        if usage:
+            lines.append(f"Browser total: {usage['rss_mb']:.0f} MB in {usage['processes']} processes")
+        if hasattr(self.tabs, 'lifecycle'):
+            counts = self.tabs.lifecycle.state_counts()
+            lines.append(f"Tabs: {counts['active']} active, {counts['frozen']} frozen, {counts['discarded']} discarded")
+        if hasattr(self.tabs, 'pool'):
+            pool = self.tabs.pool.stats()
+            lines.append(f"New tab pool: {pool['ready']} ready, {pool['hits']} hits / {pool['misses']} misses, "
+                         f"open {pool['warm_open_ms']:.0f} ms warm vs {pool['cold_open_ms']:.0f} ms cold")
+        scripts = ScriptRegistry.for_profile(self.tabs.profile).stats()
+        duplicated = [name for name, copies in scripts["copies"].items() if copies > 1]
+        lines.append(f"Scripts: {len(scripts['scripts'])} registered ({len(scripts['scoped'])} host-scoped), "
+                     f"{scripts['last_navigation']} run on the last navigation (max {scripts['max_navigation']}), "
+                     f"{scripts['replacements']} hot-replaced"
+                     + (f", duplicated: {', '.join(duplicated)}" if duplicated else ""))
+        worker = emotion_worker().stats()
+        prefilter = PageBridge.prefilter_stats()
+        lines.append(f"Emotion worker: queue {worker['queue_depth']}, p95 {worker['p95_ms']:.0f} ms; "
+                     f"{prefilter['avoided']:,} drafts kept in the page by the keyword prefilter, "
+                     f"{prefilter['sent']:,} sent ({prefilter['avoided_ratio'] * 100:.0f}% of crossings avoided)")
+        lines.append(f"Sampling every {self.sampler.interval() / 1000:.0f}s, last round {self.sampler.last_cost_ms:.1f} ms")
+        self.summary.setText("\n".join(lines))
+
+    def selected_sample(self):
+        row = self.table.currentRow()
+        samples = getattr(self, 'samples', [])
+        return samples[row] if 0 <= row < len(samples) else None
+
+    def discard_selected(self):
+        sample = self.selected_sample()
+        if sample is None:
+            return
+        if not self.tabs.lifecycle.discard(sample.view):
+            self.summary.setText("The tab on screen can't be discarded.")
+            return
+        self.sampler.sample()
+
+    def kill_selected(self):
+        sample = self.selected_sample()
+        if sample is None or not sample.pid:
+            return
+        # Every tab on this renderer crashes with it (Chromium shows its "sad tab")
+        try:
+            os.kill(sample.pid, getattr(signal, 'SIGKILL', signal.SIGTERM))
+            print(f"XeNit Task Manager: Killed renderer {sample.pid} ({sample.shared} tab(s))")
+        except OSError as e:
+            self.summary.setText(f"Could not kill process {sample.pid}: {e}")
+            return
+        self.sampler.sample()
+
+class SwitcherDialog(BaseDialog):
+    """Ctrl+K: jump to an open tab, or open a bookmark / history entry (browser/switcher.py)."""
+    LABELS = {"tab": "Tab", "bookmark": "★ Bookmark", "history": "History"}
+
+    def __init__(self, parent, indexes):
+        super().__init__("Switch To", parent)
+        self.resize(560, 420)
+        self.indexes = indexes
+        self.registry = parent.tabs.registry
+        
+        self.search = QLineEdit()
+        self.search.setPlaceholderText("Search tabs, bookmarks and history...")
+        self.search.textChanged.connect(self.update_results)
+        self.search.returnPressed.connect(self.open_current)
+        self.search.installEventFilter(self)
+        self.layout.addWidget(self.search)
+        
+        self.list_widget = QListWidget()
+        self.list_widget.itemActivated.connect(self.open_item)
+        self.layout.addWidget(self.list_widget)
+        
+        self.status = QLabel("")
+        self.status.setStyleSheet("color: #A1A1AA; font-size: 12px;")
+        self.layout.addWidget(self.status)
+        
+        self.update_results("")
+        self.search.setFocus()
+
+    def eventFilter(self, obj, event):
+        # Arrow keys move through the results while typing
+        if obj is self.search and event.type() == QEvent.Type.KeyPress:
+            step = {Qt.Key.Key_Down: 1, Qt.Key.Key_Up: -1}.get(event.key())
+            if step and self.list_widget.count():
+                row = (self.list_widget.currentRow() + step) % self.list_widget.count()
+                self.list_widget.setCurrentRow(row)
+                return True
+        return super().eventFilter(obj, event)
+
+    def update_results(self, text):
+        if text.strip():
+            entries = search_all(self.indexes, text)
+            took = sum(index.last_query_ms for index in self.indexes)
+            size = sum(len(index) for index in self.indexes)
+            self.status.setText(f"{len(entries)} results from {size} entries in {took:.1f} ms")
+        else:
+            # Nothing typed: open tabs, most recently used first
+            records = sorted(self.registry.records(), key=lambda r: r.last_active, reverse=True)
+            entries = [e for e in (self.indexes[0].entries.get(("tab", r.tab_id)) for r in records) if e]
+            self.status.setText("")
+        self.entries = entries
+        self.list_widget.clear()
+        for entry in entries:
+            item = QListWidgetItem(f"{entry.title}\n{self.LABELS.get(entry.kind, entry.kind)} · {entry.url}")
+            self.list_widget.addItem(item)
+        if entries:
+            self.list_widget.setCurrentRow(0)
+
+    def open_current(self):
+        item = self.list_widget.currentItem()
+        if item is not None:
+            self.open_item(item)
+
+    def open_item(self, item):
+        entry = self.entries[self.list_widget.row(item)]
+        window = self.parent()
+        widget = self.registry.widget(entry.tab_id) if entry.kind == "tab" else None
+        if widget is not None:
+            window.tabs.setCurrentWidget(widget)
+        else:
+            from PyQt6.QtCore import QUrl
+            window.add_new_tab(QUrl(entry.url), entry.title[:20] or "New Tab")
+        self.accept()
+
 class SettingsDialog(BaseDialog):
     def __init__(self, parent=None):
         super().__init__("Settings", parent)
@@ -0,0 +1,120 @@
+"""
+XeNit AI — Emotion Analysis Worker
+Runs detect_emotion (keywords + VADER) off the GUI thread. Drafts are queued
+per (tab, input element) and coalesced: only the newest text of an element is
+ever analyzed, and drafts that waited too long are dropped as stale.
+"""
+import time
+import threading
+from collections import OrderedDict, deque
+from PyQt6.QtCore import QThread, pyqtSignal
+from PyQt6.QtWidgets import QApplication
+
+from browser.emotion_detector import detect_emotion
+
+# A draft still queued after this long describes text the user has moved on from
+STALE_AFTER = 5.0 # seconds
+LATENCY_SAMPLES = 256
+
+class EmotionWorker(QThread):
+    """
+    Single analysis thread shared by every tab.
+    analyzed is emitted (queued to the GUI thread) for non-neutral results only.
+    """
+    analyzed = pyqtSignal(int, object, str) # tab id, EmotionResult, text
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._pending = OrderedDict() # (tab id, element id) -> (text, queued at)
+        self._cond = threading.Condition()
+        self._running = True
+        # Counters for stats()
+        self.submitted = 0
+        self.processed = 0
+        self.coalesced = 0
+        self.dropped_stale = 0
+        self._latencies = deque(maxlen=LATENCY_SAMPLES) # queue wait + analysis, ms
+
+    def submit(self, tab_id, element_id, text):
+        """Queues a draft (GUI thread). Replaces any unprocessed draft of the same element."""
+        key = (tab_id, element_id)
+        with self._cond:
+            self.submitted += 1
+            if key in self._pending:
+                self.coalesced += 1
+            # Keeps the element's place in line, but only its newest text
+            self._pending[key] = (text, time.perf_counter())
+            self._cond.notify()
+
+    def discard_tab(self, tab_id):
+        """Drops everything queued for a closed tab."""
+        with self._cond:
+            for key in [k for k in self._pending if k[0] == tab_id]:
+                del self._pending[key]
+
+    def queue_depth(self):
+        with self._cond:
+            return len(self._pending)
+
+    def stats(self):
+        with self._cond:
+            latencies = sorted(self._latencies)
+            depth = len(self._pending)
+        def percentile(fraction):
+            return latencies[min(int(len(latencies) * fraction), len(latencies) - 1)] if latencies else 0.0
+        return {
+            "queue_depth": depth,
+            "submitted": self.submitted,
+            "processed": self.processed,
+            "coalesced": self.coalesced,
+            "dropped_stale": self.dropped_stale,
+            "p50_ms": percentile(0.5),
+            "p95_ms": percentile(0.95),
+            "max_ms": latencies[-1] if latencies else 0.0,
+        }
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._pending.clear()
+            self._cond.notify()
+        self.wait(2000)
+
+    def run(self):
+        while True:
+            with self._cond:
+                while self._running and not self._pending:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                (tab_id, _element), (text, queued_at) = self._pending.popitem(last=False)
+
+            if time.perf_counter() - queued_at > STALE_AFTER:
+                self.dropped_stale += 1
+                continue
+
+            try:
+                result = detect_emotion(text)
+            except Exception as e:
+                print(f"XeNit Emotion: Analysis failed ({e})")
+                continue
+
+            latency_ms = (time.perf_counter() - queued_at) * 1000
+            with self._cond:
+                self._latencies.append(latency_ms)
+                self.processed += 1
+            if result.mood != "neutral":
+                self.analyzed.emit(tab_id, result, text)
+
+_worker = None
+
+def emotion_worker():
+    """Returns the process-wide worker, starting it on first use."""
+    global _worker
+    if _worker is None:
+        app = QApplication.instance()
+        _worker = EmotionWorker(app)
+        if app is not None:
+            app.aboutToQuit.connect(_worker.stop)
+        _worker.start()
+    return _worker
@@ -1,49 +1,90 @@
+import itertools
 from PyQt6.QtWebEngineWidgets import QWebEngineView
 from PyQt6.QtWebEngineCore import QWebEnginePage, QWebEngineProfile, QWebEngineSettings, QWebEngineScript
+from PyQt6.QtWebChannel import QWebChannel
 from PyQt6.QtCore import QUrl, pyqtSignal, QObject
-from browser.adblock import AdBlockInterceptor
-from browser.emotion_detector import detect_emotion
+from browser.adblock import AdBlockService
+from browser.emotion_worker import emotion_worker
+from browser.cosmetic import cosmetic_engine
+from browser.bridge import PageBridge, BRIDGE_OBJECT_NAME, BRIDGE_WORLD, EMOTION_WATCHER_JS, EMOTION_WATCHER_MATCHES, qwebchannel_js
+from browser.scripts import ScriptRegistry
+from browser.page_text import PageTextModel, tracker_script
+from browser.chat_transcript import ChatTranscript, CHAT_MATCHES, extractor_script
+from browser.pages import get_new_tab_html, get_adblock_stats_html
 
 class XeNitPage(QWebEnginePage):
     emotion_detected = pyqtSignal(object, str) # signal emitting (EmotionResult, text)
+    internal_page_requested = pyqtSignal(QUrl) # xenit:// navigation (rendered locally)
 
-    def javaScriptConsoleMessage(self, level, message, lineNumber, sourceID):
-        # DEBUG: Trace all console messages
-        # print(f"JS Console: {message}") 
+    def __init__(self, profile, parent=None, tab_id=0):
+        super().__init__(profile, parent)
+        # Typed draft events from the emotion watcher (replaces console.log scraping)
+        self.bridge = PageBridge(tab_id, self)
+        self.bridge.draft_received.connect(self._on_draft)
+        # Analysis runs on the shared worker thread; results come back as a queued signal
+        self.emotion_worker = emotion_worker()
+        self.emotion_worker.analyzed.connect(self._on_analyzed)
+        self.destroyed.connect(lambda *_, w=self.emotion_worker, t=tab_id: w.discard_tab(t))
+        self.channel = QWebChannel(self)
+        self.channel.registerObject(BRIDGE_OBJECT_NAME, self.bridge)
+        self.setWebChannel(self.channel, BRIDGE_WORLD)
+        self.scoped_scripts = {} # name -> version of the host-scoped scripts this page holds
 
-        # Intercept Emotion Signal
-        if message.startswith("XENIT_EMOTION:"):
-            try:
-                with open("emotion_debug.log", "a", encoding="utf-8") as f:
-                    f.write(f"INTERCEPTED: {message}\n")
-            except: pass
-            
-            text = message.replace("XENIT_EMOTION:", "").strip()
-            if len(text) > 3: # Min length
-                # Perform Analysis
-                result = detect_emotion(text)
-                if result.mood != "neutral":
-                    try:
-                        with open("emotion_debug.log", "a", encoding="utf-8") as f:
-                            f.write(f"EMITTING SIGNAL: {result}\n")
-                    except: pass
-                    self.emotion_detected.emit(result, text)
-        
-        # Still print to standard console for debug
-        # super().javaScriptConsoleMessage(level, message, lineNumber, sourceID) # Optional: comment out to reduce noise
-        pass
+    def acceptNavigationRequest(self, url, nav_type, is_main_frame):
+        # xenit:// pages have no network handler: render them ourselves
+        if url.scheme() == "xenit" and is_main_frame:
+            self.internal_page_requested.emit(url)
+            return False
+        if is_main_frame:
+            host = url.host() if url.scheme() in ("http", "https") else ""
+            # Host-scoped scripts (@match) for the document about to be created
+            ScriptRegistry.for_profile(self.profile()).apply_to_page(self, host, self.scoped_scripts)
+            if host:
+                self._apply_cosmetic_filters(host)
+        return super().acceptNavigationRequest(url, nav_type, is_main_frame)
+
+    def _apply_cosmetic_filters(self, host):
+        """Swaps this page's cosmetic script for the one compiled for `host` (before the document exists)."""
+        host = host.lower().rstrip('.')
+        # Same host and rules as the script already installed: keep it
+        key = (host, cosmetic_engine.version)
+        if key == getattr(self, '_cosmetic_key', None):
+            return
+        self._cosmetic_key = key
+        scripts = self.scripts()
+        for old in scripts.find("XeNitCosmetic"):
+            scripts.remove(old)
+        script = QWebEngineScript()
+        script.setName("XeNitCosmetic")
+        script.setSourceCode(cosmetic_engine.injection_script(host))
+        script.setInjectionPoint(QWebEngineScript.InjectionPoint.DocumentCreation)
+        script.setWorldId(QWebEngineScript.ScriptWorldId.ApplicationWorld)
+        script.setRunsOnSubFrames(False)
+        scripts.insert(script)
+
+    def _on_draft(self, tab_id, element_id, text, timestamp):
+        # Never analyze here: VADER on the GUI thread stalls rendering while typing
+        self.emotion_worker.submit(tab_id, element_id, text)
+
+    def _on_analyzed(self, tab_id, result, text):
+        if tab_id == self.bridge.tabId:
+            self.emotion_detected.emit(result, text)
 
 class WebView(QWebEngineView):
     # Relay signal
     emotion_detected = pyqtSignal(object, str)
+    
+    # Tab ids never change or get reused (positions shift when tabs move or close)
+    _tab_ids = itertools.count(1)
 
-    def __init__(self, tab_index, parent=None, profile=None):
+    def __init__(self, parent=None, profile=None, tab_id=None):
         super().__init__(parent)
-        self.tab_index = tab_index
+        # A restored tab keeps the id its placeholder had (see TabManager.materialize)
+        self.tab_id = tab_id or next(WebView._tab_ids)
         self.parent_window = parent # Reference to BrowserWindow or TabManager
-        self.last_extracted_text = ""
-        
-        self.loadFinished.connect(self.extract_page_text)
+        # Page text is tracked on demand (AI sidebar), not extracted on every loadFinished
+        self.text_model = PageTextModel()
+        self.loadStarted.connect(lambda: self.text_model.reset(None))
         
         # Setup Profile and Page
         if profile:
@@ -52,71 +93,37 @@ class WebView(QWebEngineView):
             self.profile = QWebEngineProfile.defaultProfile()
 
         # Create Custom Page for Interception
-        page = XeNitPage(self.profile, self)
+        page = XeNitPage(self.profile, self, tab_id=self.tab_id)
         page.emotion_detected.connect(self.emotion_detected.emit)
+        page.internal_page_requested.connect(self.load_internal_page)
+        page.bridge.dom_diff.connect(self.text_model.apply)
+        self.transcript = ChatTranscript()
+        page.bridge.chat_messages.connect(self.transcript.add)
+        # Chat messages never outlive the site they came from
+        self.urlChanged.connect(lambda url: self.transcript.follow(url.host()))
         self.setPage(page)
 
         # ... (rest of init) ...
         
+        # Profile scripts are installed once per profile, not once per tab
+        self.script_registry = ScriptRegistry.for_profile(self.profile)
+        self.loadStarted.connect(lambda: self.script_registry.record_navigation(self.page()))
+        
         # Inject Emotion Watcher Script
         self.inject_emotion_watcher()
+        self.configure_page()
 
     def inject_emotion_watcher(self):
-        js_code = """
-        (function() {
-            // Target specific social/mail platforms (Broader matching)
-            const targets = ["whatsapp", "instagram", "google", "snapchat", "twitter", "x.com", "bing", "xenit"];
-            const isTarget = targets.some(t => window.location.hostname.includes(t));
-            
-            console.log("XeNit Emotion Watcher: Checked " + window.location.hostname + " -> " + isTarget);
-            
-            if (!isTarget) return;
-            
-            console.log("XeNit Emotion Watcher: ACTIVE");
-            
-            let timer = null;
-            
-            function attachListeners() {
-                document.addEventListener('input', function(e) {
-                    const target = e.target;
-                    // Capture input from contenteditable (WhatsApp/Gmail) or Textarea
-                    if (target.isContentEditable || target.tagName === 'TEXTAREA' || target.tagName === 'INPUT') {
-                        
-                        clearTimeout(timer);
-                        timer = setTimeout(() => {
-                            let text = "";
-                            if (target.isContentEditable) {
-                                text = target.innerText;
-                            } else {
-                                text = target.value;
-                            }
-                            
-                            if (text && text.length > 3) {
-                                console.log("XENIT_EMOTION: " + text);
-                            }
-                        }, 800); # Debounce 800ms
-                    }
-                }, true);
-                console.log("XeNit Listeners Attached");
-            }
-            
-            if (document.readyState === "loading") {
-                document.addEventListener("DOMContentLoaded", attachListeners);
-            } else {
-                attachListeners();
-            }
-        })();
-        """
-        
-        script = QWebEngineScript()
-        script.setName("XeNitEmotionWatcher")
-        script.setSourceCode(js_code)
-        script.setInjectionPoint(QWebEngineScript.InjectionPoint.DocumentCreation)
-        script.setWorldId(QWebEngineScript.ScriptWorldId.MainWorld)
-        self.profile.scripts().insert(script)
-
-    # ... (existing methods) ... 
+        # qwebchannel.js first: the watcher talks to Python through the page bridge
+        self.script_registry.install("XeNitWebChannel", qwebchannel_js(), world=BRIDGE_WORLD,
+                                     matches=EMOTION_WATCHER_MATCHES + CHAT_MATCHES)
+        self.script_registry.install("XeNitEmotionWatcher", EMOTION_WATCHER_JS, world=BRIDGE_WORLD,
+                                     matches=EMOTION_WATCHER_MATCHES)
+        # Chat sites: stream new messages into self.transcript for the relationship coach
+        self.script_registry.install("XeNitChatExtractor", extractor_script(), world=BRIDGE_WORLD,
+                                     matches=CHAT_MATCHES)
 
+    def configure_page(self):
         # Note: This is an internal Chromium setting, might not work on all PyQt versions perfectly
         # but we can inject CSS as a fallback or use ForceDarkMode preference if available in newer Qt
         
@@ -140,33 +147,15 @@ class WebView(QWebEngineView):
         self.profile.setHttpCacheType(QWebEngineProfile.HttpCacheType.DiskHttpCache)
         self.profile.setPersistentCookiesPolicy(QWebEngineProfile.PersistentCookiesPolicy.ForcePersistentCookies)
         
-        # AdBlock
-        self.interceptor = AdBlockInterceptor(self)
-        self.profile.setUrlRequestInterceptor(self.interceptor)
+        # AdBlock (one shared interceptor per profile, released when this tab is destroyed)
+        self.interceptor = AdBlockService.acquire(self.profile)
+        profile = self.profile
+        self.destroyed.connect(lambda *_: AdBlockService.release(profile))
         
         # 1. EARLY SHIELD (DocumentCreation)
-        # Prevents popups and injects CSS rules before page renders fully
+        # Prevents popups (cosmetic CSS is injected per host, see XeNitPage)
         # ALSO: Spoofs navigator behavior to look like a real browser (not automation)
         
-        # CSS Code for Cosmetic Filtering
-        css_code = """
-        /* Generic Ad Hiding Rules */
-        div[id^="google_ads_"], div[id*="google_ads_"],
-        iframe[id^="google_ads_"], iframe[id*="google_ads_"],
-        iframe[src*="doubleclick.net"], iframe[src*="googlesyndication.com"],
-        .adsbygoogle, .google-auto-placed, .ad-banner, .banner-ad,
-        .ad_unit, .ad-slot, .ad-wrapper, .ad-container,
-        .text-ad, .sponsor-ad, .sponsored-link,
-        a[href*="/ad/"], a[href*="doubleclick"],
-        div[data-ad-unit], div[data-google-query-id] {
-            display: none !important;
-            visibility: hidden !important;
-            height: 0 !important;
-            width: 0 !important;
-            pointer-events: none !important;
-        }
-        """
-        
         early_shield_js = f"""
         (function() {{
             try {{
@@ -240,131 +229,46 @@ class WebView(QWebEngineView):
         }})();
         """
         
-        script_early = QWebEngineScript()
-        script_early.setName("XeNitShieldStart")
-        script_early.setSourceCode(early_shield_js)
-        script_early.setInjectionPoint(QWebEngineScript.InjectionPoint.DocumentCreation)
-        script_early.setWorldId(QWebEngineScript.ScriptWorldId.MainWorld)
-        self.profile.scripts().insert(script_early)
+        self.script_registry.install("XeNitShieldStart", early_shield_js)
         
         # 2. LATE SHIELD (DocumentReady)
-        # Injects CSS and cleans up elements
-        late_shield_js = f"""
-        (function() {{
-            // 1. Cosmetic CSS Injection
-            const style = document.createElement('style');
-            style.type = 'text/css';
-            style.textContent = `{css_code}`; 
-            (document.head || document.documentElement).appendChild(style);
+        # Generic helpers only: ad hiding is a per-host stylesheet and the YouTube
+        # player handler is a per-host scriptlet (browser/cosmetic.py). No polling loop.
+        late_shield_js = """
+        (function() {
+            let scheduled = false;
             
-            // 2. AGGRESSIVE YOUTUBE CLEANER
-            function cleanYouTube() {{
-                const player = document.querySelector('#movie_player');
-                const video = document.querySelector('video');
-                
-                // A. Skip Buttons (Click immediately)
-                const skipBtn = document.querySelector('.ytp-ad-skip-button, .ytp-ad-skip-button-modern, .videoAdUiSkipButton');
-                if (skipBtn) {{
-                    skipBtn.click();
-                    console.log('XeNit AdBlock: Skipped Ad (Click)');
-                }}
-                
-                // B. Overlay Ads (Remove)
-                const overlays = document.querySelectorAll('.ytp-ad-overlay-container, .ytp-ad-image-overlay, .ytp-ad-module');
-                overlays.forEach(overlay => {{
-                    overlay.style.display = 'none';
-                    // Don't remove module, it might hold the skip button logic
-                    if (!overlay.classList.contains('ytp-ad-module')) overlay.remove();
-                }});
-                
-                // Force Autoplay Next (User Request "Activate Autopay")
-                const autoNav = document.querySelector('.ytp-autonav-toggle-button[aria-checked="false"]');
-                if (autoNav) {{
-                    autoNav.click();
-                    console.log('XeNit: Enabled Autoplay Next');
-                }}
-                
+            function sweep() {
+                scheduled = false;
                 // Auto-Close Consent Popups (if any)
                 const consent = document.querySelector('button[aria-label^="Accept"]');
                 if (consent) consent.click();
-
-                // 3. CAPTCHA AUTO-SOLVER (Simple Checkboxes)
-                function cleanCaptcha() {{
-                    // Cloudflare Turnstile / Challenge
-                    const cfBox = document.querySelector('#challenge-stage input[type="checkbox"]');
-                    if (cfBox && !cfBox.checked) {{
-                        cfBox.click();
-                        console.log("XeNit: Clicked Cloudflare Checkbox");
-                    }}
-                    
-                    // Generic "I am human" buttons (careful selector)
-                    const challenge = document.querySelector('#turnstile-wrapper iframe') || document.querySelector('.cf-turnstile iframe');
-                    if (challenge) {{
-                        // We can't click INSIDE an iframe easily without logic in that frame.
-                    }}
-                }}
-                cleanCaptcha();
-
-                // C. Video Ads (Speed Up & Mute & Seek)
-                // Check multiple indicators
-                const adShowing = document.querySelector('.ad-showing, .job-ad-showing');
-                const isInterrupting = player && player.classList.contains('ad-interrupting');
                 
-                if (video && (adShowing || isInterrupting)) {{
-                    video.muted = true;
-                    video.playbackRate = 16.0; // Fast forward
-                    // Force seek to end
-                    if (!isNaN(video.duration)) {{
-                         video.currentTime = video.duration;
-                    }}
-                    console.log('XeNit AdBlock: Fast-Forwarding/Seeking Ad');
-                    
-                    // Force click skip if available inside the ad container
-                    const innerSkip = document.querySelector('.ytp-ad-skip-button-slot');
-                    if (innerSkip) innerSkip.click();
-                }} else if (video && video.paused && !adShowing && !isInterrupting) {{
-                    // Force play main video if it's paused at the start (and not an ad)
-                    // We check if it's the main video by ensuring no ad UI is present
-                    if (video.currentTime < 2) {{
-                         video.play();
-                         console.log('XeNit: Force Playing Video');
-                    }}
-                }}
-                
-                // D. Static Ad Containers
-                const adSelectors = [
-                    'ytd-promoted-sparkles-web-renderer', 'ytd-display-ad-renderer', 
-                    'ytd-statement-banner-renderer', 'ytd-in-feed-ad-layout-renderer',
-                    '#masthead-ad', 'ytd-banner-promo-renderer', '#player-ads',
-                    '.ytd-merch-shelf-renderer', 'ytd-ad-slot-renderer',
-                    'ytd-player-legacy-desktop-watch-ads-renderer',
-                    'ytd-rich-item-renderer.ytd-ad-slot-renderer'
-                ];
-                adSelectors.forEach(sel => {{
-                    document.querySelectorAll(sel).forEach(el => {{
-                        el.style.display = 'none';
-                        el.remove();
-                    }});
-                }});
-            }}
-            
-            // Run loop (Balanced: 300ms)
-            setInterval(cleanYouTube, 300); 
+                // CAPTCHA AUTO-SOLVER (Simple Checkboxes): Cloudflare Turnstile / Challenge
+                const cfBox = document.querySelector('#challenge-stage input[type="checkbox"]');
+                if (cfBox && !cfBox.checked) {
+                    cfBox.click();
+                    console.log("XeNit: Clicked Cloudflare Checkbox");
+                }
+            }
             
-            // Also use MutationObserver for immediate reaction
-            const observer = new MutationObserver(cleanYouTube);
-            observer.observe(document.body, {{ childList: true, subtree: true }});
+            // Batch DOM changes into at most one sweep per animation frame
+            function schedule() {
+                if (scheduled) return;
+                scheduled = true;
+                requestAnimationFrame(sweep);
+            }
             
-            console.log('XeNit AdBlock: Aggressive Sweeper Active');
-        }})();
+            sweep();
+            // Consent banners and challenges show up while the page settles, not later
+            const observer = new MutationObserver(schedule);
+            observer.observe(document.body || document.documentElement, { childList: true, subtree: true });
+            setTimeout(() => observer.disconnect(), 15000);
+        })();
         """
         
-        script_late = QWebEngineScript()
-        script_late.setName("XeNitShieldEnd")
-        script_late.setSourceCode(late_shield_js)
-        script_late.setInjectionPoint(QWebEngineScript.InjectionPoint.DocumentReady)
-        script_late.setWorldId(QWebEngineScript.ScriptWorldId.MainWorld)
-        self.profile.scripts().insert(script_late)
+        self.script_registry.install("XeNitShieldEnd", late_shield_js,
+                                     injection_point=QWebEngineScript.InjectionPoint.DocumentReady)
 
     def createWindow(self, type):
         # BLOCK OFFENSIVE POPUPS
@@ -382,6 +286,23 @@ class WebView(QWebEngineView):
                 return new_view
         return super().createWindow(type)
 
+    def load_internal_page(self, qurl):
+        """Renders a xenit:// page (newtab, adblock-stats) into this view."""
+        name = qurl.host() or qurl.path().strip('/') or "newtab"
+        if name == "adblock-stats":
+            html = get_adblock_stats_html(self.interceptor.stats_snapshot(), self._open_tab_hosts())
+        else:
+            name = "newtab"
+            html = get_new_tab_html()
+        self.setHtml(html, QUrl(f"xenit://{name}"))
+
+    def _open_tab_hosts(self):
+        """(title, first-party host) of every tab in this view's window."""
+        registry = getattr(getattr(self.window(), 'tabs', None), 'registry', None)
+        if registry is None:
+            return []
+        return [(record.title, QUrl(record.url).host()) for record in registry.records()]
+
     def replace_active_text(self, new_text):
         """
         Replaces the text in the currently focused input element with new_text.
@@ -418,48 +339,21 @@ class WebView(QWebEngineView):
         """
         self.page().runJavaScript(js_code)
 
-    def extract_page_text(self):
-        # Run JS to get body text
-        self.page().runJavaScript("document.body.innerText", self._store_text_callback)
-        
-        # Fallback: Manually inject emotion watcher if not already active
-        # This helps if DocumentCreation injection missed the window or was blocked
-        self.inject_emotion_watcher_manual()
-
-    def inject_emotion_watcher_manual(self):
-        js_code = """
-        (function() {
-            if (window.xeNitWatcherActive) return;
-            window.xeNitWatcherActive = true;
-            
-            // Target specific social/mail platforms
-            const targets = ["whatsapp", "instagram", "google", "snapchat", "twitter", "x.com", "bing", "xenit"];
-            const isTarget = targets.some(t => window.location.hostname.includes(t));
-            
-            console.log("XeNit Emotion Watcher (Manual): Checked " + window.location.hostname + " -> " + isTarget);
-            
-            if (!isTarget) return;
-            
-            console.log("XeNit Emotion Watcher (Manual): ACTIVE");
-            
-            let timer = null;
-            document.addEventListener('input', function(e) {
-                const target = e.target;
-                if (target.isContentEditable || target.tagName === 'TEXTAREA' || target.tagName === 'INPUT') {
-                    clearTimeout(timer);
-                    timer = setTimeout(() => {
-                        let text = "";
-                        if (target.isContentEditable) text = target.innerText;
-                        else text = target.value;
-                        
-                        if (text && text.length > 3) console.log("XENIT_EMOTION: " + text);
-                    }, 800);
-                }
-            }, true);
-        })();
+    def extract_page_text(self, callback=None):
         """
-        self.page().runJavaScript(js_code)
-
-    def _store_text_callback(self, result):
-        if isinstance(result, str):
-            self.last_extracted_text = result
+        Main-content text of the current page (capped at PAGE_TEXT_BUDGET), passed to
+        callback(text). The first call starts the in-page tracker; after that the
+        model is kept current by DOM diffs and this answers without touching the page.
+        """
+        if self.text_model.doc is not None:
+            if callback:
+                callback(self.text_model.text())
+            return
+        
+        def on_result(result):
+            if isinstance(result, dict) and result.get("doc"):
+                self.text_model.reset(result["doc"], result.get("blocks") or ())
+            if callback:
+                callback(self.text_model.text())
+        
+        self.page().runJavaScript(tracker_script(), BRIDGE_WORLD, on_result)
@@ -0,0 +1,388 @@
+"""
+XeNit AI — Network Filter Engine
+Parses EasyList / Adblock Plus network filters (||domain^, anchors, wildcards,
+$third-party, $script, $domain=, @@ exceptions) and indexes every rule under
+its rarest token, so a request is only tested against a handful of candidates.
+"""
+import os
+import re
+
+from browser.blocklist import DATA_DIR
+from browser.cosmetic import CosmeticRuleSet
+
+# Drop EasyList-style *.txt files here to load them on startup
+FILTER_LIST_DIR = os.path.join(DATA_DIR, "filters")
+
+# Replaces the old hand-coded path checks in AdBlockInterceptor
+BUILTIN_FILTERS = """
+! YouTube ad endpoints (served from first-party hosts, so only path rules catch them)
+||youtube.com/pagead/
+||youtube.com/ptracking
+||youtube.com/api/stats/ads
+||youtube.com^*&ad_format=
+||youtube.com^*&ad_type=
+||googlevideo.com/pagead/
+||googlevideo.com/ptracking
+||googlevideo.com^*&ad_format=
+||googlevideo.com^*&ad_type=
+! Google ad hosts serving /pagead/ (the old "/pagead/" substring check only ran on
+! YouTube hosts; other sites' first-party /pagead/ paths are deliberately not blocked)
+||googleadservices.com/pagead/
+||googlesyndication.com/pagead/
+||g.doubleclick.net/pagead/
+! Universal ad-query blocker
+google_ads
+doubleclick.net
+"""
+
+# ── Request Helpers ──────────────────────────────────────────────────────────
+
+_TOKEN_RE = re.compile(r"[a-z0-9%]+")
+_PLAIN_HOST_RE = re.compile(r"^[a-z0-9.\-]+$")
+_HOST_END_RE = re.compile(r"[/^|:?]")
+
+# Second-level labels under which registrations happen (example.co.uk)
+_SECOND_LEVEL = {"co", "com", "net", "org", "gov", "ac", "edu", "ne", "or", "go"}
+
+def registrable_domain(host):
+    """Approximate eTLD+1 (no public suffix list): last two labels, three for co.uk-style."""
+    labels = host.rstrip('.').split('.')
+    if len(labels) >= 3 and labels[-2] in _SECOND_LEVEL and len(labels[-1]) == 2:
+        return '.'.join(labels[-3:])
+    return '.'.join(labels[-2:])
+
+def is_third_party(host, source_host):
+    if not source_host:
+        return False
+    return registrable_domain(host) != registrable_domain(source_host)
+
+def _anchored_host(pattern):
+    """
+    Host a "||" pattern is tied to: "example.com" for example.com^*&ad=,
+    ads*.example.com/x and example.com/x, or None when it can't be told
+    (||*/ads/, ||example.*, ||example.com*/ads may match any host).
+    """
+    host = _HOST_END_RE.split(pattern, 1)[0]
+    if '*' in host:
+        prefix, host = host.rsplit('*', 1)
+        if not host.startswith('.'):
+            return None # The wildcard runs into the labels we'd index
+        host = host[1:]
+    if _PLAIN_HOST_RE.match(host) and '.' in host:
+        return host
+    return None
+
+def _host_in(host, domains):
+    """True if host equals, or is a subdomain of, any entry in `domains`."""
+    labels = host.rstrip('.').split('.')
+    for i in range(len(labels)):
+        if '.'.join(labels[i:]) in domains:
+            return True
+    return False
+
+# ── Filter Rules ─────────────────────────────────────────────────────────────
+
+# ABP content-type options -> resource type names used by the engine
+RESOURCE_TYPES = {
+    "script", "image", "stylesheet", "object", "xmlhttprequest", "subdocument",
+    "ping", "websocket", "media", "font", "other",
+}
+_TYPE_ALIASES = {"xhr": "xmlhttprequest", "css": "stylesheet", "frame": "subdocument"}
+
+class UnsupportedFilter(ValueError):
+    pass
+
+class NetworkFilter:
+    """One parsed network rule."""
+    __slots__ = ("raw", "is_exception", "important", "third_party", "types",
+                 "include_domains", "exclude_domains", "host_anchor", "start_anchor",
+                 "end_anchor", "pattern", "_plain", "_literal", "_regex")
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.is_exception = False
+        self.important = False
+        self.third_party = None # None = any, True / False = required
+        self.types = None # None = all resource types
+        self.include_domains = None
+        self.exclude_domains = None
+        self.host_anchor = False
+        self.start_anchor = False
+        self.end_anchor = False
+        self.pattern = ""
+        self._plain = True
+        self._literal = ""
+        self._regex = None
+
+    @classmethod
+    def parse(cls, line):
+        """Returns a NetworkFilter, or None for comments / cosmetic rules. Raises UnsupportedFilter."""
+        line = line.strip()
+        if not line or line.startswith('!') or line.startswith('['):
+            return None
+        if '##' in line or '#@#' in line or '#?#' in line or '#$#' in line:
+            return None # Cosmetic rule, handled elsewhere
+
+        rule = cls(line)
+        if line.startswith('@@'):
+            rule.is_exception = True
+            line = line[2:]
+
+        # Options ($ separates pattern and options; a $ inside a regex rule is rare and unsupported)
+        dollar = line.rfind('$')
+        if dollar != -1:
+            rule._parse_options(line[dollar + 1:])
+            line = line[:dollar]
+
+        if len(line) > 1 and line.startswith('/') and line.endswith('/'):
+            raise UnsupportedFilter("regex rules are not supported")
+
+        if line.startswith('||'):
+            rule.host_anchor = True
+            line = line[2:]
+        elif line.startswith('|'):
+            rule.start_anchor = True
+            line = line[1:]
+        if line.endswith('|'):
+            rule.end_anchor = True
+            line = line[:-1]
+
+        # Leading / trailing wildcards are implied
+        if not rule.host_anchor and not rule.start_anchor:
+            line = line.lstrip('*')
+        if not rule.end_anchor:
+            line = line.rstrip('*')
+
+        rule.pattern = line.lower()
+        rule._plain = '*' not in rule.pattern and '^' not in rule.pattern
+        # Longest literal run: a substring pre-check that skips the regex for most candidates
+        rule._literal = max(re.split(r'[*^]', rule.pattern), key=len)
+        return rule
+
+    def _parse_options(self, options):
+        types = set()
+        excluded_types = set()
+        for option in options.lower().split(','):
+            negated = option.startswith('~')
+            name = option[1:] if negated else option
+            name = _TYPE_ALIASES.get(name, name)
+            if name == "third-party" or name == "3p":
+                self.third_party = not negated
+            elif name == "first-party" or name == "1p":
+                self.third_party = negated
+            elif name in RESOURCE_TYPES:
+                (excluded_types if negated else types).add(name)
+            elif name.startswith("domain="):
+                include, exclude = set(), set()
+                for d in name[len("domain="):].split('|'):
+                    if d.startswith('~'):
+                        exclude.add(d[1:])
+                    elif d:
+                        include.add(d)
+                self.include_domains = include or None
+                self.exclude_domains = exclude or None
+            elif name == "important":
+                self.important = True
+            elif name in ("match-case", "popup", "document", "elemhide", "generichide", "genericblock"):
+                raise UnsupportedFilter(f"option ${name} is not supported")
+            else:
+                raise UnsupportedFilter(f"unknown option ${name}")
+        if types:
+            self.types = types
+        elif excluded_types:
+            self.types = RESOURCE_TYPES - excluded_types
+
+    def tokens(self):
+        """Tokens of the pattern that are guaranteed to appear whole in any matching URL."""
+        result = []
+        pattern = self.pattern
+        for m in _TOKEN_RE.finditer(pattern):
+            start, end = m.span()
+            # A token touching a wildcard, or an unanchored pattern edge, may be partial
+            left_ok = (start > 0 and pattern[start - 1] != '*') or \
+                      (start == 0 and (self.host_anchor or self.start_anchor))
+            right_ok = (end < len(pattern) and pattern[end] != '*') or \
+                       (end == len(pattern) and self.end_anchor)
+            if left_ok and right_ok:
+                result.append(m.group())
+        return result
+
+    def _compile(self):
+        parts = []
+        for ch in self.pattern:
+            if ch == '*':
+                parts.append('.*')
+            elif ch == '^':
+                # Separator: anything but a letter, digit, or _-.% ; also matches end of URL
+                parts.append(r'(?:[^\w\-.%]|$)')
+            else:
+                parts.append(re.escape(ch))
+        body = ''.join(parts)
+        if self.host_anchor:
+            body = r'^[a-z][a-z0-9+.\-]*://(?:[^/?#]*\.)?' + body
+        elif self.start_anchor:
+            body = '^' + body
+        if self.end_anchor:
+            body += '$'
+        self._regex = re.compile(body)
+
+    def matches_url(self, url):
+        if self._plain and not self.host_anchor:
+            if self.start_anchor and self.end_anchor:
+                return url == self.pattern
+            if self.start_anchor:
+                return url.startswith(self.pattern)
+            if self.end_anchor:
+                return url.endswith(self.pattern)
+            return self.pattern in url
+        if self._literal not in url:
+            return False
+        if self._regex is None:
+            self._compile() # Lazily: most rules are never candidates
+        return self._regex.search(url) is not None
+
+    def matches(self, url, resource_type, source_host, third_party):
+        # Cheap option checks first
+        if self.types is not None and resource_type not in self.types:
+            return False
+        if self.third_party is not None and self.third_party != third_party:
+            return False
+        if self.include_domains is not None and not (source_host and _host_in(source_host, self.include_domains)):
+            return False
+        if self.exclude_domains is not None and source_host and _host_in(source_host, self.exclude_domains):
+            return False
+        return self.matches_url(url)
+
+    def __repr__(self):
+        return f"NetworkFilter({self.raw!r})"
+
+# ── Engine ───────────────────────────────────────────────────────────────────
+
+class _RuleIndex:
+    """Rules bucketed by their rarest token; tokenless rules go in a fallback list."""
+    def __init__(self, rules):
+        frequency = {}
+        rule_tokens = []
+        for rule in rules:
+            tokens = rule.tokens()
+            rule_tokens.append(tokens)
+            for token in tokens:
+                frequency[token] = frequency.get(token, 0) + 1
+
+        self.buckets = {}
+        self.untokenized = []
+        for rule, tokens in zip(rules, rule_tokens):
+            if tokens:
+                token = min(tokens, key=lambda t: (frequency[t], -len(t)))
+                self.buckets.setdefault(token, []).append(rule)
+            else:
+                self.untokenized.append(rule)
+
+    def find(self, url, url_tokens, resource_type, source_host, third_party):
+        buckets = self.buckets
+        for token in url_tokens:
+            bucket = buckets.get(token)
+            if bucket is not None:
+                for rule in bucket:
+                    if rule.matches(url, resource_type, source_host, third_party):
+                        return rule
+        for rule in self.untokenized:
+            if rule.matches(url, resource_type, source_host, third_party):
+                return rule
+        return None
+
+class FilterEngine:
+    """
+    Token-indexed network filter engine.
+    match() returns the blocking NetworkFilter for a request, or None to allow it.
+    """
+    def __init__(self, rules=()):
+        rules = list(rules)
+        self.rule_count = len(rules)
+        blocks = [r for r in rules if not r.is_exception]
+        self._blocks = _RuleIndex(blocks)
+        # First-party requests only need the rules that can match them: not $third-party ones
+        first_party = [r for r in blocks if r.third_party is not True]
+        self._first_party_blocks = _RuleIndex(first_party)
+        self._exceptions = _RuleIndex([r for r in rules if r.is_exception])
+        self._has_exceptions = any(r.is_exception for r in rules)
+        # "@@||example.com^" with no options: the whole host is allowed
+        self.allowed_hosts = {
+            r.pattern[:-1] for r in rules
+            if r.is_exception and r.host_anchor and r.pattern.endswith('^')
+            and _PLAIN_HOST_RE.match(r.pattern[:-1]) and r.types is None
+            and r.third_party is None and r.include_domains is None and r.exclude_domains is None
+        }
+        # Hosts that "||host..." rules able to match first-party requests are tied to,
+        # and how many such rules apply to any host (generic, or host not derivable).
+        # A first-party request on a host outside both needs no rule evaluation.
+        self.anchored_hosts = set()
+        self.generic_first_party = 0
+        for r in first_party:
+            anchored = _anchored_host(r.pattern) if r.host_anchor else None
+            if anchored is not None:
+                self.anchored_hosts.add(anchored)
+            else:
+                self.generic_first_party += 1
+
+    @classmethod
+    def from_text(cls, *texts):
+        """Parses filter lists. Their element-hiding rules (##) are collected in engine.cosmetic."""
+        rules = []
+        cosmetic = CosmeticRuleSet()
+        skipped = 0
+        for text in texts:
+            for line in text.splitlines():
+                if cosmetic.add(line):
+                    continue
+                try:
+                    rule = NetworkFilter.parse(line)
+                except UnsupportedFilter:
+                    skipped += 1
+                    continue
+                if rule is not None:
+                    rules.append(rule)
+        engine = cls(rules)
+        engine.skipped = skipped
+        engine.cosmetic = cosmetic
+        return engine
+
+    @classmethod
+    def from_files(cls, paths, include_builtin=True):
+        texts = [BUILTIN_FILTERS] if include_builtin else []
+        for path in paths:
+            try:
+                with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+                    texts.append(f.read())
+            except OSError as e:
+                print(f"XeNit AdBlock: Could not read filter list {path}: {e}")
+        return cls.from_text(*texts)
+
+    def is_host_allowed(self, host):
+        """True if a host-wide exception rule covers `host` (no path check needed)."""
+        return bool(self.allowed_hosts) and _host_in(host, self.allowed_hosts)
+
+    def has_first_party_rules(self, host):
+        """True if a block rule may match a first-party request to `host` (False: skip matching)."""
+        return self.generic_first_party > 0 or _host_in(host, self.anchored_hosts)
+
+    def match(self, url, host, source_host="", resource_type="other", third_party=None):
+        """
+        url / host must be lower-case. `source_host` is the first-party (page) host.
+        Returns the NetworkFilter that blocks the request, or None.
+        """
+        if third_party is None:
+            third_party = is_third_party(host, source_host)
+        url_tokens = set(_TOKEN_RE.findall(url))
+        blocks = self._blocks if third_party else self._first_party_blocks
+        rule = blocks.find(url, url_tokens, resource_type, source_host, third_party)
+        if rule is None or rule.important or not self._has_exceptions:
+            return rule
+        if self._exceptions.find(url, url_tokens, resource_type, source_host, third_party) is not None:
+            return None
+        return rule
+
+def filter_list_paths(directory=FILTER_LIST_DIR):
+    if not os.path.isdir(directory):
+        return []
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory) if name.endswith('.txt'))
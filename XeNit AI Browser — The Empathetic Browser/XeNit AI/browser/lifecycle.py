@@ -0,0 +1,238 @@
+"""
+XeNit AI — Tab Lifecycle Manager
+Freezes background tabs that have been idle for a while and discards them
+(renderer memory released, URL and history kept) when they stay idle or when
+more tabs are live than the budget allows. Uses Chromium's own page lifecycle
+(QWebEnginePage.LifecycleState): a tab comes back to Active the moment it is
+shown, and a discarded one reloads and scrolls back to where the user left it.
+"""
+import os
+import time
+from collections import deque
+from PyQt6.QtCore import QObject, QTimer, QPointF
+from PyQt6.QtWebEngineCore import QWebEnginePage
+
+LifecycleState = QWebEnginePage.LifecycleState
+
+# Idle thresholds for background tabs (seconds since the tab was last shown)
+FREEZE_AFTER = 5 * 60
+DISCARD_AFTER = 30 * 60
+# Tabs allowed to keep a renderer; the least recently used ones are discarded first
+MAX_LIVE_TABS = 12
+SWEEP_INTERVAL = 30000 # ms
+# Renderers release memory a moment after a freeze / discard
+MEASURE_DELAY = 5000 # ms
+REPORTS_KEPT = 20
+
+# Lower = more resources kept; recommendedState() is the lowest-cost state
+# a page can be put in without side effects (audio stopping, form input lost)
+_STATE_COST = {LifecycleState.Active: 0, LifecycleState.Frozen: 1, LifecycleState.Discarded: 2}
+
+# ── Process Usage ────────────────────────────────────────────────────────────
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+_CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+def read_process_stat(pid):
+    """(parent pid, cpu seconds, rss bytes) from /proc/<pid>/stat, or None."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            # The command name may contain spaces: fields start after its ')'
+            fields = f.read().rsplit(")", 1)[1].split()
+    except (OSError, IndexError):
+        return None
+    return int(fields[1]), (int(fields[11]) + int(fields[12])) / _CLOCK_TICKS, int(fields[21]) * _PAGE_SIZE
+
+def process_usage():
+    """
+    RSS (MB) and CPU time (s) of the browser plus its QtWebEngineProcess children
+    (renderers, GPU, utility). Linux only: returns None where /proc is missing.
+    """
+    if not os.path.isdir("/proc"):
+        return None
+    own = os.getpid()
+    stats = {}
+    for name in os.listdir("/proc"):
+        if name.isdigit():
+            stat = read_process_stat(name)
+            if stat:
+                stats[int(name)] = stat
+    # The browser and every process below it
+    tree = {own}
+    grew = True
+    while grew:
+        grew = False
+        for pid, (ppid, _cpu, _rss) in stats.items():
+            if ppid in tree and pid not in tree:
+                tree.add(pid)
+                grew = True
+    rss = sum(stats[pid][2] for pid in tree if pid in stats)
+    cpu = sum(stats[pid][1] for pid in tree if pid in stats)
+    return {"rss_mb": rss / (1024 * 1024), "cpu_s": cpu, "processes": len(tree)}
+
+# ── Lifecycle Manager ────────────────────────────────────────────────────────
+
+class TabLifecycleManager(QObject):
+    """
+    One per TabManager. track() every WebView, activate() the one being shown;
+    a timer sweeps the background tabs against the idle thresholds and the budget.
+    """
+    def __init__(self, tab_widget, freeze_after=FREEZE_AFTER, discard_after=DISCARD_AFTER,
+                 max_live_tabs=MAX_LIVE_TABS):
+        super().__init__(tab_widget)
+        self.tab_widget = tab_widget
+        self.freeze_after = freeze_after
+        self.discard_after = discard_after
+        self.max_live_tabs = max_live_tabs
+        self.last_active = {} # WebView -> time it was last shown
+        self.saved_scroll = {} # WebView -> scroll position when it was discarded
+        self.frozen = 0
+        self.discarded = 0
+        self.restored = 0
+        self.reports = deque(maxlen=REPORTS_KEPT) # before / after each sweep that changed something
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.sweep)
+        self.timer.start(SWEEP_INTERVAL)
+
+    def track(self, view):
+        self.last_active[view] = time.monotonic()
+        view.destroyed.connect(lambda *_, v=view: self._forget(v))
+
+    def _forget(self, view):
+        self.last_active.pop(view, None)
+        self.saved_scroll.pop(view, None)
+
+    def activate(self, view):
+        """The tab is being shown: back to Active (Qt also does this for visible pages)."""
+        if view not in self.last_active:
+            return
+        self.last_active[view] = time.monotonic()
+        page = view.page()
+        state = page.lifecycleState()
+        if state == LifecycleState.Active:
+            return
+        self.restored += 1
+        scroll = self.saved_scroll.pop(view, None)
+        if state == LifecycleState.Discarded and scroll is not None and scroll.y() > 0:
+            # Reactivating a discarded page reloads it: scroll once it has loaded
+            def restore_scroll(ok, view=view, scroll=scroll):
+                view.loadFinished.disconnect(restore_scroll)
+                if ok:
+                    view.page().runJavaScript(f"window.scrollTo({scroll.x():.0f}, {scroll.y():.0f});")
+            view.loadFinished.connect(restore_scroll)
+        page.setLifecycleState(LifecycleState.Active)
+
+    def discard(self, view):
+        """Discards a background tab now (task manager). Returns False if it can't be."""
+        if view not in self.last_active or view is self.tab_widget.currentWidget():
+            return False
+        page = view.page()
+        if page.lifecycleState() == LifecycleState.Discarded:
+            return True
+        if page.isVisible() or not self._set_state(view, LifecycleState.Discarded):
+            return False
+        self.discarded += 1
+        return True
+
+    def state_counts(self):
+        counts = {"active": 0, "frozen": 0, "discarded": 0}
+        for view in self.last_active:
+            state = view.page().lifecycleState()
+            if state == LifecycleState.Frozen:
+                counts["frozen"] += 1
+            elif state == LifecycleState.Discarded:
+                counts["discarded"] += 1
+            else:
+                counts["active"] += 1
+        return counts
+
+    @staticmethod
+    def _discardable(view):
+        # xenit:// pages are rendered from Python (setHtml): nothing to reload them from
+        return view.url().scheme() != "xenit"
+
+    def _allows(self, view, target):
+        """
+        False if `target` would cost the page more than Chromium recommends, the
+        page is visible, or it can't be discarded at all.
+        """
+        page = view.page()
+        if page.isVisible():
+            return False
+        if target == LifecycleState.Discarded and not self._discardable(view):
+            return False
+        return _STATE_COST[target] <= _STATE_COST.get(page.recommendedState(), 0)
+
+    def _set_state(self, view, target):
+        page = view.page()
+        if target == LifecycleState.Discarded:
+            if not self._discardable(view):
+                return False
+            self.saved_scroll[view] = QPointF(page.scrollPosition())
+        page.setLifecycleState(target)
+        return True
+
+    def sweep(self):
+        now = time.monotonic()
+        current = self.tab_widget.currentWidget()
+        # Sorted on the time only: equal stamps (same tick) must never compare the views
+        background = sorted(((t, v) for v, t in self.last_active.items() if v is not current),
+                            key=lambda item: item[0])
+        live = sum(1 for v in self.last_active if v.page().lifecycleState() != LifecycleState.Discarded)
+        over_budget = live - self.max_live_tabs
+
+        before = None # process_usage() ahead of the first change
+        frozen = discarded = 0
+        for last_active, view in background: # Least recently used first
+            page = view.page()
+            state = page.lifecycleState()
+            if state == LifecycleState.Discarded:
+                continue
+            idle = now - last_active
+            target = None
+            if over_budget > 0 or idle >= self.discard_after:
+                target = LifecycleState.Discarded
+            elif idle >= self.freeze_after and state == LifecycleState.Active:
+                target = LifecycleState.Frozen
+            # Fall back to freezing when Chromium advises against discarding (or it can't be)
+            if target == LifecycleState.Discarded and not self._allows(view, target):
+                target = LifecycleState.Frozen if state == LifecycleState.Active else None
+            if target is None or target == state or not self._allows(view, target):
+                continue
+            if before is None:
+                before = process_usage()
+            if not self._set_state(view, target):
+                continue
+            # Only tabs actually discarded count against the budget
+            if target == LifecycleState.Discarded:
+                discarded += 1
+                over_budget -= 1
+            else:
+                frozen += 1
+        self.frozen += frozen
+        self.discarded += discarded
+        if frozen or discarded:
+            QTimer.singleShot(MEASURE_DELAY, lambda: self._report(before, frozen, discarded))
+
+    def _report(self, before, frozen, discarded):
+        after = process_usage()
+        report = {"time": time.time(), "frozen": frozen, "discarded": discarded,
+                  "before": before, "after": after}
+        self.reports.append(report)
+        if before and after:
+            print(f"XeNit Lifecycle: Froze {frozen}, discarded {discarded} tabs "
+                  f"(RSS {before['rss_mb']:.0f} -> {after['rss_mb']:.0f} MB, "
+                  f"{after['processes']} processes)")
+        else:
+            print(f"XeNit Lifecycle: Froze {frozen}, discarded {discarded} tabs")
+
+    def stats(self):
+        return {
+            **self.state_counts(),
+            "frozen_total": self.frozen,
+            "discarded_total": self.discarded,
+            "restored_total": self.restored,
+            "usage": process_usage(),
+            "last_report": self.reports[-1] if self.reports else None,
+        }
@@ -46,10 +46,14 @@ class CustomMenu(QMenu):
         self.history_action = QAction("History", self)
         self.bookmarks_action = QAction("Bookmarks", self)
         self.downloads_action = QAction("Downloads", self)
+        self.task_manager_action = QAction("Task Manager", self)
+        self.switcher_action = QAction("Switch Tab (Ctrl+K)", self)
         
+        self.addAction(self.switcher_action)
         self.addAction(self.history_action)
         self.addAction(self.bookmarks_action)
         self.addAction(self.downloads_action)
+        self.addAction(self.task_manager_action)
         self.addSeparator()
         
         # Tools
@@ -0,0 +1,228 @@
+"""
+XeNit AI — Page Text Model
+Readability-style main-content text for the AI agent. The first time the agent
+needs a page, an in-page tracker snapshots the main content block by block and
+then watches it: only the blocks that change are sent back (over the page
+bridge) and applied to a per-tab PageTextModel, so the text stays current on
+SPAs (WhatsApp Web) and reading it costs nothing.
+"""
+from browser.bridge import BRIDGE_CONNECT_JS, qwebchannel_js
+
+# The agent sends at most this much page text with a question (see AIAgent.chat)
+PAGE_TEXT_BUDGET = 8000 # characters
+# The initial snapshot stops here; blocks past it are picked up as they change
+SNAPSHOT_LIMIT = 4 * PAGE_TEXT_BUDGET
+
+# Runs in the ApplicationWorld. Returns {doc, blocks: [[id, text], ...]} in document
+# order; afterwards posts ["reset"] / ["add", id, text, after_id] / ["set", id, text] /
+# ["del", id] ops through submitDomDiff, at most every 500ms.
+_TRACKER_JS = """
+(function(limit) {
+    const BLOCK = 'p,li,h1,h2,h3,h4,h5,h6,pre,blockquote,td,th,dd,dt,figcaption,div';
+    const SKIP = 'script,style,noscript,template,nav,aside,footer,header,form,[aria-hidden="true"]';
+    const ACCEPT = NodeFilter.FILTER_ACCEPT, REJECT = NodeFilter.FILTER_REJECT, PASS = NodeFilter.FILTER_SKIP;
+
+    let t = window.__xenitTracker;
+    if (!t) {
+        t = window.__xenitTracker = {
+            doc: Date.now().toString(36) + Math.random().toString(36).slice(2),
+            ids: new WeakMap(), next: 1, root: null, observer: null,
+            dirty: new Set(), removed: new Set(), timer: null,
+        };
+    }
+
+    // Main content root: semantic containers first, else the densest <p> parent
+    function findRoot() {
+        for (const sel of ['article', 'main', '[role="main"]']) {
+            const el = document.querySelector(sel);
+            if (el && el.textContent.length > 500) return el;
+        }
+        const scores = new Map();
+        const paragraphs = document.getElementsByTagName('p');
+        let root = null, best = 0;
+        for (let i = 0; i < paragraphs.length && i < 2000; i++) {
+            const p = paragraphs[i];
+            const len = p.textContent.length;
+            if (len < 40 || !p.parentElement) continue;
+            for (const [el, weight] of [[p.parentElement, 1], [p.parentElement.parentElement, 0.5]]) {
+                if (!el) continue;
+                const score = (scores.get(el) || 0) + len * weight;
+                scores.set(el, score);
+                if (score > best) { best = score; root = el; }
+            }
+        }
+        return root || document.body || document.documentElement;
+    }
+
+    function idOf(el) {
+        let id = t.ids.get(el);
+        if (!id) { id = t.next++; t.ids.set(el, id); }
+        return id;
+    }
+
+    // Text that belongs to this block itself (nested blocks report their own)
+    function ownText(block) {
+        const walker = document.createTreeWalker(block, NodeFilter.SHOW_ELEMENT | NodeFilter.SHOW_TEXT, {
+            acceptNode(node) {
+                if (node.nodeType === 1) return (node.matches(BLOCK) || node.matches(SKIP)) ? REJECT : PASS;
+                return node.nodeValue.trim() ? ACCEPT : PASS;
+            }
+        });
+        const parts = [];
+        while (walker.nextNode()) parts.push(walker.currentNode.nodeValue.replace(/\\s+/g, ' ').trim());
+        return parts.join(' ');
+    }
+
+    function snapshot() {
+        if (t.observer) t.observer.disconnect();
+        t.root = findRoot();
+        t.dirty.clear();
+        t.removed.clear();
+        const blocks = [];
+        let size = 0;
+        for (const el of [t.root, ...t.root.querySelectorAll(BLOCK)]) {
+            if (size >= limit) break;
+            if (el !== t.root && el.closest(SKIP)) continue;
+            const text = ownText(el);
+            blocks.push([idOf(el), text]);
+            size += text.length;
+        }
+        t.observer = new MutationObserver(onMutations);
+        t.observer.observe(t.root, { childList: true, subtree: true, characterData: true });
+        return blocks;
+    }
+
+    function blockOf(node) {
+        const el = node.nodeType === 1 ? node : node.parentElement;
+        if (!el || !t.root.contains(el) || el.closest(SKIP)) return null;
+        const block = el.closest(BLOCK);
+        return block && t.root.contains(block) ? block : t.root;
+    }
+
+    function onMutations(records) {
+        for (const r of records) {
+            const block = blockOf(r.target);
+            if (block) t.dirty.add(block);
+            for (const n of r.addedNodes) {
+                if (n.nodeType !== 1) continue;
+                if (n.matches(BLOCK)) t.dirty.add(n);
+                for (const d of n.querySelectorAll(BLOCK)) t.dirty.add(d);
+            }
+            for (const n of r.removedNodes) {
+                if (n.nodeType !== 1) continue;
+                for (const d of [n, ...n.querySelectorAll(BLOCK)]) {
+                    const id = t.ids.get(d);
+                    if (id) { t.removed.add(id); t.ids.delete(d); }
+                }
+            }
+        }
+        if (!t.timer) t.timer = setTimeout(flush, 500);
+    }
+
+    // Id of the tracked block just before `el` in document order
+    function precedingId(el) {
+        for (let n = el; n && n !== t.root; n = n.parentElement) {
+            for (let s = n.previousElementSibling; s; s = s.previousElementSibling) {
+                const inner = s.querySelectorAll(BLOCK);
+                for (let i = inner.length - 1; i >= 0; i--) {
+                    const id = t.ids.get(inner[i]);
+                    if (id) return id;
+                }
+                const id = t.ids.get(s);
+                if (id) return id;
+            }
+            const parentId = n.parentElement && t.ids.get(n.parentElement);
+            if (parentId) return parentId;
+        }
+        return t.ids.get(t.root) || null;
+    }
+
+    function flush() {
+        t.timer = null;
+        let ops = [];
+        if (!t.root.isConnected) {
+            // The SPA replaced the whole content area: start over
+            ops.push(['reset']);
+            for (const [id, text] of snapshot()) ops.push(['add', id, text, null]);
+        } else {
+            for (const id of t.removed) ops.push(['del', id]);
+            t.removed.clear();
+            const dirty = Array.from(t.dirty).filter(el => el.isConnected && t.root.contains(el) && !el.closest(SKIP));
+            t.dirty.clear();
+            // Document order, so an "add" only ever refers to a block Python already has
+            dirty.sort((a, b) => (a.compareDocumentPosition(b) & Node.DOCUMENT_POSITION_FOLLOWING) ? -1 : 1);
+            for (const el of dirty) {
+                const known = t.ids.has(el);
+                const text = ownText(el);
+                ops.push(known ? ['set', idOf(el), text] : ['add', idOf(el), text, precedingId(el)]);
+            }
+        }
+        if (ops.length && window.__xenitConnect) __xenitConnect(b => b.submitDomDiff(t.doc, ops));
+    }
+
+    // Python asks only when it has no live model for this document: (re)snapshot
+    return { doc: t.doc, blocks: snapshot() };
+})(%s);
+"""
+
+def tracker_script(limit=SNAPSHOT_LIMIT):
+    """qwebchannel.js (if this world lacks it) + the shared connector + the tracker."""
+    return ("if (typeof QWebChannel === 'undefined') {\n%s\n}\n" % qwebchannel_js()
+            + BRIDGE_CONNECT_JS + _TRACKER_JS % int(limit))
+
+class PageTextModel:
+    """
+    Python-side copy of a page's main-content text, kept current by tracker diffs.
+    `doc` is None until the first snapshot (and after every navigation).
+    """
+    def __init__(self):
+        self.reset(None)
+
+    def reset(self, doc, blocks=()):
+        self.doc = doc
+        self.order = [] # block ids in document order
+        self.texts = {} # block id -> own text
+        for block_id, text in blocks:
+            block_id = int(block_id)
+            self.order.append(block_id)
+            self.texts[block_id] = text or ""
+        self.diffs = 0
+        self._text = None
+
+    def apply(self, doc, ops):
+        """Applies one tracker batch. Returns False if it belongs to another document."""
+        if doc != self.doc:
+            return False
+        changed = False
+        for op in ops:
+            kind = op[0]
+            if kind == "reset":
+                self.order, self.texts = [], {}
+                changed = True
+                continue
+            block_id = int(op[1])
+            if kind == "del":
+                if self.texts.pop(block_id, None) is not None:
+                    self.order.remove(block_id)
+                    changed = True
+            elif kind == "set" and block_id in self.texts:
+                if self.texts[block_id] != op[2]:
+                    self.texts[block_id] = op[2]
+                    changed = True
+            else: # "add" (or a "set" for a block we never saw)
+                if block_id in self.texts:
+                    self.order.remove(block_id)
+                after = int(op[3]) if len(op) > 3 and op[3] is not None else None
+                position = self.order.index(after) + 1 if after in self.texts else len(self.order)
+                self.order.insert(position, block_id)
+                self.texts[block_id] = op[2] or ""
+                changed = True
+        self.diffs += 1
+        if changed:
+            self._text = None
+        return True
+
+    def text(self, budget=PAGE_TEXT_BUDGET):
+        if self._text is None:
+            self._text = "\n".join(t for t in (self.texts[i] for i in self.order) if t)
+        return self._text[:budget]
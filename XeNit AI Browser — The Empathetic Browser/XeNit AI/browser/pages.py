@@ -438,3 +438,101 @@ def get_new_tab_html():
     </body>
     </html>
     """
+
+def get_adblock_stats_html(stats, tabs=()):
+    """
+    Renders xenit://adblock-stats from AdBlockInterceptor.stats_snapshot().
+    `tabs` is a list of (title, host) for the open tabs; requests are attributed
+    to a tab through its page (first-party) host.
+    """
+    from html import escape
+    
+    def rows(items, empty="Nothing yet"):
+        if not items:
+            return f'<tr><td class="muted" colspan="2">{empty}</td></tr>'
+        return "".join(f"<tr><td>{escape(str(k))}</td><td class='num'>{v:,}</td></tr>" for k, v in items)
+    
+    # Decision-time histogram (bucket i = under 2**i microseconds)
+    peak = max(stats["histogram"]) or 1
+    bars = []
+    for i, count in enumerate(stats["histogram"]):
+        label = f"&lt; {2 ** i} µs" if i < len(stats["histogram"]) - 1 else f"&ge; {2 ** (i - 1)} µs"
+        width = 100 * count / peak
+        bars.append(f"<tr><td>{label}</td><td><div class='bar' style='width:{width:.1f}%'></div></td><td class='num'>{count:,}</td></tr>")
+    
+    sites = stats["sites"]
+    tab_rows = []
+    for title, host in tabs:
+        requests, blocked = sites.get(host, (0, 0))
+        tab_rows.append((f"{title} ({host or 'internal'})", f"{requests:,} requests / {blocked:,} blocked"))
+    tab_html = "".join(f"<tr><td>{escape(t)}</td><td class='num'>{c}</td></tr>" for t, c in tab_rows) \
+        or '<tr><td class="muted" colspan="2">No tabs</td></tr>'
+    
+    # Per resource type: how many requests skipped full rule evaluation (first-party ones included)
+    type_rows = []
+    for rtype, counts in stats["types"]:
+        requests = counts["requests"]
+        skipped = requests - counts["full"]
+        type_rows.append(
+            f"<tr><td>{escape(rtype)}</td><td class='num'>{requests:,}</td>"
+            f"<td class='num'>{counts['blocked']:,} blocked</td>"
+            f"<td class='num'>{skipped:,} fast path ({100 * skipped / requests:.0f}%)</td></tr>")
+    type_html = "".join(type_rows) or '<tr><td class="muted" colspan="4">Nothing yet</td></tr>'
+    
+    cache = stats["cache"]
+    blocked_pct = 100 * stats["blocked"] / stats["requests"] if stats["requests"] else 0.0
+    
+    return f"""
+    <!DOCTYPE html>
+    <html lang="en">
+    <head>
+        <meta charset="UTF-8">
+        <title>AdBlock Stats</title>
+        <style>
+            html, body {{ background-color: #09090b; color: #FAFAFA; font-family: 'Segoe UI', sans-serif; margin: 0; }}
+            main {{ max-width: 960px; margin: 0 auto; padding: 32px; }}
+            h1 {{ color: #00F0FF; font-weight: 600; }}
+            h2 {{ color: #A1A1AA; font-size: 15px; text-transform: uppercase; letter-spacing: 1px; margin-top: 32px; }}
+            .cards {{ display: grid; grid-template-columns: repeat(4, 1fr); gap: 12px; }}
+            .card {{ background: #18181b; border: 1px solid #27272a; border-radius: 12px; padding: 16px; }}
+            .card b {{ display: block; font-size: 22px; color: #00F0FF; }}
+            .card span {{ color: #A1A1AA; font-size: 12px; }}
+            table {{ width: 100%; border-collapse: collapse; background: #18181b; border: 1px solid #27272a; border-radius: 12px; }}
+            td {{ padding: 6px 12px; border-bottom: 1px solid #27272a; font-size: 13px; word-break: break-all; }}
+            td.num {{ text-align: right; white-space: nowrap; color: #A1A1AA; width: 1%; }}
+            td.muted {{ color: #52525b; }}
+            .bar {{ height: 10px; background: #00F0FF; border-radius: 5px; min-width: 1px; }}
+            button {{ background: #18181b; color: #FAFAFA; border: 1px solid #27272a; border-radius: 6px; padding: 8px 16px; cursor: pointer; }}
+            button:hover {{ border-color: #00F0FF; color: #00F0FF; }}
+        </style>
+    </head>
+    <body>
+        <main>
+            <h1>🛡️ AdBlock Stats</h1>
+            <button onclick="location.href='xenit://adblock-stats'">Refresh</button>
+            <div class="cards" style="margin-top: 16px;">
+                <div class="card"><b>{stats["requests"]:,}</b><span>requests seen</span></div>
+                <div class="card"><b>{stats["blocked"]:,}</b><span>blocked ({blocked_pct:.1f}%)</span></div>
+                <div class="card"><b>{stats["avg_us"]:.1f} µs</b><span>avg decision (p50 &lt; {stats["p50_us"]} µs, p99 &lt; {stats["p99_us"]} µs)</span></div>
+                <div class="card"><b>{cache["hit_rate"] * 100:.1f}%</b><span>host cache hit rate ({cache["hits"]:,} / {cache["hits"] + cache["misses"]:,})</span></div>
+            </div>
+            <p style="color:#71717a; font-size:12px;">{stats["domains"]:,} blocked domains, {stats["filters"]:,} network filters. Slowest decision: {stats["max_us"]:.0f} µs.</p>
+            
+            <h2>Decision Time</h2>
+            <table>{"".join(bars)}</table>
+            
+            <h2>Requests per Type</h2>
+            <table>{type_html}</table>
+            
+            <h2>Requests per Tab</h2>
+            <table>{tab_html}</table>
+            
+            <h2>Top Rules</h2>
+            <table>{rows(stats["top_rules"])}</table>
+            
+            <h2>Top Blocked Hosts</h2>
+            <table>{rows(stats["top_hosts"])}</table>
+        </main>
+    </body>
+    </html>
+    """
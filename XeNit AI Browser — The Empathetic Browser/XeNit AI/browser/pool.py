@@ -0,0 +1,114 @@
+"""
+XeNit AI — Pre-warmed WebView Pool
+Keeps a couple of hidden WebViews with the new tab page already loaded, so
+opening a new tab only has to show one (page, settings, scripts and the new
+tab HTML were all done beforehand). Spent views are replaced in idle time,
+one per tick, never while the user is opening tabs in a burst.
+"""
+import time
+from collections import deque
+from PyQt6.QtCore import QObject, QTimer, QUrl, QEvent
+
+from browser.engine import WebView
+
+POOL_SIZE = 2
+# Refill this long after the last take (a burst of Ctrl+T shouldn't build views in between)
+REFILL_DELAY = 1500 # ms
+# The first fill waits for the window to finish starting up
+STARTUP_DELAY = 3000 # ms
+LATENCY_SAMPLES = 64
+
+class WebViewPool(QObject):
+    """One per TabManager. take() returns a ready new-tab WebView, or None if none is ready yet."""
+    def __init__(self, tab_widget, profile, size=POOL_SIZE):
+        super().__init__(tab_widget)
+        self.tab_widget = tab_widget
+        self.profile = profile
+        self.size = size
+        self.ready = deque() # Views whose new tab page has finished loading
+        self.warming = set() # Views still loading it
+        self.hits = 0
+        self.misses = 0
+        # Click (add_new_tab) -> first paint of the loaded new tab page, ms
+        self.latencies = {"warm": deque(maxlen=LATENCY_SAMPLES), "cold": deque(maxlen=LATENCY_SAMPLES)}
+        self._timing = {} # render widget -> ("warm" / "cold", click time) until its next paint
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self._refill_one)
+        self.timer.start(STARTUP_DELAY)
+
+    def take(self):
+        self.timer.start(REFILL_DELAY) # (Re)starts the idle countdown
+        while self.ready:
+            view = self.ready.popleft()
+            # A renderer that died while pooled would show a crashed page
+            if view.page().renderProcessPid():
+                self.hits += 1
+                return view
+            view.deleteLater()
+        self.misses += 1
+        return None
+
+    def _refill_one(self):
+        if len(self.ready) + len(self.warming) >= self.size:
+            return
+        view = WebView(self.tab_widget, profile=self.profile)
+        view.hide()
+        self.warming.add(view)
+        view.loadFinished.connect(lambda ok, v=view: self._warmed(v, ok))
+        view.load_internal_page(QUrl("xenit://newtab"))
+
+    def _warmed(self, view, ok):
+        if view not in self.warming:
+            return # Already pooled: later loads (none expected) don't count
+        self.warming.discard(view)
+        if ok:
+            self.ready.append(view)
+        else:
+            view.deleteLater()
+        # Next view on a later tick, so refilling never blocks more than one construction
+        if len(self.ready) + len(self.warming) < self.size:
+            self.timer.start(0)
+
+    def record_open(self, view, started, warm):
+        """
+        Times click -> first paint of the loaded new tab page. Both paths end at
+        the same event, the render widget's next paint once the page is loaded:
+        a warm view is loaded already, a cold one is at loadFinished.
+        """
+        kind = "warm" if warm else "cold"
+        def loaded(*_):
+            # The widget Chromium's frames are drawn into (the view itself as a fallback)
+            target = view.focusProxy() or view
+            self._timing[target] = (kind, started)
+            target.installEventFilter(self)
+            target.destroyed.connect(lambda *_, t=target: self._timing.pop(t, None))
+            target.update() # Shown already (cold path): ask for the frame now
+        if warm:
+            loaded()
+        else:
+            def on_loaded(ok):
+                view.loadFinished.disconnect(on_loaded)
+                loaded()
+            view.loadFinished.connect(on_loaded)
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Type.Paint and obj in self._timing:
+            kind, started = self._timing.pop(obj)
+            obj.removeEventFilter(self)
+            self.latencies[kind].append((time.perf_counter() - started) * 1000)
+        return False
+
+    def stats(self):
+        def median(values):
+            values = sorted(values)
+            return values[len(values) // 2] if values else 0.0
+        return {
+            "ready": len(self.ready),
+            "warming": len(self.warming),
+            "hits": self.hits,
+            "misses": self.misses,
+            "warm_open_ms": median(self.latencies["warm"]),
+            "cold_open_ms": median(self.latencies["cold"]),
+        }
@@ -0,0 +1,160 @@
+"""
+XeNit AI — Tab Registry
+Every tab of a window by its stable tab id (WebView.tab_id, which placeholders
+keep when they turn into a WebView). Records are kept current from the view's
+own signals, so monitors and the agent look tabs up here instead of walking
+the QTabWidget or holding positional indices that shift when tabs move.
+Titles and URLs also feed a TopicIndex (browser/topics.py) that reports
+topic clusters as tabs change.
+"""
+import time
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+from browser.topics import TopicIndex
+
+# Titles change several times while a page loads: look for clusters once they settle
+TOPIC_DELAY = 1000 # ms
+
+class TabRecord:
+    __slots__ = ("tab_id", "widget", "url", "title", "created", "last_active",
+                 "rss_mb", "heap_mb", "mood", "mood_at")
+
+    def __init__(self, tab_id, widget, url="", title=""):
+        self.tab_id = tab_id
+        self.widget = widget # WebView, or PlaceholderTab until first shown
+        self.url = url
+        self.title = title
+        self.created = time.time()
+        self.last_active = 0.0 # Never shown yet
+        self.rss_mb = None # From the resource sampler (browser/resources.py), when it runs
+        self.heap_mb = None
+        self.mood = None # Last non-neutral emotion detected while typing in this tab
+        self.mood_at = 0.0
+
+    def state(self):
+        """"Placeholder", or the page's lifecycle state ("Active", "Frozen", "Discarded")."""
+        page = getattr(self.widget, 'page', None)
+        if page is None:
+            return "Placeholder"
+        state = page().lifecycleState()
+        return state.name if hasattr(state, "name") else str(state)
+
+    def __repr__(self):
+        return f"TabRecord({self.tab_id}, {self.title[:30]!r})"
+
+class TabRegistry(QObject):
+    """
+    One per TabManager. O(1) by tab id or by widget.
+    cluster_found is emitted when changed tabs form a topic of MIN_CLUSTER or more.
+    """
+    cluster_found = pyqtSignal(str, list) # topic, tab ids
+    record_changed = pyqtSignal(int) # tab id: added, or its title / URL changed
+    record_removed = pyqtSignal(int) # tab id
+
+    def __init__(self, tab_widget):
+        super().__init__(tab_widget)
+        self.tab_widget = tab_widget
+        self._records = {} # tab id -> TabRecord (insertion order = opening order)
+        self._ids = {} # widget -> tab id
+        self.topics = TopicIndex()
+        self._topic_timer = QTimer(self)
+        self._topic_timer.setSingleShot(True)
+        self._topic_timer.timeout.connect(self._check_topics)
+
+    def __len__(self):
+        return len(self._records)
+
+    def __contains__(self, tab_id):
+        return tab_id in self._records
+
+    def register(self, widget):
+        """Adds a tab (or swaps in the WebView that replaces its placeholder, same id)."""
+        tab_id = widget.tab_id
+        record = self._records.get(tab_id)
+        if record is None:
+            record = self._records[tab_id] = TabRecord(tab_id, widget, widget.url().toString(), widget.title())
+        else:
+            self._ids.pop(record.widget, None)
+            record.widget = widget
+        self._ids[widget] = tab_id
+        self._index(record)
+
+        if hasattr(widget, 'titleChanged'): # A live WebView
+            widget.titleChanged.connect(lambda title, t=tab_id: self._update(t, title=title))
+            widget.urlChanged.connect(lambda url, t=tab_id: self._update(t, url=url.toString()))
+            widget.emotion_detected.connect(lambda result, text, t=tab_id: self._set_mood(t, result.mood))
+        widget.destroyed.connect(lambda *_, w=widget, t=tab_id: self._forget(w, t))
+        return record
+
+    def _forget(self, widget, tab_id):
+        self._ids.pop(widget, None)
+        record = self._records.get(tab_id)
+        # A placeholder is destroyed after its WebView took over the record: keep it
+        if record is not None and record.widget is widget:
+            del self._records[tab_id]
+            self.topics.remove(tab_id)
+            self.record_removed.emit(tab_id)
+
+    def _update(self, tab_id, **fields):
+        record = self._records.get(tab_id)
+        if record is not None:
+            for name, value in fields.items():
+                setattr(record, name, value)
+            if "title" in fields or "url" in fields:
+                self._index(record)
+
+    def _index(self, record):
+        self.record_changed.emit(record.tab_id)
+        if self.topics.update(record.tab_id, record.title, record.url):
+            self._topic_timer.start(TOPIC_DELAY)
+
+    def _check_topics(self):
+        # Only around the tabs that changed since the last check
+        for topic, tab_ids in self.topics.find_clusters():
+            self.cluster_found.emit(topic, tab_ids)
+
+    def _set_mood(self, tab_id, mood):
+        self._update(tab_id, mood=mood, mood_at=time.time())
+
+    def activated(self, widget):
+        tab_id = self._ids.get(widget)
+        if tab_id is not None:
+            self._records[tab_id].last_active = time.time()
+
+    def record_usage(self, tab_id, rss_mb=None, heap_mb=None):
+        self._update(tab_id, rss_mb=rss_mb, heap_mb=heap_mb)
+
+    # ── Queries ──────────────────────────────────────────────────────────────
+
+    def get(self, tab_id):
+        return self._records.get(tab_id)
+
+    def id_of(self, widget):
+        return self._ids.get(widget)
+
+    def widget(self, tab_id):
+        record = self._records.get(tab_id)
+        return record.widget if record else None
+
+    def records(self):
+        """All tabs, in the order they were opened."""
+        return list(self._records.values())
+
+    def close(self, tab_ids):
+        """Closes tabs by id (unknown / already closed ids are skipped). Returns how many closed."""
+        closed = 0
+        for tab_id in tab_ids:
+            widget = self.widget(tab_id)
+            if widget is not None:
+                self.tab_widget.close_tab_by_widget(widget)
+                closed += 1
+        return closed
+
+    def summary(self, limit=15):
+        """"id: title (host)" lines for the agent, most recently used first (short: it goes into the prompt)."""
+        from urllib.parse import urlsplit
+        lines = []
+        for record in sorted(self._records.values(), key=lambda r: r.last_active, reverse=True)[:limit]:
+            host = urlsplit(record.url).hostname or record.url
+            lines.append(f"{record.tab_id}: {record.title[:40] or 'Untitled'} ({host})")
+        return "\n".join(lines)
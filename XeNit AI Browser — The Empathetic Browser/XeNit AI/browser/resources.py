@@ -0,0 +1,156 @@
+"""
+XeNit AI — Per-Tab Resource Sampler
+Samples each tab's renderer process (QWebEnginePage.renderProcessPid) from
+/proc: resident memory and CPU usage, plus the JS heap through a one-line
+in-page probe. Runs only while the task manager is open; its own cost is
+measured and the interval backs off if a sample takes longer than its budget.
+"""
+import os
+import time
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+from PyQt6.QtWebEngineCore import QWebEnginePage
+
+from browser.engine import WebView
+from browser.bridge import BRIDGE_WORLD
+from browser.lifecycle import read_process_stat, process_usage
+
+SAMPLE_INTERVAL = 2000 # ms
+MAX_INTERVAL = 16000 # ms, ceiling for the back-off
+# The JS heap probe round-trips through every renderer: only every Nth sample
+HEAP_EVERY = 3
+# Browser totals walk all of /proc (every process on the machine): only every Nth sample
+TOTALS_EVERY = 3
+# A sample (all /proc reads) taking longer than this doubles the interval
+SAMPLE_BUDGET = 10.0 # ms
+
+# Reads V8's counters without touching the page (isolated world, no allocation to speak of)
+_HEAP_PROBE_JS = "performance.memory ? performance.memory.usedJSHeapSize : -1"
+
+class TabSample:
+    __slots__ = ("view", "title", "url", "pid", "rss_mb", "cpu_percent", "heap_mb", "state", "shared")
+
+    def __init__(self, view, title, url, pid, state):
+        self.view = view
+        self.title = title
+        self.url = url
+        self.pid = pid
+        self.state = state
+        self.rss_mb = None
+        self.cpu_percent = None
+        self.heap_mb = None
+        self.shared = 1 # Tabs on the same renderer (their process numbers are shared)
+
+class ResourceSampler(QObject):
+    """
+    Samples every WebView in `tab_widget` on a timer. `sampled` is emitted with
+    a list of TabSample after each round.
+    """
+    sampled = pyqtSignal(list)
+
+    def __init__(self, tab_widget, interval=SAMPLE_INTERVAL, heap_every=HEAP_EVERY,
+                 budget_ms=SAMPLE_BUDGET, parent=None):
+        super().__init__(parent or tab_widget)
+        self.tab_widget = tab_widget
+        self.base_interval = interval
+        self.heap_every = max(1, heap_every)
+        self.budget_ms = budget_ms
+        self.available = os.path.isdir("/proc")
+        self.samples = []
+        self.totals = None # process_usage() of the browser tree, refreshed every TOTALS_EVERY rounds
+        self.rounds = 0
+        self.last_cost_ms = 0.0 # Wall time of the last round, Python side
+        self._cpu = {} # pid -> (cpu seconds, monotonic time) of the previous round
+        self._heap = {} # WebView -> bytes, from the last probe
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(interval)
+        self.timer.timeout.connect(self.sample)
+
+    def start(self):
+        self.sample()
+        self.timer.start()
+
+    def stop(self):
+        self.timer.stop()
+
+    def interval(self):
+        return self.timer.interval()
+
+    def _views(self):
+        for i in range(self.tab_widget.count()):
+            view = self.tab_widget.widget(i)
+            if isinstance(view, WebView):
+                yield view
+
+    def sample(self):
+        started = time.perf_counter()
+        now = time.monotonic()
+        probe_heap = self.rounds % self.heap_every == 0
+        scan_totals = self.rounds % TOTALS_EVERY == 0
+        self.rounds += 1
+
+        samples = []
+        per_pid = {}
+        for view in self._views():
+            page = view.page()
+            state = page.lifecycleState()
+            pid = page.renderProcessPid() if state != QWebEnginePage.LifecycleState.Discarded else 0
+            sample = TabSample(view, view.title() or view.url().toString(), view.url().toString(), pid,
+                               state.name if hasattr(state, "name") else str(state))
+            heap = self._heap.get(view)
+            if heap is not None and heap >= 0:
+                sample.heap_mb = heap / (1024 * 1024)
+            samples.append(sample)
+            if pid:
+                per_pid.setdefault(pid, []).append(sample)
+            # Frozen pages don't run JS: a probe would only queue up
+            if probe_heap and state == QWebEnginePage.LifecycleState.Active:
+                page.runJavaScript(_HEAP_PROBE_JS, BRIDGE_WORLD, lambda value, v=view: self._store_heap(v, value))
+
+        if self.available:
+            cpu_seen = {}
+            for pid, tabs in per_pid.items():
+                stat = read_process_stat(pid)
+                if stat is None:
+                    continue
+                _ppid, cpu_s, rss = stat
+                cpu_percent = None
+                previous = self._cpu.get(pid)
+                if previous and now > previous[1]:
+                    cpu_percent = 100.0 * (cpu_s - previous[0]) / (now - previous[1])
+                cpu_seen[pid] = (cpu_s, now)
+                for sample in tabs:
+                    sample.rss_mb = rss / (1024 * 1024)
+                    sample.cpu_percent = cpu_percent
+                    sample.shared = len(tabs)
+            self._cpu = cpu_seen
+            if scan_totals:
+                # Inside the timed round: its cost counts against the budget like the rest
+                self.totals = process_usage()
+        live = set(self._views())
+        for view in [v for v in self._heap if v not in live]:
+            del self._heap[view]
+
+        registry = getattr(self.tab_widget, 'registry', None)
+        if registry is not None:
+            for sample in samples:
+                registry.record_usage(sample.view.tab_id, sample.rss_mb, sample.heap_mb)
+
+        self.samples = samples
+        self.last_cost_ms = (time.perf_counter() - started) * 1000
+        self._adjust_interval()
+        self.sampled.emit(samples)
+
+    def _store_heap(self, view, value):
+        # Shown from the next round on: the probe answers asynchronously
+        self._heap[view] = value if isinstance(value, (int, float)) else -1
+
+    def _adjust_interval(self):
+        """Backs off while a round costs more than its budget, returns to the base rate after."""
+        interval = self.timer.interval()
+        if self.last_cost_ms > self.budget_ms:
+            interval = min(interval * 2, MAX_INTERVAL)
+        elif self.last_cost_ms < self.budget_ms / 2:
+            interval = max(interval // 2, self.base_interval)
+        if interval != self.timer.interval():
+            self.timer.setInterval(interval)
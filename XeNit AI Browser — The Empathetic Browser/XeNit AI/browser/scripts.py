@@ -0,0 +1,196 @@
+"""
+XeNit AI — User Script Registry
+Installs each named script exactly once per QWebEngineProfile. Scripts are
+versioned by a hash of their source: installing the same name with new source
+swaps the old copy out in place (hot replacement), identical source is a no-op.
+
+Scripts registered with `matches` (userscript-style @match patterns) are not
+profile-wide: each page receives them only on navigations to a matching host.
+"""
+import re
+import hashlib
+from PyQt6.QtWebEngineCore import QWebEngineScript
+
+def script_version(source):
+    return hashlib.sha1(source.encode("utf-8")).hexdigest()[:12]
+
+# ── Host Matching ────────────────────────────────────────────────────────────
+
+def _host_pattern_regex(pattern):
+    """
+    "*://*.example.com/*", "*.example.com" -> example.com and its subdomains
+    "example.com" -> that host only;  "*.google.*" -> google.<any suffix>;  "*" -> any host
+    """
+    host = pattern.split("://", 1)[-1].split("/", 1)[0].lower()
+    if host == "*":
+        return r"[^/]*"
+    prefix = ""
+    if host.startswith("*."):
+        prefix = r"(?:[^.]+\.)*"
+        host = host[2:]
+    body = re.escape(host)
+    if body.endswith(r"\.\*"):
+        body = body[:-2] + r"[^/]+" # Any public suffix: .com, .co.uk ...
+    return prefix + body
+
+class HostMatcher:
+    """All of a script's @match patterns compiled into one anchored regex."""
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        self._regex = re.compile("^(?:%s)$" % "|".join(_host_pattern_regex(p) for p in self.patterns))
+
+    def matches(self, host):
+        return self._regex.match(host.lower().rstrip('.')) is not None
+
+class ScopedScript:
+    """A script that is only injected into pages whose host matches."""
+    __slots__ = ("name", "source", "version", "injection_point", "world", "subframes", "matcher")
+
+    def __init__(self, name, source, injection_point, world, subframes, matches):
+        self.name = name
+        self.source = source
+        self.version = script_version(source)
+        self.injection_point = injection_point
+        self.world = world
+        self.subframes = subframes
+        self.matcher = HostMatcher(matches)
+
+    def create(self):
+        return _make_script(self.name, self.source, self.injection_point, self.world, self.subframes)
+
+def _make_script(name, source, injection_point, world, subframes):
+    script = QWebEngineScript()
+    script.setName(name)
+    script.setSourceCode(source)
+    script.setInjectionPoint(injection_point)
+    script.setWorldId(world)
+    script.setRunsOnSubFrames(subframes)
+    return script
+
+# ── Registry ─────────────────────────────────────────────────────────────────
+
+class ScriptRegistry:
+    """One per profile, shared by every WebView on it (see for_profile)."""
+    _registries = {} # QWebEngineProfile -> ScriptRegistry
+
+    def __init__(self, profile):
+        self.profile = profile
+        self.versions = {} # script name -> source version installed
+        self.scoped = {} # script name -> ScopedScript (registration order = injection order)
+        self._scoped_cache = {} # host -> [ScopedScript]
+        self.installs = 0
+        self.replacements = 0
+        # Scripts Chromium had to run for the last / worst navigation (profile + page level)
+        self.last_navigation_scripts = 0
+        self.max_navigation_scripts = 0
+
+    @classmethod
+    def for_profile(cls, profile):
+        registry = cls._registries.get(profile)
+        if registry is None:
+            registry = cls._registries[profile] = cls(profile)
+            profile.destroyed.connect(lambda *_: cls._registries.pop(profile, None))
+        return registry
+
+    def install(self, name, source, injection_point=QWebEngineScript.InjectionPoint.DocumentCreation,
+                world=QWebEngineScript.ScriptWorldId.MainWorld, subframes=False, matches=None):
+        """
+        Installs `name` unless this exact source is already installed. Returns True if it changed.
+        With `matches`, the script is only injected on navigations to a matching host (see scoped_for).
+        """
+        version = script_version(source)
+        if self.versions.get(name) == version:
+            return False
+        if matches is not None:
+            return self._install_scoped(name, source, injection_point, world, subframes, matches)
+
+        collection = self.profile.scripts()
+        # Also sweeps copies inserted before the registry existed
+        stale = collection.find(name)
+        for old in stale:
+            collection.remove(old)
+        if name in self.versions or stale:
+            self.replacements += 1
+            print(f"XeNit Scripts: Replaced {name} -> {version}")
+
+        if self.scoped.pop(name, None) is not None:
+            self._scoped_cache.clear()
+        collection.insert(_make_script(name, source, injection_point, world, subframes))
+        self.versions[name] = version
+        self.installs += 1
+        return True
+
+    def _install_scoped(self, name, source, injection_point, world, subframes, matches):
+        if name in self.versions:
+            self.replacements += 1
+            print(f"XeNit Scripts: Replaced {name} -> {script_version(source)}")
+        # Never both profile-wide and scoped
+        collection = self.profile.scripts()
+        for old in collection.find(name):
+            collection.remove(old)
+        script = ScopedScript(name, source, injection_point, world, subframes, matches)
+        self.scoped[name] = script
+        self.versions[name] = script.version
+        self._scoped_cache.clear()
+        self.installs += 1
+        return True
+
+    def uninstall(self, name):
+        collection = self.profile.scripts()
+        for old in collection.find(name):
+            collection.remove(old)
+        self.versions.pop(name, None)
+        if self.scoped.pop(name, None) is not None:
+            self._scoped_cache.clear()
+
+    def scoped_for(self, host):
+        """Scoped scripts whose @match patterns cover `host` (cached per host)."""
+        host = host.lower().rstrip('.')
+        scripts = self._scoped_cache.get(host)
+        if scripts is None:
+            scripts = [s for s in self.scoped.values() if host and s.matcher.matches(host)]
+            if len(self._scoped_cache) >= 1024:
+                self._scoped_cache.clear()
+            self._scoped_cache[host] = scripts
+        return scripts
+
+    def apply_to_page(self, page, host, installed):
+        """
+        Syncs `page`'s scoped scripts with `host` before its next document is created.
+        `installed` is the page's own {name: version} record of what it holds.
+        """
+        wanted = self.scoped_for(host)
+        if installed == {s.name: s.version for s in wanted}:
+            return # Same site (or same set of scripts): nothing to touch
+        collection = page.scripts()
+        for name in installed:
+            for old in collection.find(name):
+                collection.remove(old)
+        installed.clear()
+        # Reinsert all in registration order (the watcher needs qwebchannel.js first)
+        for script in wanted:
+            collection.insert(script.create())
+            installed[script.name] = script.version
+
+    def record_navigation(self, page):
+        """Counts the scripts a navigation of `page` will run. Returns the count."""
+        count = self.profile.scripts().count() + page.scripts().count()
+        self.last_navigation_scripts = count
+        if count > self.max_navigation_scripts:
+            self.max_navigation_scripts = count
+        return count
+
+    def stats(self):
+        collection = self.profile.scripts()
+        # Anything above 1 means a script runs more than once per page load
+        copies = {name: len(collection.find(name)) for name in self.versions if name not in self.scoped}
+        return {
+            "scripts": dict(self.versions),
+            "scoped": {name: s.matcher.patterns for name, s in self.scoped.items()},
+            "copies": copies,
+            "profile_scripts": collection.count(),
+            "installs": self.installs,
+            "replacements": self.replacements,
+            "last_navigation": self.last_navigation_scripts,
+            "max_navigation": self.max_navigation_scripts,
+        }
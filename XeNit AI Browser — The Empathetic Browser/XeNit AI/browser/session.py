@@ -0,0 +1,174 @@
+"""
+XeNit AI — Session Persistence
+Snapshots every window's tabs (URL, title, back/forward history, active tab)
+to ~/.xenit_browser/session.json periodically and when a window closes. On
+startup the tabs come back as placeholders: only the active one gets a
+WebView, the rest load when they are first shown.
+"""
+import os
+import json
+import base64
+from PyQt6.QtCore import QObject, QTimer, QByteArray, QDataStream, QIODevice
+from PyQt6.QtWidgets import QApplication
+
+from browser.engine import WebView
+from browser.tabs import PlaceholderTab
+
+SESSION_VERSION = 1
+SAVE_INTERVAL = 30000 # ms
+# Per-tab back/forward entries kept in the readable part of the snapshot
+MAX_HISTORY_ENTRIES = 50
+
+# ── History (de)serialization ────────────────────────────────────────────────
+
+def save_history(history):
+    """QWebEngineHistory -> base64 (Qt's own format, restores back/forward), or None."""
+    data = QByteArray()
+    stream = QDataStream(data, QIODevice.OpenModeFlag.WriteOnly)
+    try:
+        stream << history
+    except TypeError: # Binding without the QDataStream operator
+        return None
+    return base64.b64encode(bytes(data)).decode("ascii")
+
+def restore_history(history, state):
+    """Loads a save_history() blob into `history` (navigates to its current item)."""
+    stream = QDataStream(QByteArray(base64.b64decode(state)), QIODevice.OpenModeFlag.ReadOnly)
+    try:
+        stream >> history
+    except TypeError:
+        return False
+    return stream.status() == QDataStream.Status.Ok
+
+def tab_entry(view):
+    """Snapshot of one live WebView."""
+    url = view.url().toString() or "xenit://newtab"
+    history = view.history()
+    entries = [{"url": item.url().toString(), "title": item.title()} for item in history.items()]
+    entry = {
+        "url": url,
+        "title": view.title(),
+        "entries": entries[-MAX_HISTORY_ENTRIES:],
+        "current": history.currentItemIndex(),
+        "state": None,
+    }
+    # xenit:// pages are rendered locally: reopening the URL is enough
+    if not url.startswith("xenit:") and history.count() > 1:
+        entry["state"] = save_history(history)
+    return entry
+
+# ── Session Manager ──────────────────────────────────────────────────────────
+
+class SessionManager(QObject):
+    """One per BrowserWindow. All windows are written to the same session file."""
+    _managers = [] # Open windows, in the order they were created
+    _restored = False # The saved session is only restored once per process
+    _last_written = None
+
+    def __init__(self, window, path=None):
+        super().__init__(window)
+        self.window = window
+        base_dir = os.path.join(os.path.expanduser("~"), ".xenit_browser")
+        if not os.path.exists(base_dir):
+            os.makedirs(base_dir)
+        self.path = path or os.path.join(base_dir, "session.json")
+        self.closed = False
+        SessionManager._managers.append(self)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.save)
+        self.timer.start(SAVE_INTERVAL)
+        app = QApplication.instance()
+        if app is not None and len(SessionManager._managers) == 1:
+            app.aboutToQuit.connect(self.save)
+
+    def snapshot_window(self):
+        tabs = self.window.tabs
+        entries = []
+        active = 0
+        for i in range(tabs.count()):
+            widget = tabs.widget(i)
+            if isinstance(widget, PlaceholderTab):
+                entries.append(widget.entry) # Never loaded: keep what was restored
+            elif isinstance(widget, WebView):
+                entries.append(tab_entry(widget))
+            else:
+                continue # The "+" tab
+            if widget is tabs.currentWidget():
+                active = len(entries) - 1
+        return {"active": active, "tabs": entries}
+
+    def save(self):
+        """Writes every open window (skips the write if nothing changed)."""
+        windows = [m.snapshot_window() for m in SessionManager._managers if not m.closed]
+        windows = [w for w in windows if w["tabs"]]
+        if not windows:
+            return # Keep the last session rather than saving an empty one on quit
+        data = json.dumps({"version": SESSION_VERSION, "windows": windows}, indent=1)
+        if data == SessionManager._last_written:
+            return
+        try:
+            tmp = self.path + ".tmp"
+            with open(tmp, 'w') as f:
+                f.write(data)
+            os.replace(tmp, self.path) # A crash mid-write never leaves half a session
+            SessionManager._last_written = data
+        except Exception as e:
+            print(f"XeNit Session: Save failed ({e})")
+
+    def window_closed(self):
+        """Called from BrowserWindow.closeEvent: the last window closed is still saved."""
+        if self.closed:
+            return
+        self.save()
+        self.closed = True
+        self.timer.stop()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return []
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"XeNit Session: Could not read {self.path} ({e})")
+            return []
+        if data.get("version") != SESSION_VERSION:
+            return []
+        return [w for w in data.get("windows", []) if w.get("tabs")]
+
+    def restore(self):
+        """
+        Restores the saved session into this (first) window, opening one more
+        window per extra saved window. Returns False if there was nothing to restore.
+        """
+        if SessionManager._restored:
+            return False
+        SessionManager._restored = True
+        windows = self.load()
+        if not windows:
+            return False
+        self.restore_window(self.window, windows[0])
+        for saved in windows[1:]:
+            extra = type(self.window)() # Opens with a new tab, replaced below
+            self.restore_window(extra, saved)
+            extra.show()
+        total = sum(len(w["tabs"]) for w in windows)
+        print(f"XeNit Session: Restored {total} tabs in {len(windows)} window(s)")
+        return True
+
+    @staticmethod
+    def restore_window(window, saved):
+        tabs = window.tabs
+        existing = [tabs.widget(i) for i in range(tabs.count() - 1)] # All but "+"
+        for entry in saved["tabs"]:
+            tabs.add_placeholder_tab(entry)
+        # Quietly: closing the current tab must not make a neighbouring placeholder load
+        tabs.blockSignals(True)
+        for widget in existing:
+            tabs.close_tab_by_widget(widget)
+        tabs.blockSignals(False)
+        active = min(max(int(saved.get("active", 0)), 0), len(saved["tabs"]) - 1)
+        # Showing the active tab turns its placeholder into a WebView (see TabManager)
+        tabs.setCurrentIndex(active)
+        tabs.tab_changed(active) # Also when it was already current (no currentChanged)
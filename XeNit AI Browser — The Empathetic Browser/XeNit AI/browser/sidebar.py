@@ -1,8 +1,12 @@
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QListWidget, QListWidgetItem, 
                              QTabWidget, QLabel, QTextEdit, QLineEdit, QPushButton, QHBoxLayout)
-from PyQt6.QtCore import Qt, QSize, pyqtSignal
+from PyQt6.QtCore import Qt, QSize, QTimer, pyqtSignal
 from PyQt6.QtGui import QIcon
 
+# A page that never answers the text extraction (discarded, crashed, still loading)
+# mustn't leave the user without a reply: answer without page text after this
+PAGE_TEXT_TIMEOUT = 1500 # ms
+
 class AgentChatWidget(QWidget):
     voice_recognized = pyqtSignal(str)
     voice_error = pyqtSignal(str)
@@ -126,8 +130,23 @@ class AgentChatWidget(QWidget):
         self.add_message(text, is_user=True)
         self.input_field.clear()
         
+        # Page text is extracted now, only because the agent needs it. The first request
+        # starts the in-page tracker; later ones answer from its model without running JS.
+        current_browser = self.browser_window.tabs.currentWidget()
+        if hasattr(current_browser, 'extract_page_text'):
+            replied = []
+            def reply(page_text=""):
+                if not replied: # Whichever comes first: the page text or the timeout
+                    replied.append(True)
+                    self.reply_to(text, via_voice, page_text)
+            QTimer.singleShot(PAGE_TEXT_TIMEOUT, reply)
+            current_browser.extract_page_text(reply)
+        else:
+            self.reply_to(text, via_voice)
+
+    def reply_to(self, text, via_voice=False, page_text=""):
         # Get Context from Browser
-        context = self.get_browser_context()
+        context = self.get_browser_context(page_text)
         if hasattr(self.browser_window, 'cleanup_proposal'):
             context['cleanup_proposal'] = self.browser_window.cleanup_proposal
         
@@ -269,7 +288,7 @@ class AgentChatWidget(QWidget):
                 }
             """)
 
-    def get_browser_context(self):
+    def get_browser_context(self, page_text=""):
         # Retrieve current tab details
         current_browser = self.browser_window.tabs.currentWidget()
         if not current_browser:
@@ -278,12 +297,16 @@ class AgentChatWidget(QWidget):
         context = {
             "url": current_browser.url().toString(),
             "title": current_browser.title(),
-            "text": "" # Will be populated if asynchronous fetching was easy.
+            "text": page_text
         }
-        
-        if hasattr(current_browser, 'last_extracted_text'):
-             context['text'] = current_browser.last_extracted_text
-             
+        # Chat sites: the last messages of the open thread (much smaller than the page text)
+        transcript = getattr(current_browser, 'transcript', None)
+        if transcript is not None and transcript.active_for(current_browser.url().host()):
+            context['chat'] = transcript.format_recent()
+        # Open tabs by stable id, for [[CLOSE_TABS: [...]]]
+        registry = getattr(self.browser_window.tabs, 'registry', None)
+        if registry is not None:
+            context['tabs'] = registry.summary()
         return context
 
 class Sidebar(QWidget):
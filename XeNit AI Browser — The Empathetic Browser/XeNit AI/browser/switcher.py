@@ -0,0 +1,251 @@
+"""
+XeNit AI — Quick Switcher Index
+Trigram index over open tabs, history and bookmarks for the Ctrl+K switcher.
+Entries are added and removed one at a time as tabs change (TabRegistry) and
+as history / bookmarks are written (DataManager listeners), so a keystroke
+only intersects a few posting sets. History and bookmarks are shared by all
+windows and indexed in idle-time chunks after startup.
+"""
+import re
+import time
+import heapq
+from datetime import datetime
+from collections import Counter
+from urllib.parse import urlsplit
+from PyQt6.QtCore import QObject, QTimer
+
+from browser.data_manager import DataManager
+
+MAX_RESULTS = 12
+# Entries indexed per idle tick during the startup warm-up
+WARM_CHUNK = 200
+# Open tabs first, then bookmarks, then history
+KIND_WEIGHT = {"tab": 3.0, "bookmark": 2.0, "history": 1.0}
+
+_WORD_RE = re.compile(r"[^\W_]+")
+
+def normalize(text):
+    return " ".join(_WORD_RE.findall(text.lower()))
+
+def _grams(text):
+    """Trigrams of `text` with a leading space, so word starts (" py") are grams too."""
+    padded = " " + text
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def _query_grams(word):
+    # 2 letters can only be matched as a word start; 3+ anywhere in a word
+    return {" " + word} if len(word) == 2 else _grams(word) - {" " + word[:2]}
+
+def _display_url(url):
+    return re.sub(r"^[a-z]+://(www\.)?", "", url).rstrip('/')
+
+def _site_words(url):
+    """ "https://www.docs.python.org/3/..." -> "docs python". Paths and TLDs would match nearly everything."""
+    host = urlsplit(url).hostname or ""
+    labels = [l for l in host.split(".") if l and l != "www"]
+    return " ".join(labels[:-1] if len(labels) > 1 else labels)
+
+class SwitcherEntry:
+    __slots__ = ("kind", "key", "title", "url", "tab_id", "recency", "text", "title_text")
+
+    def __init__(self, kind, key, title, url, tab_id=None, recency=0.0):
+        self.kind = kind
+        self.key = key
+        self.title = title or _display_url(url)
+        self.url = url
+        self.tab_id = tab_id
+        self.recency = recency # 0..1, newer history scores higher
+        self.title_text = " " + normalize(self.title)
+        self.text = normalize(self.title + " " + _site_words(url))
+
+class SwitcherIndex:
+    """key -> entry plus trigram postings. add() / remove() touch only that entry's grams."""
+    def __init__(self):
+        self.entries = {}
+        self.postings = {} # gram -> set of keys
+        self.last_query_ms = 0.0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, entry):
+        old = self.entries.get(entry.key)
+        old_grams = _grams(old.text) if old else set()
+        new_grams = _grams(entry.text)
+        for gram in old_grams - new_grams:
+            self._unpost(gram, entry.key)
+        for gram in new_grams - old_grams:
+            self.postings.setdefault(gram, set()).add(entry.key)
+        self.entries[entry.key] = entry
+
+    def remove(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            for gram in _grams(entry.text):
+                self._unpost(gram, key)
+
+    def clear(self, kind=None):
+        for key in [k for k, e in self.entries.items() if kind is None or e.kind == kind]:
+            self.remove(key)
+
+    def _unpost(self, gram, key):
+        keys = self.postings.get(gram)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self.postings[gram]
+
+    def candidates(self, words):
+        """Keys of entries containing every gram of every query word (word order doesn't matter)."""
+        grams = set()
+        for word in words:
+            grams |= _query_grams(word)
+        sets = []
+        for gram in grams:
+            keys = self.postings.get(gram)
+            if not keys:
+                return set()
+            sets.append(keys)
+        sets.sort(key=len) # Smallest first: the intersection only ever shrinks
+        result = set(sets[0])
+        for keys in sets[1:]:
+            result &= keys
+            if not result:
+                break
+        return result
+
+    def search(self, query, limit=MAX_RESULTS):
+        """[(score, entry)] best first. Queries need a word of 2+ characters."""
+        started = time.perf_counter()
+        normalized = normalize(query)
+        words = [w for w in normalized.split() if len(w) >= 2]
+        if not words:
+            return []
+        scored = []
+        for key in self.candidates(words):
+            entry = self.entries[key]
+            score = KIND_WEIGHT.get(entry.kind, 1.0) + entry.recency
+            if normalized in entry.text:
+                score += 2.0 # Contiguous match
+            score += sum(1.0 for w in words if " " + w in entry.title_text) # Word starts in the title
+            score -= len(entry.text) / 1000.0 # Shorter wins ties
+            scored.append((score, entry))
+        results = heapq.nlargest(limit, scored, key=lambda item: item[0])
+        self.last_query_ms = (time.perf_counter() - started) * 1000
+        return results
+
+def search_all(indexes, query, limit=MAX_RESULTS):
+    """Merged results of several indexes (this window's tabs + the shared library)."""
+    results = []
+    for index in indexes:
+        results.extend(index.search(query, limit))
+    results.sort(key=lambda item: item[0], reverse=True)
+    return [entry for _score, entry in results[:limit]]
+
+# ── Tabs ─────────────────────────────────────────────────────────────────────
+
+def tab_entry(record):
+    return SwitcherEntry("tab", ("tab", record.tab_id), record.title, record.url, tab_id=record.tab_id)
+
+def attach_tab_index(registry):
+    """A SwitcherIndex of `registry`'s tabs, kept current by its signals."""
+    index = SwitcherIndex()
+    for record in registry.records():
+        index.add(tab_entry(record))
+    def changed(tab_id):
+        record = registry.get(tab_id)
+        if record is not None:
+            index.add(tab_entry(record))
+    registry.record_changed.connect(changed)
+    registry.record_removed.connect(lambda tab_id: index.remove(("tab", tab_id)))
+    return index
+
+# ── History & Bookmarks ──────────────────────────────────────────────────────
+
+def _recency(timestamp):
+    """1.0 for now, fading over weeks. `timestamp`: epoch seconds or an ISO string."""
+    if isinstance(timestamp, str):
+        try:
+            timestamp = datetime.fromisoformat(timestamp).timestamp()
+        except ValueError:
+            return 0.0
+    age_days = max(0.0, (time.time() - (timestamp or 0)) / 86400)
+    return 1.0 / (1.0 + age_days / 7)
+
+class LibraryIndexer(QObject):
+    """
+    Indexes DataManager history and bookmarks (one per process, see library_index).
+    Warms up in chunks on idle ticks; afterwards follows DataManager's listener events.
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.index = SwitcherIndex()
+        self.data_manager = DataManager()
+        self._history_refs = Counter() # url -> history items with it (history may repeat a URL)
+        self._pending = [("bookmark", b) for b in self.data_manager.get_bookmarks()]
+        self._pending += [("history", h) for h in self.data_manager.get_history()] # Newest first
+        self.warm = False
+        self.warm_ms = 0.0
+        self.data_manager.add_listener(self._on_data_event)
+
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self._warm_chunk)
+        self._timer.start(0)
+
+    def _warm_chunk(self):
+        started = time.perf_counter()
+        chunk, self._pending = self._pending[:WARM_CHUNK], self._pending[WARM_CHUNK:]
+        for kind, item in chunk:
+            if kind == "bookmark":
+                self._add_bookmark(item)
+            else:
+                self._add_history(item, keep_newer=True)
+        self.warm_ms += (time.perf_counter() - started) * 1000
+        if not self._pending:
+            self._timer.stop()
+            self.warm = True
+            print(f"XeNit Switcher: Indexed {len(self.index)} entries in {self.warm_ms:.0f} ms")
+
+    def _add_bookmark(self, item):
+        url = item.get("url", "")
+        if url:
+            self.index.add(SwitcherEntry("bookmark", ("bookmark", url), item.get("title", ""), url, recency=0.5))
+
+    def _add_history(self, item, keep_newer=False):
+        url = item.get("url", "")
+        if not url:
+            return
+        self._history_refs[url] += 1
+        # Warm-up walks newest first: an entry already indexed is the newer visit
+        if keep_newer and ("history", url) in self.index.entries:
+            return
+        self.index.add(SwitcherEntry("history", ("history", url), item.get("title", ""), url,
+                                     recency=_recency(item.get("timestamp"))))
+
+    def _on_data_event(self, event, item):
+        if event == "history_added":
+            self._add_history(item)
+        elif event == "history_removed":
+            if not self.warm and ("history", item) in self._pending:
+                self._pending.remove(("history", item)) # Trimmed before it was ever indexed
+                return
+            url = item.get("url", "")
+            self._history_refs[url] -= 1
+            if self._history_refs[url] <= 0:
+                del self._history_refs[url]
+                self.index.remove(("history", url))
+        elif event == "history_cleared":
+            self._pending = [p for p in self._pending if p[0] != "history"]
+            self._history_refs.clear()
+            self.index.clear("history")
+        elif event == "bookmark_added":
+            self._add_bookmark(item)
+
+_library = None
+
+def library_index():
+    """The process-wide history / bookmark indexer, starting its warm-up on first use."""
+    global _library
+    if _library is None:
+        _library = LibraryIndexer()
+    return _library
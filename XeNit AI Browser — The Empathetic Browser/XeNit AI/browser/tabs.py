@@ -2,9 +2,28 @@ from PyQt6.QtWidgets import QTabWidget, QTabBar, QWidget, QHBoxLayout, QPushButt
 from PyQt6.QtCore import Qt, QUrl, QSize
 from PyQt6.QtGui import QIcon
 from browser.engine import WebView
-from browser.pages import get_new_tab_html
+from browser.lifecycle import TabLifecycleManager
+from browser.pool import WebViewPool
+from browser.registry import TabRegistry
+import time
 from functools import partial
 
+class PlaceholderTab(QWidget):
+    """
+    A restored tab that hasn't been shown yet: no WebView, no renderer.
+    `entry` is its session snapshot (url, title, history); see browser/session.py.
+    """
+    def __init__(self, entry, parent=None):
+        super().__init__(parent)
+        self.entry = entry
+        self.tab_id = next(WebView._tab_ids) # Handed on to its WebView
+
+    def url(self):
+        return QUrl(self.entry.get("url", ""))
+
+    def title(self):
+        return self.entry.get("title", "")
+
 class TabManager(QTabWidget):
     def __init__(self, parent=None, profile=None):
         super().__init__(parent)
@@ -12,6 +31,12 @@ class TabManager(QTabWidget):
         self.setTabsClosable(False) # We are using custom buttons
         self.setMovable(True)
         self.setDocumentMode(True)
+        # Every tab by stable id, kept current by the views' signals
+        self.registry = TabRegistry(self)
+        # Freezes / discards idle background tabs, restores them when shown
+        self.lifecycle = TabLifecycleManager(self)
+        # Hidden views with the new tab page already loaded (see add_new_tab)
+        self.pool = WebViewPool(self, self.profile)
         self.currentChanged.connect(self.tab_changed)
         
         self.setStyleSheet("""
@@ -71,51 +96,55 @@ class TabManager(QTabWidget):
         self.tabBar().setTabButton(i, QTabBar.ButtonPosition.RightSide, None)
         self.tabBar().setTabButton(i, QTabBar.ButtonPosition.LeftSide, None)
 
-    def add_new_tab(self, qurl=None, label="New Tab"):
+    def add_new_tab(self, qurl=None, label="New Tab", index=None, history_state=None, tab_id=None):
+        """
+        Opens a WebView tab (before the "+" tab, or at `index`) and makes it current.
+        `history_state` (browser/session.py) restores its back/forward list instead of loading `qurl`.
+        `tab_id` is only passed for a placeholder being materialized.
+        """
         
+        started = time.perf_counter()
         if qurl is None:
             qurl = QUrl("")
-            
-        browser = WebView(self.count(), self, profile=self.profile)
+        
+        # A plain new tab comes ready-made from the pool
+        browser = None
+        is_new_tab = qurl.toString() in ("", "xenit://newtab") and not history_state and tab_id is None
+        if is_new_tab:
+            browser = self.pool.take()
+        warm = browser is not None
+        if not warm:
+            browser = WebView(self, profile=self.profile, tab_id=tab_id)
         
         # Insert before the last tab (the plus button)
-        insert_index = max(0, self.count() - 1)
+        insert_index = max(0, self.count() - 1) if index is None else index
         
+        self.lifecycle.track(browser)
+        self.registry.register(browser)
         i = self.insertTab(insert_index, browser, label)
         self.setCurrentIndex(i)
+        self._add_close_button(i, browser)
         
-        # Create and set custom close button
-        close_btn = QPushButton("✖")
-        close_btn.setFixedSize(20, 20)
-        close_btn.setCursor(Qt.CursorShape.PointingHandCursor)
-        close_btn.setProperty("target_browser", browser) # robust binding
-        close_btn.setStyleSheet("""
-            QPushButton {
-                background: transparent;
-                color: #A1A1AA;
-                border: none;
-                border-radius: 10px;
-                font-weight: bold;
-                font-size: 10px;
-            }
-            QPushButton:hover {
-                background: rgba(255, 42, 109, 0.2);
-                color: #FF2A6D;
-            }
-        """)
+        restored = False
+        if history_state and qurl.scheme() != "xenit":
+            from browser.session import restore_history
+            # Navigates to the entry that was current when the session was saved
+            restored = restore_history(browser.history(), history_state)
         
-        close_btn.clicked.connect(self.on_close_click)
-        
-        self.tabBar().setTabButton(i, QTabBar.ButtonPosition.RightSide, close_btn)
-        
-        if qurl.toString() == "" or qurl.scheme() == "xenit":
-            browser.setHtml(get_new_tab_html(), QUrl("xenit://newtab"))
-        else:
-            browser.load(qurl)
+        if not restored and not warm:
+            if qurl.toString() == "" or qurl.scheme() == "xenit":
+                browser.load_internal_page(qurl)
+            else:
+                browser.load(qurl)
             
         browser.titleChanged.connect(lambda title: self.setTabText(self.indexOf(browser), title[:20]))
         browser.iconChanged.connect(lambda icon: self.setTabIcon(self.indexOf(browser), icon))
         browser.urlChanged.connect(lambda url: self.window().update_url_bar(url, browser))
+        if is_new_tab:
+            self.pool.record_open(browser, started, warm)
+        if warm:
+            browser.show()
+            return browser # Already painted: no fade-in
         
         # Add fade-in animation for smoother transition
         from PyQt6.QtCore import QPropertyAnimation, QEasingCurve
@@ -143,6 +172,61 @@ class TabManager(QTabWidget):
         
         return browser
 
+    def add_placeholder_tab(self, entry):
+        """Adds a restored tab without creating its WebView (see materialize). Doesn't change the current tab."""
+        placeholder = PlaceholderTab(entry)
+        self.blockSignals(True)
+        i = self.insertTab(max(0, self.count() - 1), placeholder, (entry.get("title") or entry.get("url") or "New Tab")[:20])
+        self.blockSignals(False)
+        self._add_close_button(i, placeholder)
+        self.registry.register(placeholder)
+        return placeholder
+
+    def materialize(self, placeholder):
+        """Swaps a placeholder for a real WebView in the same position, loading its URL / history."""
+        index = self.indexOf(placeholder)
+        entry = placeholder.entry
+        self.blockSignals(True)
+        self.removeTab(index)
+        placeholder.deleteLater()
+        qurl = QUrl(entry.get("url", ""))
+        label = (entry.get("title") or "Loading...")[:20]
+        # Through the window, so its per-tab hooks (emotion signal) are connected too
+        window = self.window()
+        if hasattr(window, 'add_new_tab'):
+            browser = window.add_new_tab(qurl, label, index=index, history_state=entry.get("state"),
+                                         tab_id=placeholder.tab_id)
+        else:
+            browser = self.add_new_tab(qurl, label, index=index, history_state=entry.get("state"),
+                                       tab_id=placeholder.tab_id)
+        self.blockSignals(False)
+        return browser
+
+    def _add_close_button(self, i, widget):
+        # Create and set custom close button
+        close_btn = QPushButton("✖")
+        close_btn.setFixedSize(20, 20)
+        close_btn.setCursor(Qt.CursorShape.PointingHandCursor)
+        close_btn.setProperty("target_browser", widget) # robust binding
+        close_btn.setStyleSheet("""
+            QPushButton {
+                background: transparent;
+                color: #A1A1AA;
+                border: none;
+                border-radius: 10px;
+                font-weight: bold;
+                font-size: 10px;
+            }
+            QPushButton:hover {
+                background: rgba(255, 42, 109, 0.2);
+                color: #FF2A6D;
+            }
+        """)
+        
+        close_btn.clicked.connect(self.on_close_click)
+        
+        self.tabBar().setTabButton(i, QTabBar.ButtonPosition.RightSide, close_btn)
+
     def on_close_click(self):
         btn = self.sender()
         if not btn:
@@ -184,6 +268,11 @@ class TabManager(QTabWidget):
             return
 
         current_widget = self.currentWidget()
+        # Restored tabs load the first time they are shown
+        if isinstance(current_widget, PlaceholderTab):
+            current_widget = self.materialize(current_widget)
         if current_widget and isinstance(current_widget, WebView):
+            self.registry.activated(current_widget)
+            self.lifecycle.activate(current_widget)
             if hasattr(self.window(), 'update_url_bar'):
                 self.window().update_url_bar(current_widget.url(), current_widget)
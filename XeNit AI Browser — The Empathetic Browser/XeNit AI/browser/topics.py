@@ -0,0 +1,130 @@
+"""
+XeNit AI — Incremental Tab Topic Index
+TF-IDF over tab titles (plus the site) with an inverted index, updated per
+tab as titles and URLs change. Clusters are looked for around changed tabs
+only: their candidates come from the postings of their own terms, so the
+cost follows the tabs that changed, not the number of tabs open.
+"""
+import re
+import math
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+# Tabs needed before a topic counts as overload (same threshold as the old monitor)
+MIN_CLUSTER = 4
+# Cosine similarity (TF-IDF) to the changed tab for another tab to join its cluster
+SIMILARITY = 0.1
+# The site counts, but less than a title word: 4 YouTube tabs aren't one topic
+HOST_WEIGHT = 0.5
+
+_WORD_RE = re.compile(r"[^\W_]{4,}") # Words > 3 chars, like the old monitor
+# Words every other title has: they'd glue unrelated tabs together
+STOPWORDS = {
+    "with", "from", "that", "this", "your", "about", "what", "have", "will", "more",
+    "page", "home", "login", "sign", "loading", "untitled", "official", "site", "online",
+    "free", "best", "search", "google", "youtube", "wikipedia",
+}
+
+def title_terms(title):
+    return {w for w in _WORD_RE.findall(title.lower()) if w not in STOPWORDS}
+
+def host_term(url):
+    host = (urlsplit(url).hostname or "").rstrip('.')
+    if host.startswith("www."):
+        host = host[4:]
+    return "site:" + host if host else None
+
+class TopicIndex:
+    """Term postings per tab id. update() / remove() are O(terms of that tab)."""
+    def __init__(self, min_cluster=MIN_CLUSTER, similarity=SIMILARITY):
+        self.min_cluster = min_cluster
+        self.similarity = similarity
+        self.terms = {} # tab id -> {term: weight}
+        self.postings = defaultdict(set) # term -> tab ids
+        self.dirty = set() # tabs changed since the last find_clusters()
+
+    def __len__(self):
+        return len(self.terms)
+
+    def update(self, tab_id, title, url):
+        terms = dict.fromkeys(title_terms(title), 1.0)
+        host = host_term(url)
+        if host:
+            terms[host] = HOST_WEIGHT
+        old = self.terms.get(tab_id, {})
+        if terms == old:
+            return False
+        for term in old.keys() - terms.keys():
+            self._unpost(term, tab_id)
+        for term in terms.keys() - old.keys():
+            self.postings[term].add(tab_id)
+        self.terms[tab_id] = terms
+        self.dirty.add(tab_id)
+        return True
+
+    def remove(self, tab_id):
+        for term in self.terms.pop(tab_id, {}):
+            self._unpost(term, tab_id)
+        self.dirty.discard(tab_id)
+
+    def _unpost(self, term, tab_id):
+        tabs = self.postings.get(term)
+        if tabs is not None:
+            tabs.discard(tab_id)
+            if not tabs:
+                del self.postings[term]
+
+    def idf(self, term):
+        return math.log((1 + len(self.terms)) / (1 + len(self.postings.get(term, ())))) + 1
+
+    def _vector(self, tab_id):
+        vector = {t: w * self.idf(t) for t, w in self.terms.get(tab_id, {}).items()}
+        norm = math.sqrt(sum(v * v for v in vector.values())) or 1.0
+        return {t: v / norm for t, v in vector.items()}
+
+    def similar(self, tab_id):
+        """Tabs sharing a title word with `tab_id` whose TF-IDF cosine passes the threshold."""
+        base = self._vector(tab_id)
+        candidates = set()
+        for term in base:
+            if not term.startswith("site:"): # A shared site alone never makes a topic
+                candidates |= self.postings.get(term, set())
+        candidates.discard(tab_id)
+        matches = []
+        for other in candidates:
+            vector = self._vector(other)
+            score = sum(weight * vector.get(term, 0.0) for term, weight in base.items())
+            if score >= self.similarity:
+                matches.append(other)
+        return matches
+
+    def find_clusters(self):
+        """
+        Clusters around the tabs changed since the last call: [(topic, [tab ids])],
+        largest first, each cluster reported once.
+        """
+        found = []
+        seen = set()
+        for tab_id in self.dirty:
+            if tab_id in seen or tab_id not in self.terms:
+                continue
+            members = [tab_id] + self.similar(tab_id)
+            if len(members) < self.min_cluster:
+                continue
+            seen.update(members)
+            found.append((self.topic_of(members), members))
+        self.dirty.clear()
+        found.sort(key=lambda cluster: len(cluster[1]), reverse=True)
+        return found
+
+    def topic_of(self, members):
+        """The title word most members share (rarer words win ties), else their site."""
+        counts = defaultdict(int)
+        for tab_id in members:
+            for term in self.terms.get(tab_id, ()):
+                counts[term] += 1
+        if not counts:
+            return ""
+        words = [t for t in counts if not t.startswith("site:")] or list(counts)
+        best = max(words, key=lambda t: (counts[t], self.idf(t)))
+        return best[5:] if best.startswith("site:") else best
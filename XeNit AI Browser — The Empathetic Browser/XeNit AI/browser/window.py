@@ -1,17 +1,20 @@
 from PyQt6.QtWidgets import (QMainWindow, QToolBar, QLineEdit, QVBoxLayout, 
                              QWidget, QHBoxLayout, QLabel, QMenu, QSizePolicy, QPushButton,
-                             QSplitter, QGraphicsDropShadowEffect)
+                             QSplitter, QGraphicsDropShadowEffect, QApplication)
 from PyQt6.QtCore import Qt, QSize, QUrl, QTimer
-from PyQt6.QtGui import QIcon, QAction, QColor
+from PyQt6.QtGui import QIcon, QAction, QColor, QShortcut, QKeySequence
 import os
 import urllib.parse
 
 from browser.tabs import TabManager
+from browser.session import SessionManager
+from browser.switcher import attach_tab_index, library_index
 from browser.menu import CustomMenu
 from browser.data_manager import DataManager
 from browser.sidebar import Sidebar
 from browser.dialogs import (HistoryDialog, BookmarksDialog, DownloadsDialog, 
-                             SettingsDialog, HelpDialog, SignInDialog)
+                             SettingsDialog, HelpDialog, SignInDialog, TaskManagerDialog,
+                             SwitcherDialog)
 from browser.memory import MemoryManager
 from browser.ai_agent import AIAgent
 from browser.voice import VoiceManager
@@ -21,6 +24,24 @@ from browser.medical_safety import (check_health_search, get_safety_banner_js,
 
 from PyQt6.QtWebEngineCore import QWebEngineProfile, QWebEngineSettings
 
+_shared_profile = None
+
+def get_shared_profile(profile_dir):
+    """Returns the process-wide XeNit profile, creating it on first use."""
+    global _shared_profile
+    if _shared_profile is None:
+        # Parent to the app (not a window) so closing the first window doesn't kill it
+        profile = QWebEngineProfile("XeNitProfile", QApplication.instance())
+        profile.setPersistentStoragePath(profile_dir)
+        profile.setCachePath(profile_dir)
+        profile.setPersistentCookiesPolicy(QWebEngineProfile.PersistentCookiesPolicy.ForcePersistentCookies)
+        # Use a specific, common Chrome version to pass security checks
+        profile.setHttpUserAgent("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.6099.130 Safari/537.36")
+        
+        print(f"XeNit Profile Path set to: {profile_dir}")
+        _shared_profile = profile
+    return _shared_profile
+
 class BrowserWindow(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -31,14 +52,8 @@ class BrowserWindow(QMainWindow):
         if not os.path.exists(self.profile_dir):
             os.makedirs(self.profile_dir)
 
-        profile = QWebEngineProfile("XeNitProfile", self)
-        profile.setPersistentStoragePath(self.profile_dir)
-        profile.setCachePath(self.profile_dir)
-        profile.setPersistentCookiesPolicy(QWebEngineProfile.PersistentCookiesPolicy.ForcePersistentCookies)
-        # Use a specific, common Chrome version to pass security checks
-        profile.setHttpUserAgent("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.6099.130 Safari/537.36")
-        
-        print(f"XeNit Profile Path set to: {self.profile_dir}")
+        # One profile for all windows, so cookies, scripts and the AdBlock service are shared
+        profile = get_shared_profile(self.profile_dir)
         self.global_profile = profile
 
         # PERFORMANCE: Enable Smooth Scrolling & GPU Acceleration
@@ -307,28 +322,18 @@ class BrowserWindow(QMainWindow):
                 """
                 self.window.tabs.currentWidget().page().runJavaScript(js_code)
                 
-            def close_specific_tabs(self, indices_str):
-                # indices_str might be "[1, 3, 5]" string or list
+            def close_specific_tabs(self, ids_str):
+                # ids_str might be "[12, 15, 21]" string or list of stable tab ids (see TabRegistry)
                 try:
                     import json
-                    if isinstance(indices_str, str):
-                        indices = json.loads(indices_str)
+                    if isinstance(ids_str, str):
+                        tab_ids = json.loads(ids_str)
                     else:
-                        indices = indices_str
+                        tab_ids = ids_str
                     
-                    # Sort descending to avoid index shift issues
-                    indices.sort(reverse=True)
-                    for i in indices:
-                         # Safety check: Don't close current tab if possible?
-                         # Actually Agent can close content in background.
-                         if i < self.window.tabs.count():
-                             # Retrieve widget to explicitly delete it (release memory)
-                             widget = self.window.tabs.widget(i)
-                             self.window.tabs.removeTab(i)
-                             if widget:
-                                 widget.deleteLater()
-                                 
-                    print(f"XeNit Agent: Closed {len(indices)} tabs.")
+                    # Ids don't shift as tabs close; ids of tabs already gone are skipped
+                    closed = self.window.tabs.registry.close(int(t) for t in tab_ids)
+                    print(f"XeNit Agent: Closed {closed} tabs.")
                 except Exception as e:
                     print(f"XeNit: Error closing tabs {e}")
                 
@@ -357,20 +362,25 @@ class BrowserWindow(QMainWindow):
         self.tabs = TabManager(self, profile=self.global_profile)
         self.splitter.addWidget(self.tabs)
         
-        # Tab Health Monitor
+        # Tab Health Monitor (topic clusters are reported as tab titles / URLs change)
         self.cleanup_proposal = None
         self.last_cleanup_prompt = 0
-        self.tab_health_timer = QTimer()
-        self.tab_health_timer.timeout.connect(self.monitor_tabs)
-        self.tab_health_timer.start(10000) # Check every 10s
+        self.tabs.registry.cluster_found.connect(self.on_tab_cluster)
+        
+        # Quick switcher (Ctrl+K): this window's tabs + history / bookmarks (indexed in the background)
+        self.tab_index = attach_tab_index(self.tabs.registry)
+        self.library = library_index()
+        QShortcut(QKeySequence("Ctrl+K"), self, activated=self.open_switcher)
         
         # Set Splitter Factors to favor Web Content
         self.splitter.setStretchFactor(0, 0)
         self.splitter.setStretchFactor(1, 1)
         self.splitter.setCollapsible(0, False) # Can't fully collapse sidebar via dragging, button does it
 
-        # Load initial tab
-        self.add_new_tab(QUrl("xenit://newtab"), "New Tab")
+        # Load initial tab (or the previous session, as placeholders that load when shown)
+        self.session = SessionManager(self)
+        if not self.session.restore():
+            self.add_new_tab(QUrl("xenit://newtab"), "New Tab")
         
         # Apply Styles for URL Bar uniqueness, reusing pill aesthetic
         self.url_bar.setStyleSheet("""
@@ -389,45 +399,29 @@ class BrowserWindow(QMainWindow):
             }
         """)
 
-    def monitor_tabs(self):
+    def on_tab_cluster(self, topic, tab_ids):
         import time
         if time.time() - self.last_cleanup_prompt < 300: # Don't bug more than once every 5 mins
             return
-            
-        count = self.tabs.count()
-        if count < 4: return # Lower threshold for easier testing
-
-        # Simple Clustering
-        groups = {}
-        for i in range(count):
-            title = self.tabs.tabText(i)
-            # Use main words > 3 chars
-            words = [w.lower() for w in title.split() if len(w) > 3]
-            for w in words:
-                if w not in groups: groups[w] = []
-                groups[w].append(i)
-        
-        # Check for heavy clusters
-        for topic, indices in groups.items():
-            if len(indices) >= 4: # Overload Threshold
-                # Found overload
-                titles = [self.tabs.tabText(i) for i in indices]
-                self.cleanup_proposal = {"topic": topic, "indices": indices, "titles": titles}
-                self.last_cleanup_prompt = time.time()
-                
-                msg = f"I noticed you have {len(indices)} tabs about '{topic}'. Want me to summarize them and close the extras? (Reply 'Yes' or 'Do it')"
-                
-                # Auto-open sidebar if hidden so user sees the help
-                if not self.sidebar.isVisible():
-                    self.sidebar.show()
-                # Ensure AI tab is shown
-                self.sidebar.show_ai_tab()
-                
-                self.sidebar.add_ai_message(msg)
-                self.sidebar.show_ai_tab()
-                
-                self.sidebar.add_ai_message(msg)
-                break
+        
+        # Overload found (TopicIndex, >= 4 similar tabs): most recently used first, so those are the ones kept
+        members = [r for r in (self.tabs.registry.get(t) for t in tab_ids) if r is not None]
+        if len(members) < 4:
+            return
+        members.sort(key=lambda r: r.last_active, reverse=True)
+        self.cleanup_proposal = {"topic": topic, "tab_ids": [r.tab_id for r in members],
+                                 "titles": [r.title for r in members]}
+        self.last_cleanup_prompt = time.time()
+        
+        msg = f"I noticed you have {len(members)} tabs about '{topic}'. Want me to summarize them and close the extras? (Reply 'Yes' or 'Do it')"
+        
+        # Auto-open sidebar if hidden so user sees the help
+        if not self.sidebar.isVisible():
+            self.sidebar.show()
+        # Ensure AI tab is shown
+        self.sidebar.show_ai_tab()
+        
+        self.sidebar.add_ai_message(msg)
 
     def monitor_burnout(self):
         import time
@@ -589,7 +583,7 @@ class BrowserWindow(QMainWindow):
         else:
             self.sidebar.show()
 
-    def add_new_tab(self, qurl=None, label="New Tab"):
+    def add_new_tab(self, qurl=None, label="New Tab", index=None, history_state=None, tab_id=None):
         # Apply Dot Trick globally to ALL new tabs (AI, Links, User)
         if qurl and isinstance(qurl, QUrl):
              host = qurl.host().lower()
@@ -598,7 +592,7 @@ class BrowserWindow(QMainWindow):
                  qurl.setHost(new_host)
                  print(f"XeNit AdBlock: Applied Dot Trick (Global) -> {qurl.toString()}")
         
-        browser = self.tabs.add_new_tab(qurl, label)
+        browser = self.tabs.add_new_tab(qurl, label, index=index, history_state=history_state, tab_id=tab_id)
         
         # Connect Emotion Signal
         if hasattr(browser, 'emotion_detected'):
@@ -884,7 +878,7 @@ class BrowserWindow(QMainWindow):
         if not hasattr(self, 'tabs') or browser != self.tabs.currentWidget():
             return
 
-        if qurl.scheme() == "xenit":
+        if qurl.scheme() == "xenit" and qurl.host() != "adblock-stats":
             self.url_bar.setText("")
             self.url_bar.setPlaceholderText("Search the future...")
         else:
@@ -972,6 +966,8 @@ class BrowserWindow(QMainWindow):
         menu.history_action.triggered.connect(self.open_history)
         menu.bookmarks_action.triggered.connect(self.open_bookmarks)
         menu.downloads_action.triggered.connect(self.open_downloads)
+        menu.task_manager_action.triggered.connect(self.open_task_manager)
+        menu.switcher_action.triggered.connect(self.open_switcher)
         
         menu.settings_action.triggered.connect(self.open_settings)
         menu.help_action.triggered.connect(self.open_help)
@@ -980,6 +976,11 @@ class BrowserWindow(QMainWindow):
         # Show relative to button
         menu.exec(self.menu_btn.mapToGlobal(self.menu_btn.rect().bottomLeft()))
 
+    def closeEvent(self, event):
+        # Snapshot this window's tabs before they go away
+        self.session.window_closed()
+        super().closeEvent(event)
+
     def open_new_window(self):
         # Create a new instance of BrowserWindow
         new_win = BrowserWindow()
@@ -1002,6 +1003,14 @@ class BrowserWindow(QMainWindow):
         dlg = DownloadsDialog(self)
         dlg.exec()
 
+    def open_switcher(self):
+        dlg = SwitcherDialog(self, [self.tab_index, self.library.index])
+        dlg.exec()
+
+    def open_task_manager(self):
+        dlg = TaskManagerDialog(self)
+        dlg.exec()
+
     def open_settings(self):
         dlg = SettingsDialog(self)
         dlg.exec()
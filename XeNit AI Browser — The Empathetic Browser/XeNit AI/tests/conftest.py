@@ -0,0 +1,20 @@
+import os
+import sys
+import pytest
+
+# Tests import the app modules the way main.py does ("from browser.x import ...")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture(scope="session")
+def qapp():
+    """A QApplication on the offscreen platform (WebEngine needs a GUI app; no window is shown)."""
+    pytest.importorskip("PyQt6.QtWidgets", exc_type=ImportError)
+    from PyQt6.QtCore import Qt
+    from PyQt6.QtWidgets import QApplication
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    app = QApplication.instance()
+    if app is None:
+        # Same as main.py: must be set before the app exists for QtWebEngine
+        QApplication.setAttribute(Qt.ApplicationAttribute.AA_ShareOpenGLContexts, True)
+        app = QApplication([])
+    return app
@@ -0,0 +1,72 @@
+"""One AdBlock interceptor per profile: memory and threads stay flat as tabs are added."""
+import os
+import tracemalloc
+
+import pytest
+
+# ImportError too: the wheel may be installed without the system libraries it loads
+pytest.importorskip("PyQt6.QtWebEngineCore", exc_type=ImportError)
+
+from PyQt6.QtCore import QThread
+from PyQt6.QtWebEngineCore import QWebEngineProfile
+from browser import adblock
+from browser.adblock import AdBlockService
+
+TABS = 30
+
+def os_threads():
+    """Threads of this process (QThreads included), or None without /proc."""
+    try:
+        return len(os.listdir("/proc/self/task"))
+    except OSError:
+        return None
+
+@pytest.fixture
+def profile(qapp, tmp_path, monkeypatch):
+    # Compile into a scratch dir, never the user's ~/.xenit_browser
+    monkeypatch.setattr(adblock, "BLOCKLIST_CACHE", str(tmp_path / "adblock_cache.bin"))
+    monkeypatch.setattr(adblock, "filter_list_paths", lambda: [])
+    profile = QWebEngineProfile() # Off the record
+    yield profile
+    while AdBlockService._services.get(profile) is not None:
+        AdBlockService.release(profile)
+
+def wait_for_loader(interceptor):
+    interceptor.loader.wait(60000)
+
+def test_tabs_share_one_interceptor(profile):
+    first = AdBlockService.acquire(profile)
+    wait_for_loader(first)
+    threads_before = os_threads()
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        interceptors = [AdBlockService.acquire(profile) for _ in range(TABS - 1)]
+        grown = tracemalloc.get_traced_memory()[0] - baseline
+    finally:
+        tracemalloc.stop()
+
+    assert all(i is first for i in interceptors)
+    assert AdBlockService._services[profile].refcount == TABS
+    assert len(first.findChildren(QThread)) == 2 # One loader, one updater, whatever the tab count
+    # 29 more tabs cost a counter increment each, not another 75k-domain list
+    assert grown < 64 * 1024
+    if threads_before is not None:
+        assert os_threads() <= threads_before
+
+def test_last_release_tears_the_interceptor_down(profile):
+    interceptor = AdBlockService.acquire(profile)
+    AdBlockService.acquire(profile)
+    wait_for_loader(interceptor)
+    AdBlockService.release(profile)
+    assert AdBlockService._services[profile].refcount == 1
+    AdBlockService.release(profile)
+    assert profile not in AdBlockService._services
+    assert not interceptor.refresh_timer.isActive()
+
+def test_profiles_get_their_own_interceptor(profile):
+    other = QWebEngineProfile()
+    try:
+        assert AdBlockService.acquire(profile) is not AdBlockService.acquire(other)
+    finally:
+        AdBlockService.release(other)
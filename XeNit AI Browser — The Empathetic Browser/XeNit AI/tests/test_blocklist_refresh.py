@@ -0,0 +1,153 @@
+"""Conditional blocklist download and the versioned cache swap, against a local HTTP stand-in."""
+import os
+import threading
+import http.client
+import urllib.error
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from browser.blocklist import (fetch_blocklist, load_fetch_meta, compile_blocklist,
+                               load_cached_blocklist, cache_versions)
+
+HOSTS_V1 = b"# StevenBlack-style hosts\n0.0.0.0 ads.example.com\n0.0.0.0 tracker.test\n"
+HOSTS_V2 = HOSTS_V1 + b"0.0.0.0 newads.example.org\n"
+
+class ListServer:
+    """Serves `body` with an ETag; answers 304 to a matching If-None-Match. `mode` scripts failures."""
+    def __init__(self):
+        self.body = HOSTS_V1
+        self.etag = '"v1"'
+        self.mode = "ok" # ok | error | html | truncated
+        self.requests = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests.append(dict(self.headers))
+                if server.mode == "error":
+                    self.send_error(503)
+                    return
+                if server.mode == "html":
+                    page = b"<html><body>Rate limit exceeded</body></html>"
+                    self.send_response(200)
+                    self.send_header("Content-Length", str(len(page)))
+                    self.end_headers()
+                    self.wfile.write(page)
+                    return
+                if self.headers.get("If-None-Match") == server.etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("ETag", server.etag)
+                self.send_header("Last-Modified", "Sun, 18 Oct 2026 10:00:00 GMT")
+                self.send_header("Content-Length", str(len(server.body)))
+                self.end_headers()
+                if server.mode == "truncated":
+                    # Connection drops halfway through the body
+                    self.wfile.write(server.body[:len(server.body) // 2])
+                    self.close_connection = True
+                    return
+                self.wfile.write(server.body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}/hosts"
+        threading.Thread(target=self.httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+@pytest.fixture
+def server():
+    server = ListServer()
+    yield server
+    server.close()
+
+@pytest.fixture
+def paths(tmp_path):
+    return {"dest": str(tmp_path / "adblock_list.txt"), "meta_path": str(tmp_path / "adblock_list.meta.json")}
+
+def read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+def test_first_download_then_304(server, paths):
+    assert fetch_blocklist(server.url, timeout=5, **paths) is True
+    assert read(paths["dest"]) == HOSTS_V1
+    meta = load_fetch_meta(paths["meta_path"])
+    assert meta["etag"] == '"v1"' and meta["last_modified"]
+
+    assert fetch_blocklist(server.url, timeout=5, **paths) is False
+    assert server.requests[-1]["If-None-Match"] == '"v1"'
+    assert server.requests[-1]["If-Modified-Since"] == meta["last_modified"]
+    assert load_fetch_meta(paths["meta_path"])["checked_at"] >= meta["checked_at"]
+    assert read(paths["dest"]) == HOSTS_V1
+
+def test_changed_list_is_downloaded(server, paths):
+    fetch_blocklist(server.url, timeout=5, **paths)
+    server.body, server.etag = HOSTS_V2, '"v2"'
+    assert fetch_blocklist(server.url, timeout=5, **paths) is True
+    assert read(paths["dest"]) == HOSTS_V2
+    assert load_fetch_meta(paths["meta_path"])["etag"] == '"v2"'
+
+def test_conditional_headers_need_the_list_itself(server, paths):
+    fetch_blocklist(server.url, timeout=5, **paths)
+    os.remove(paths["dest"])
+    # Meta without the file: a 304 would leave us with no list, so fetch it whole
+    assert fetch_blocklist(server.url, timeout=5, **paths) is True
+    assert "If-None-Match" not in server.requests[-1]
+
+@pytest.mark.parametrize("mode, error", [
+    ("error", urllib.error.HTTPError),
+    ("html", ValueError),
+    ("truncated", http.client.IncompleteRead),
+])
+def test_failed_refresh_keeps_the_current_list(server, paths, mode, error):
+    fetch_blocklist(server.url, timeout=5, **paths)
+    meta = load_fetch_meta(paths["meta_path"])
+    server.body, server.etag, server.mode = HOSTS_V2, '"v2"', mode
+    with pytest.raises(error):
+        fetch_blocklist(server.url, timeout=5, **paths)
+    assert read(paths["dest"]) == HOSTS_V1
+    assert load_fetch_meta(paths["meta_path"]) == meta
+    assert not os.path.exists(paths["dest"] + ".tmp")
+
+def test_swap_keeps_the_live_index_until_retired(tmp_path):
+    source = tmp_path / "adblock_list.txt"
+    cache = str(tmp_path / "adblock_cache.bin")
+    source.write_bytes(HOSTS_V1)
+    _count, first_path = compile_blocklist([str(source)], cache)
+    live = load_cached_blocklist([str(source)], cache)
+    assert live.match("cdn.ads.example.com") == "ads.example.com"
+
+    # A refresh compiles a new version next to the mapped one; the live map keeps answering
+    source.write_bytes(HOSTS_V2)
+    os.utime(source, ns=(live.source_stamp + 10**9, live.source_stamp + 10**9))
+    assert load_cached_blocklist([str(source)], cache) is None # Stale until recompiled
+    count, second_path = compile_blocklist([str(source)], cache)
+    assert count == 3 and second_path != first_path
+    assert live.match("newads.example.org") is None
+    assert live.match("tracker.test") == "tracker.test"
+
+    fresh = load_cached_blocklist([str(source)], cache)
+    assert fresh.path == second_path
+    assert fresh.match("newads.example.org") == "newads.example.org"
+    live.retire()
+    assert cache_versions(cache) == [second_path]
+    fresh.close()
+
+def test_legacy_cache_name_is_superseded(tmp_path):
+    source = tmp_path / "adblock_list.txt"
+    source.write_bytes(HOSTS_V1)
+    legacy = tmp_path / "adblock_cache.bin"
+    legacy.write_bytes(b"old format")
+    _count, path = compile_blocklist([str(source)], str(legacy))
+    assert cache_versions(str(legacy)) == [path, str(legacy)]
+    index = load_cached_blocklist([str(source)], str(legacy))
+    assert index.path == path and not legacy.exists()
+    index.close()
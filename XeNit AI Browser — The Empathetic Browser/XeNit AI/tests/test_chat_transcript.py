@@ -0,0 +1,54 @@
+"""Chat transcripts: per-thread ring buffers, thread switching and leaving the chat site."""
+import pytest
+
+# The module pulls in the page bridge, which needs QtWebEngine
+pytest.importorskip("PyQt6.QtWebEngineCore", exc_type=ImportError)
+
+from browser.chat_transcript import ChatTranscript, chat_site
+
+def message(text, sender="Alice"):
+    return {"sender": sender, "text": text, "time": "10:32", "outgoing": False}
+
+def test_chat_site_suffix_rule():
+    assert chat_site("web.whatsapp.com") == "web.whatsapp.com"
+    assert chat_site("www.messenger.com.") == "messenger.com"
+    assert chat_site("notmessenger.com") is None
+    assert chat_site("") is None
+
+def test_ring_keeps_last_messages_of_each_thread():
+    transcript = ChatTranscript(ring_size=3)
+    transcript.add("alice", [message(str(i)) for i in range(5)])
+    assert [m.text for m in transcript.recent()] == ["2", "3", "4"]
+    assert transcript.format_recent(1) == "Alice (10:32): 4"
+
+def test_empty_batch_switches_back_to_a_thread_read_before():
+    transcript = ChatTranscript()
+    transcript.add("alice", [message("hi alice")])
+    transcript.add("bob", [message("hi bob", "Bob")])
+    # The extractor has seen Alice's messages already: switching back sends none
+    transcript.add("alice", [])
+    assert transcript.current_thread == "alice"
+    assert [m.text for m in transcript.recent()] == ["hi alice"]
+
+def test_empty_batch_for_a_new_thread_does_not_show_the_previous_one():
+    transcript = ChatTranscript()
+    transcript.add("alice", [message("hi alice")])
+    transcript.add("carol", [])
+    assert transcript.recent() == []
+
+def test_oldest_thread_dropped_past_max_threads():
+    transcript = ChatTranscript(max_threads=2)
+    for thread in ("a", "b", "c"):
+        transcript.add(thread, [message(thread)])
+    assert list(transcript.threads) == ["b", "c"]
+
+def test_leaving_the_chat_site_drops_the_buffers():
+    transcript = ChatTranscript()
+    transcript.follow("web.whatsapp.com")
+    transcript.add("alice", [message("hi")])
+    assert transcript.active_for("web.whatsapp.com")
+    assert not transcript.active_for("example.com")
+    transcript.follow("example.com")
+    assert transcript.threads == {} and transcript.current_thread is None
+    transcript.follow("web.whatsapp.com")
+    assert not transcript.active_for("web.whatsapp.com")
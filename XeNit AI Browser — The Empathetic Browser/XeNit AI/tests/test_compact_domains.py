@@ -0,0 +1,50 @@
+"""Memory footprint (tracemalloc) and lookup time of CompactDomainSet against a set of str."""
+import time
+import tracemalloc
+
+import pytest
+
+from browser.blocklist import CompactDomainSet, iter_list_domains, BUNDLED_BLOCKLIST
+
+def synthetic_domains(count):
+    # Shaped like hosts-list entries: a label or two on top of a registrable domain
+    return (f"ads{i % 97}.tracker-{i}.example{i % 13}.com" for i in range(count))
+
+def traced_size(build):
+    """Bytes still allocated by build() once it returns (the structure it keeps)."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = build()
+        size = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    return result, size
+
+@pytest.mark.parametrize("name, domains", [
+    ("bundled list", lambda: iter_list_domains([BUNDLED_BLOCKLIST])),
+    # tracemalloc makes 1M allocations slow: per-domain cost is flat, 200k shows it
+    ("200k synthetic", lambda: synthetic_domains(200_000)),
+])
+def test_footprint_against_a_set(name, domains):
+    # Both keep what they are built from: the set its str objects, the compact set ~8.5 bytes each
+    old, old_bytes = traced_size(lambda: set(domains()))
+    compact, compact_bytes = traced_size(lambda: CompactDomainSet(domains()))
+    print(f"\n{name}: {len(old):,} domains, set {old_bytes / 2**20:.1f} MB, "
+          f"CompactDomainSet {compact_bytes / 2**20:.1f} MB ({compact.nbytes / 2**20:.1f} MB of hashes and buckets); "
+          f"per 1M domains: {old_bytes / len(old):.0f} MB vs {compact_bytes / len(old):.1f} MB")
+    assert len(compact) == len(old)
+    assert compact_bytes < old_bytes / 8
+    assert compact_bytes < len(old) * 8 * 1.1 # The arrays and little else
+
+def test_lookup_time_on_a_million_domains():
+    domains = CompactDomainSet(synthetic_domains(1_000_000))
+    hosts = [f"cdn.ads{i % 97}.tracker-{i}.example{i % 13}.com" for i in range(0, 1_000_000, 1000)]
+    hosts += [f"www.site-{i}.org" for i in range(1000)]
+    started = time.perf_counter_ns()
+    hits = sum(1 for host in hosts if domains.match(host))
+    per_lookup_us = (time.perf_counter_ns() - started) / len(hosts) / 1000
+    print(f"\n{per_lookup_us:.1f} us per lookup over {len(domains):,} domains")
+    assert hits == 1000
+    # log2(1M) = 20 steps per suffix, a few suffixes per host
+    assert per_lookup_us < 50
@@ -0,0 +1,71 @@
+"""Cosmetic filter engine: per-host stylesheets, filter-list ## rules and the bounded cache."""
+import re
+
+from browser.cosmetic import CosmeticFilterEngine, CosmeticRuleSet, YOUTUBE_SCRIPTLET
+from browser.filters import FilterEngine
+
+EASYLIST_SAMPLE = """
+[Adblock Plus 2.0]
+! Title: sample
+##.sponsored-box
+##div[data-ad-slot]
+news.test,shop.test##.promo-rail
+~blog.news.test,news.test##.newsletter-ad
+news.test#@#.sponsored-box
+news.test#?#div:-abp-has(> .ad)
+||ads.example.com^
+/banner/*$image
+"""
+
+def selectors(engine, host):
+    css, _scripts = engine.resolve(host)
+    groups = re.split(r" \{ display: none !important; \}\n?", css)
+    return {selector for group in groups for selector in group.split(",\n") if selector}
+
+def test_builtin_domain_selectors_and_scriptlets():
+    engine = CosmeticFilterEngine()
+    css, scripts = engine.resolve("www.youtube.com")
+    assert "#masthead-ad" in css and ".adsbygoogle" in css
+    assert scripts == [YOUTUBE_SCRIPTLET]
+    css, scripts = engine.resolve("example.org")
+    assert "#masthead-ad" not in css and ".adsbygoogle" in css
+    assert scripts == []
+
+def test_youtube_scriptlet_is_event_driven():
+    # The old sweeper polled every 300 ms over the whole document
+    assert "setInterval" not in YOUTUBE_SCRIPTLET
+    assert "requestAnimationFrame" in YOUTUBE_SCRIPTLET
+
+def test_filter_lists_feed_element_hiding_rules():
+    filters = FilterEngine.from_text(EASYLIST_SAMPLE)
+    assert filters.rule_count == 2 # The network rules only
+    assert len(filters.cosmetic) == 5 # #?# (extended CSS) is not supported
+
+    engine = CosmeticFilterEngine(generic=[], domains={}, scriptlets={})
+    engine.set_list_rules(filters.cosmetic)
+    news = selectors(engine, "www.news.test")
+    assert {".promo-rail", "div[data-ad-slot]", ".newsletter-ad"} <= news
+    assert ".sponsored-box" not in news # #@# exception
+    other = selectors(engine, "example.org")
+    assert ".sponsored-box" in other and ".promo-rail" not in other
+
+def test_new_rules_invalidate_compiled_hosts():
+    engine = CosmeticFilterEngine(generic=[], domains={}, scriptlets={})
+    first = engine.injection_script("news.test")
+    version = engine.version
+    rules = CosmeticRuleSet()
+    rules.add("news.test##.late-ad")
+    engine.set_list_rules(rules)
+    assert engine.version == version + 1
+    assert ".late-ad" not in first and ".late-ad" in engine.injection_script("news.test")
+
+def test_cache_is_bounded_lru():
+    engine = CosmeticFilterEngine(cache_size=3)
+    for host in ["a.test", "b.test", "c.test"]:
+        engine.injection_script(host)
+    engine.resolve("a.test") # Most recently used again
+    engine.resolve("d.test")
+    assert list(engine._cache) == ["c.test", "a.test", "d.test"]
+    # The injection script is kept with the stylesheet, not as a second entry
+    assert engine.injection_script("a.test") is engine.injection_script("a.test")
+    assert len(engine._cache) == 3
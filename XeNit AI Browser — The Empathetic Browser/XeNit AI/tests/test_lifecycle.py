@@ -0,0 +1,156 @@
+"""TabLifecycleManager sweeps over 50 synthetic tabs (fake pages, real lifecycle states)."""
+import pytest
+
+# ImportError too: the wheel may be installed without the system libraries it loads
+pytest.importorskip("PyQt6.QtWebEngineCore", exc_type=ImportError)
+
+from PyQt6.QtCore import QObject, QPointF, QUrl, pyqtSignal
+from browser import lifecycle
+from browser.lifecycle import TabLifecycleManager, LifecycleState, process_usage
+
+class FakePage:
+    def __init__(self, recommended=LifecycleState.Discarded):
+        self.state = LifecycleState.Active
+        self.recommended = recommended
+        self.scripts_run = []
+
+    def lifecycleState(self):
+        return self.state
+
+    def setLifecycleState(self, state):
+        self.state = state
+
+    def recommendedState(self):
+        return self.recommended
+
+    def isVisible(self):
+        return False
+
+    def scrollPosition(self):
+        return QPointF(0, 480)
+
+    def runJavaScript(self, source, *args):
+        self.scripts_run.append(source)
+
+class FakeView(QObject):
+    loadFinished = pyqtSignal(bool)
+
+    def __init__(self, parent, scheme="https", recommended=LifecycleState.Discarded):
+        super().__init__(parent)
+        self._page = FakePage(recommended)
+        self._url = QUrl(f"{scheme}://example.com/")
+
+    def page(self):
+        return self._page
+
+    def url(self):
+        return self._url
+
+class FakeTabWidget(QObject):
+    def __init__(self):
+        super().__init__()
+        self.current = None
+
+    def currentWidget(self):
+        return self.current
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(lifecycle.time, "monotonic", clock)
+    return clock
+
+def make_tabs(qapp, count, clock, step=1.0, **view_options):
+    tab_widget = FakeTabWidget()
+    manager = TabLifecycleManager(tab_widget)
+    manager.timer.stop() # Swept by hand
+    views = []
+    for _ in range(count):
+        view = FakeView(tab_widget, **view_options)
+        manager.track(view)
+        views.append(view)
+        clock.now += step
+    tab_widget.current = views[-1]
+    return tab_widget, manager, views
+
+def states(views):
+    return [v.page().lifecycleState() for v in views]
+
+def test_equal_timestamps_do_not_break_the_sweep(qapp, clock):
+    # Tabs tracked in the same tick: the sort must not fall back to comparing views
+    _tabs, manager, views = make_tabs(qapp, 50, clock, step=0.0)
+    clock.now += lifecycle.DISCARD_AFTER
+    manager.sweep()
+    assert states(views[:-1]).count(LifecycleState.Discarded) == 49
+    assert views[-1].page().lifecycleState() == LifecycleState.Active
+
+def test_budget_discards_least_recently_used_first(qapp, clock):
+    _tabs, manager, views = make_tabs(qapp, 50, clock)
+    manager.sweep()
+    discarded = [v for v in views if v.page().lifecycleState() == LifecycleState.Discarded]
+    assert len(views) - len(discarded) == manager.max_live_tabs
+    assert discarded == views[:len(discarded)] # The oldest ones
+    assert manager.stats()["discarded_total"] == len(discarded)
+
+def test_idle_tabs_freeze_before_they_discard(qapp, clock):
+    _tabs, manager, views = make_tabs(qapp, 5, clock)
+    clock.now += lifecycle.FREEZE_AFTER
+    manager.sweep()
+    assert states(views[:-1]) == [LifecycleState.Frozen] * 4
+    clock.now += lifecycle.DISCARD_AFTER
+    manager.sweep()
+    assert states(views[:-1]) == [LifecycleState.Discarded] * 4
+
+def test_recommended_state_and_internal_pages_limit_discarding(qapp, clock):
+    _tabs, manager, views = make_tabs(qapp, 3, clock, recommended=LifecycleState.Frozen)
+    clock.now += lifecycle.DISCARD_AFTER
+    manager.sweep()
+    assert states(views[:-1]) == [LifecycleState.Frozen] * 2
+
+    # Internal pages can't be reloaded from a URL: frozen instead
+    _tabs, manager, views = make_tabs(qapp, 3, clock, scheme="xenit")
+    clock.now += lifecycle.DISCARD_AFTER
+    manager.sweep()
+    assert states(views[:-1]) == [LifecycleState.Frozen] * 2
+
+def test_internal_pages_do_not_use_up_the_budget(qapp, clock):
+    # The 10 least recently used tabs are internal pages, then 40 web pages
+    tab_widget, manager, views = make_tabs(qapp, 10, clock, scheme="xenit")
+    for _ in range(40):
+        view = FakeView(tab_widget)
+        manager.track(view)
+        views.append(view)
+        clock.now += 1.0
+    tab_widget.current = views[-1]
+    manager.sweep()
+    live = [v for v in views if v.page().lifecycleState() != LifecycleState.Discarded]
+    assert len(live) == manager.max_live_tabs
+    # Skipped without counting, so the next-oldest web pages went instead
+    assert states(views[:10]) == [LifecycleState.Frozen] * 10
+    assert manager.stats()["discarded_total"] == len(views) - len(live)
+
+def test_activate_restores_a_discarded_tab_and_its_scroll(qapp, clock):
+    tab_widget, manager, views = make_tabs(qapp, 2, clock)
+    view = views[0]
+    assert manager.discard(view)
+    assert view.page().lifecycleState() == LifecycleState.Discarded
+
+    tab_widget.current = view
+    manager.activate(view)
+    assert view.page().lifecycleState() == LifecycleState.Active
+    view.loadFinished.emit(True)
+    assert view.page().scripts_run == ["window.scrollTo(0, 480);"]
+    assert manager.stats()["restored_total"] == 1
+
+@pytest.mark.skipif(process_usage() is None, reason="needs /proc")
+def test_process_usage_reports_this_process():
+    usage = process_usage()
+    assert usage["processes"] >= 1
+    assert usage["rss_mb"] > 0
@@ -0,0 +1,86 @@
+"""Session save -> restore round trip: 100 tabs come back as placeholders, only the active one loads."""
+import base64
+
+import pytest
+
+# ImportError too: the wheel may be installed without the system libraries it loads
+pytest.importorskip("PyQt6.QtWebEngineCore", exc_type=ImportError)
+
+from PyQt6.QtWidgets import QWidget
+from browser.engine import WebView
+from browser.session import SessionManager, save_history, restore_history
+from browser.tabs import TabManager, PlaceholderTab
+
+class FakeWindow(QWidget):
+    """Just what SessionManager and TabManager use of a BrowserWindow."""
+    def __init__(self):
+        super().__init__()
+        self.tabs = TabManager(self)
+        self.tabs.pool.timer.stop() # No pre-warmed views in a test
+
+    def update_url_bar(self, url, browser=None):
+        pass
+
+@pytest.fixture
+def loads(monkeypatch):
+    """URLs the WebViews were asked to load (nothing is actually loaded)."""
+    calls = []
+    monkeypatch.setattr(WebView, "load", lambda self, qurl: calls.append(qurl.toString()))
+    monkeypatch.setattr(WebView, "load_internal_page", lambda self, qurl: calls.append(qurl.toString()))
+    return calls
+
+@pytest.fixture
+def managers(monkeypatch):
+    monkeypatch.setattr(SessionManager, "_managers", [])
+    monkeypatch.setattr(SessionManager, "_last_written", None)
+
+def saved_session(count, active):
+    tabs = [{"url": f"https://site{i}.test/page", "title": f"Site {i}",
+             "entries": [{"url": f"https://site{i}.test/page", "title": f"Site {i}"}], "current": 0, "state": None}
+            for i in range(count)]
+    return {"active": active, "tabs": tabs}
+
+def placeholders(tabs):
+    return [tabs.widget(i) for i in range(tabs.count()) if isinstance(tabs.widget(i), PlaceholderTab)]
+
+def test_hundred_tabs_restore_as_placeholders_and_round_trip(qapp, tmp_path, loads, managers):
+    saved = saved_session(100, active=42)
+    window = FakeWindow()
+    SessionManager.restore_window(window, saved)
+    tabs = window.tabs
+
+    assert tabs.count() == 101 # 100 tabs + "+"
+    assert loads == ["https://site42.test/page"] # Only the tab that is shown
+    assert isinstance(tabs.widget(42), WebView) and tabs.currentIndex() == 42
+    assert len(placeholders(tabs)) == 99
+    assert len(tabs.registry) == 100
+
+    # Saved again: placeholders write back the entry they were restored from
+    path = str(tmp_path / "session.json")
+    manager = SessionManager(window, path=path)
+    manager.save()
+    [snapshot] = SessionManager(FakeWindow(), path=path).load()
+    assert snapshot["active"] == 42
+    assert len(snapshot["tabs"]) == 100
+    for i, entry in enumerate(snapshot["tabs"]):
+        if i != 42:
+            assert entry == saved["tabs"][i]
+
+    # Into a fresh window: same tabs, still only one load
+    loads.clear()
+    again = FakeWindow()
+    SessionManager.restore_window(again, {"active": 7, "tabs": snapshot["tabs"]})
+    assert loads == ["https://site7.test/page"]
+    assert [p.title() for p in placeholders(again.tabs)] == [e["title"] for i, e in enumerate(snapshot["tabs"]) if i != 7]
+
+def test_history_blob_the_binding_cannot_read_falls_back(qapp):
+    # A binding without the QDataStream operator raises TypeError: reported, never raised
+    assert save_history(object()) is None
+    assert restore_history(object(), base64.b64encode(b"junk").decode()) is False
+
+def test_unreadable_history_state_still_loads_the_url(qapp, loads, managers):
+    saved = saved_session(2, active=1)
+    saved["tabs"][1]["state"] = base64.b64encode(b"not a QWebEngineHistory").decode()
+    window = FakeWindow()
+    SessionManager.restore_window(window, saved)
+    assert loads == ["https://site1.test/page"]
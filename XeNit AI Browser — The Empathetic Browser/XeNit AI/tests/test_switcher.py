@@ -0,0 +1,89 @@
+"""Quick switcher trigram index: matching, ranking and query time over 10k entries."""
+import random
+import statistics
+import time
+
+from browser.switcher import SwitcherEntry, SwitcherIndex, search_all, normalize, MAX_RESULTS
+
+def entry(kind, title, url, recency=0.0):
+    return SwitcherEntry(kind, (kind, url), title, url, recency=recency)
+
+def titles(results):
+    return [e.title for _score, e in results]
+
+def test_normalize_and_site_words():
+    assert normalize("Python 3.12 — What's New?") == "python 3 12 what s new"
+    e = entry("history", "", "https://www.docs.python.org/3/whatsnew/")
+    assert e.title == "docs.python.org/3/whatsnew" and e.text == "docs python org 3 whatsnew docs python"
+
+def test_words_match_in_any_order_and_two_letters_only_at_word_starts():
+    index = SwitcherIndex()
+    index.add(entry("history", "Rust borrow checker", "https://doc.rust-lang.org/book/"))
+    index.add(entry("history", "Trusty old laptop", "https://shop.test/laptop"))
+    assert titles(index.search("checker rust")) == ["Rust borrow checker"]
+    assert set(titles(index.search("rust"))) == {"Rust borrow checker", "Trusty old laptop"}
+    assert titles(index.search("ru")) == ["Rust borrow checker"] # Not "tRUsty"
+    assert index.search("r") == [] and index.search("zzz") == []
+
+def test_tabs_rank_above_bookmarks_above_history():
+    index = SwitcherIndex()
+    for kind in ("history", "bookmark", "tab"):
+        index.add(entry(kind, "Project roadmap", f"https://{kind}.test/roadmap"))
+    assert [e.kind for _s, e in index.search("roadmap")] == ["tab", "bookmark", "history"]
+
+def test_contiguous_and_word_start_matches_rank_first():
+    index = SwitcherIndex()
+    index.add(entry("history", "Weekly team meeting notes", "https://a.test/1"))
+    index.add(entry("history", "Notes from the team offsite, meeting room", "https://a.test/2"))
+    index.add(entry("history", "Dreamteam: bookmeeting app", "https://a.test/3"))
+    assert titles(index.search("team meeting"))[0] == "Weekly team meeting notes"
+    # Word starts in the title beat the same letters inside words
+    ranked = titles(index.search("meeting"))
+    assert ranked.index("Dreamteam: bookmeeting app") == len(ranked) - 1
+
+def test_re_adding_an_entry_replaces_its_grams_and_remove_drops_them():
+    index = SwitcherIndex()
+    index.add(SwitcherEntry("tab", ("tab", 1), "Inbox - Mail", "https://mail.test/"))
+    index.add(SwitcherEntry("tab", ("tab", 1), "Calendar", "https://calendar.test/"))
+    assert index.search("inbox") == [] and titles(index.search("calendar")) == ["Calendar"]
+    index.remove(("tab", 1))
+    assert len(index) == 0 and index.postings == {}
+
+def test_search_all_merges_indexes_best_first():
+    tabs, library = SwitcherIndex(), SwitcherIndex()
+    tabs.add(entry("tab", "Grafana dashboard", "https://grafana.test/d/1"))
+    library.add(entry("history", "Grafana alerts", "https://grafana.test/alerting"))
+    merged = search_all([library, tabs], "grafana")
+    assert [e.kind for e in merged] == ["tab", "history"]
+
+def generated_entries(count, rng):
+    words = ["python", "rust", "docs", "tutorial", "release", "notes", "kubernetes", "guide", "api",
+             "reference", "issue", "pull", "request", "design", "review", "budget", "invoice", "travel",
+             "flight", "hotel", "recipe", "pasta", "news", "weather", "music", "playlist", "video"]
+    sites = ["github.com", "docs.python.org", "stackoverflow.com", "news.example.com", "youtube.com",
+             "wiki.example.org", "mail.example.com", "shop.example.net"]
+    for i in range(count):
+        title = " ".join(rng.sample(words, 4)) + f" {i}"
+        url = f"https://{rng.choice(sites)}/{i}"
+        yield entry(rng.choice(["tab", "bookmark", "history", "history"]), title, url, recency=rng.random())
+
+def test_query_time_over_ten_thousand_entries():
+    rng = random.Random(20261018)
+    index = SwitcherIndex()
+    for e in generated_entries(10_000, rng):
+        index.add(e)
+    assert len(index) == 10_000
+    queries = ["py", "python", "rust docs", "kube guide", "release notes github", "pasta recipe",
+               "invoice", "flight hotel", "yout", "api reference"]
+    times = []
+    for _ in range(5):
+        for query in queries:
+            started = time.perf_counter()
+            results = index.search(query)
+            times.append((time.perf_counter() - started) * 1000)
+            assert len(results) <= MAX_RESULTS
+    assert index.search("rust docs") and all("rust" in e.text and "docs" in e.text
+                                             for _s, e in index.search("rust docs"))
+    median_ms = statistics.median(times)
+    print(f"\n10k entries: median {median_ms:.2f} ms, max {max(times):.2f} ms per query")
+    assert median_ms < 5
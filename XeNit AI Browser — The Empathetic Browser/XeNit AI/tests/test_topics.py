@@ -0,0 +1,68 @@
+"""TopicIndex: TF-IDF similarity between tab titles and the topic clusters it reports."""
+from browser.topics import TopicIndex, title_terms, host_term, MIN_CLUSTER, SIMILARITY
+
+def index_of(tabs, **options):
+    index = TopicIndex(**options)
+    for tab_id, (title, url) in enumerate(tabs):
+        index.update(tab_id, title, url)
+    return index
+
+def test_title_terms_drop_short_words_and_stopwords():
+    assert title_terms("Login - Google Search: Python asyncio tutorial for you") == {"python", "asyncio", "tutorial"}
+    assert host_term("https://www.docs.python.org/3/") == "site:docs.python.org"
+    assert host_term("about:blank") is None
+
+def test_four_tabs_on_one_topic_make_a_cluster():
+    tabs = [
+        ("Python asyncio tutorial", "https://realpython.com/async"),
+        ("asyncio — Python docs", "https://docs.python.org/3/library/asyncio.html"),
+        ("Python asyncio gather vs wait", "https://stackoverflow.com/q/1"),
+    ]
+    index = index_of(tabs)
+    assert index.find_clusters() == [] # 3 < MIN_CLUSTER
+    index.update(3, "Debugging asyncio in Python", "https://blog.example.com/asyncio")
+    clusters = index.find_clusters()
+    assert len(clusters) == 1
+    topic, members = clusters[0]
+    assert topic in ("python", "asyncio") and sorted(members) == [0, 1, 2, 3]
+    assert len(members) >= MIN_CLUSTER
+    assert index.find_clusters() == [] # Reported once: nothing changed since
+
+def test_one_shared_word_in_long_titles_is_below_the_threshold():
+    filler = ["alpha", "bravo", "charlie", "delta", "echo", "foxtrot", "golf", "hotel", "india", "juliet",
+              "kilo", "lima", "mike", "november", "oscar", "papa", "quebec", "romeo", "sierra", "tango"]
+    tabs = [("rust " + " ".join(f"{w}{i}" for w in filler), f"https://site{i}.test/") for i in range(2)]
+    index = index_of(tabs)
+    assert index.similar(0) == []
+    # The same pair with short titles is well above it
+    index = index_of([("rust borrow", "https://a.test/"), ("rust lifetimes", "https://b.test/")])
+    assert index.similar(0) == [1]
+
+def test_threshold_is_configurable():
+    tabs = [("rust borrow checker", "https://a.test/"), ("rust lifetimes explained", "https://b.test/")]
+    assert index_of(tabs, similarity=SIMILARITY).similar(0) == [1]
+    assert index_of(tabs, similarity=0.9).similar(0) == []
+
+def test_a_shared_site_alone_is_not_a_topic():
+    tabs = [(title, "https://www.youtube.com/watch?v=" + title) for title in
+            ("Cooking pasta", "Guitar lesson", "Marathon training", "Chess openings", "Jazz piano")]
+    index = index_of(tabs)
+    assert all(index.similar(tab_id) == [] for tab_id in range(len(tabs)))
+    assert index.find_clusters() == []
+
+def test_stopwords_do_not_glue_tabs_together():
+    tabs = [(f"{word} - Official Site - Home", f"https://{word}.test/") for word in
+            ("Garden", "Bakery", "Plumber", "Dentist")]
+    assert index_of(tabs).find_clusters() == []
+
+def test_update_and_remove_keep_postings_current():
+    index = index_of([("Kubernetes ingress", "https://a.test/"), ("Kubernetes helm charts", "https://b.test/")])
+    assert index.postings["kubernetes"] == {0, 1}
+    assert not index.update(0, "Kubernetes ingress", "https://a.test/") # Unchanged
+    assert index.update(0, "Terraform modules", "https://a.test/")
+    assert index.postings["kubernetes"] == {1} and "ingress" not in index.postings
+    index.remove(1)
+    assert "kubernetes" not in index.postings and "helm" not in index.postings
+    assert "site:b.test" not in index.postings
+    assert len(index) == 1 and 1 not in index.dirty
+    assert index.similar(0) == []